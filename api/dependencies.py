@@ -1,31 +1,30 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from config.database import get_db
+from config.database import get_db, get_read_db, open_read_session
 from services.user_service import UserService
 from services.auth_service import AuthService
 from services.account_service import AccountService
 from services.transaction_service import TransactionService
 from services.message_service import MessageService
+from services.statement_service import StatementService
 from security.security_utils import SecurityUtils
-from security.encryption import EncryptionService
-from security.key_manager import KeyManager
+from security.key_container import key_container
+from security.session_store import session_store
 from security.signature import SignatureService
 from dal.repositories.user_repository import UserRepository
 from dal.repositories.account_repository import AccountRepository
 from dal.repositories.transaction_repository import TransactionRepository
-from dal.repositories.encryption_keys import EncryptionKeyRepository
-from dal.repositories.session_repository import SessionRepository
+from dal.repositories.balance_snapshot_repository import BalanceSnapshotRepository
+from dal.repositories.ledger_outbox_repository import LedgerOutboxRepository
 from dal.repositories.mfa_repository import MFARepository
 from dal.repositories.message_repository import MessageRepository
 
 
-def get_user_service(db: Session = Depends(get_db)):
+def get_user_service(db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     """获取用户服务实例"""
-    user_repository = UserRepository(db)
-    key_repository = EncryptionKeyRepository(db)
-    key_manager = KeyManager(key_repository)
+    user_repository = UserRepository(db, read_db)
     security_utils = SecurityUtils("your-secret-key")
-    encryption_service = EncryptionService(key_manager)
+    encryption_service = key_container.get_encryption_service()
 
     return UserService(
         user_repository=user_repository,
@@ -34,16 +33,13 @@ def get_user_service(db: Session = Depends(get_db)):
     )
 # 获取服务实例
 def get_auth_service(db: Session = Depends(get_db)):
-    key_repository = EncryptionKeyRepository(db)
     user_repository = UserRepository(db)
-    session_repository = SessionRepository(db)
     mfa_repository = MFARepository(db)
-    key_manager = KeyManager(key_repository)
     security_utils = SecurityUtils("your-secret-key")
 
     return AuthService(
         user_repository=user_repository,
-        session_repository=session_repository,
+        session_store=session_store,
         mfa_repository=mfa_repository,
         security_utils=security_utils
     )
@@ -51,24 +47,22 @@ def get_auth_service(db: Session = Depends(get_db)):
 
 def get_account_service(db: Session = Depends(get_db)):
     account_repository = AccountRepository(db)
-    key_repository = EncryptionKeyRepository(db)
-    key_manager = KeyManager(key_repository)
-    encryption_service = EncryptionService(key_manager)
+    encryption_service = key_container.get_encryption_service()
 
     return AccountService(
         account_repository=account_repository,
-        encryption_service=encryption_service
+        encryption_service=encryption_service,
+        transaction_repository=TransactionRepository(db),
+        balance_snapshot_repository=BalanceSnapshotRepository(db)
     )
 
 
-def get_transaction_service(db: Session = Depends(get_db)):
-    transaction_repository = TransactionRepository(db)
+def get_transaction_service(db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    transaction_repository = TransactionRepository(db, read_db)
     account_repository = AccountRepository(db)
-    key_repository = EncryptionKeyRepository(db)
 
-    # 初始化密钥管理器和加密服务
-    key_manager = KeyManager(key_repository)
-    encryption_service = EncryptionService(key_manager)
+    # 使用进程级共享的加密服务
+    encryption_service = key_container.get_encryption_service()
 
     # 可选：初始化签名服务
     # signature_service = SignatureService(key_manager)
@@ -76,18 +70,25 @@ def get_transaction_service(db: Session = Depends(get_db)):
     return TransactionService(
         transaction_repository=transaction_repository,
         account_repository=account_repository,
-        encryption_service=encryption_service
+        encryption_service=encryption_service,
         # 如果需要签名服务，添加: signature_service=signature_service
+        ledger_outbox_repository=LedgerOutboxRepository(db)
+    )
+
+
+def get_statement_service():
+    """获取对账单服务（流式输出期间自行管理数据库会话）"""
+    return StatementService(
+        session_factory=open_read_session,
+        encryption_service=key_container.get_encryption_service()
     )
 
 
-def get_message_service(db: Session = Depends(get_db)):
+def get_message_service(db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     """获取消息服务"""
-    message_repository = MessageRepository(db)
+    message_repository = MessageRepository(db, read_db)
     user_repository = UserRepository(db)
-    key_repository = EncryptionKeyRepository(db)
-    key_manager = KeyManager(key_repository)
-    encryption_service = EncryptionService(key_manager)
+    encryption_service = key_container.get_encryption_service()
     signature_service = SignatureService("your-secret-key-for-signatures")
 
     return MessageService(
@@ -1,10 +1,57 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1 import auth, users, accounts, transactions
 from api.v1 import blockchain
 from api.v1 import message
+from api.v1 import internal
+from security.blockchain import close_blockchain, get_ledger_writer
+from security.key_container import key_container
+from services.balance_snapshot_service import balance_snapshot_job
+from services.ledger_outbox_service import ledger_reconciler
+from config.database import dispose_engines
+from config.setting import BALANCE_SNAPSHOT, CACHE
+from utils.cache_bus import invalidation_bus
+from security.password_hasher import password_hasher
+from security.session_store import session_store
 
-app = FastAPI(title="MyBank API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期：按依赖顺序启动后台组件，退出时按相反顺序停止，
+    使用数据库的后台任务全部停止后再释放连接池
+    """
+    # 密钥材料进程内只加载一次，所有请求共享
+    key_container.load()
+    # 每个工作进程各自监听，接收其他进程发布的缓存失效事件
+    if CACHE["bus_enabled"]:
+        invalidation_bus.start()
+    session_store.start()
+    # 打开账本存储：取得存储锁的工作进程成为账本写入进程，其他工作进程不封装区块，
+    # 其已提交的交易由写入进程的对账任务从 ledger_outbox 封装上链
+    sealer = get_ledger_writer()
+    if sealer is not None:
+        sealer.start()
+        # 补回上次退出时尚未上链的已提交交易
+        ledger_reconciler.start()
+    if BALANCE_SNAPSHOT["enabled"]:
+        balance_snapshot_job.start()
+    try:
+        yield
+    finally:
+        balance_snapshot_job.stop(timeout=5)
+        # 封装队列中剩余的交易后再关闭账本（封装回调会删除对账记录）
+        ledger_reconciler.stop(timeout=5)
+        close_blockchain(timeout=5)
+        # 写回尚未持久化的新会话
+        session_store.stop(timeout=5)
+        invalidation_bus.stop()
+        password_hasher.shutdown()
+        dispose_engines()
+
+
+app = FastAPI(title="MyBank API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS Middelware
 app.add_middleware(
@@ -22,6 +69,7 @@ app.include_router(accounts.router, prefix="/api/v1/accounts", tags=["账户"])
 app.include_router(transactions.router, prefix="/api/v1/transactions", tags=["交易"])
 app.include_router(blockchain.router, prefix="/api/v1/blockchain", tags=["区块链"])
 app.include_router(message.router, prefix="/api/v1/message", tags=["安全消息"])
+app.include_router(internal.router, prefix="/internal", tags=["内部"])
 
 @app.get("/")
 async def root():
@@ -1,9 +1,13 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from decimal import Decimal
 from typing import List, Optional
 from services.account_service import AccountService
-from api.dependencies import get_account_service, get_db
+from services.statement_service import StatementService, STATEMENT_FORMATS
+from api.dependencies import get_account_service, get_db, get_statement_service
 from security.permission import has_role, owns_account, get_current_user
 from sqlalchemy.orm import Session
 
@@ -15,6 +19,10 @@ class AccountCreate(BaseModel):
     user_id: int
     account_type: str
 
+class BulkAccountCreate(BaseModel):
+    user_id: int
+    account_types: List[str]
+
 class AccountResponse(BaseModel):
     account_id: int
     account_number: str
@@ -69,6 +77,30 @@ async def create_account(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=List[AccountResponse])
+@has_role(["customer", "bank_staff", "system_admin"])
+async def create_accounts_bulk(
+    request: BulkAccountCreate,
+    account_service: AccountService = Depends(get_account_service),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """批量开户（如企业客户的子账户），一次请求创建多个账户"""
+    try:
+        # 如果是普通用户，只能为自己创建账户
+        if "customer" in [r.role_name for r in current_user.roles]:
+            if request.user_id != current_user.user_id:
+                raise HTTPException(status_code=403, detail="You can only create accounts for yourself")
+
+        return await account_service.create_accounts_bulk(
+            user_id=request.user_id,
+            account_types=request.account_types
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 router.get("/{account_id}", response_model=AccountResponse)
 @owns_account
 async def get_account(
@@ -106,14 +138,43 @@ async def get_user_accounts(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/{account_id}/statement")
+@owns_account
+async def export_statement(
+    account_id: int,
+    format: str = "csv",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    statement_service: StatementService = Depends(get_statement_service),
+    current_user = Depends(get_current_user)
+):
+    """
+    流式导出账户对账单（CSV 或 NDJSON），按时间正序输出
+    数据边读取边解密边发送，适用于交易量很大的账户
+    """
+    try:
+        await run_in_threadpool(statement_service.validate_request, account_id, format, start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        statement_service.stream_statement(account_id, format, start_date, end_date),
+        media_type=STATEMENT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="statement_{account_id}.{format}"'}
+    )
+
 @router.get("/{account_id}/balance")
 async def get_account_balance(
     account_id: int,
+    at: Optional[datetime] = None,
     account_service: AccountService = Depends(get_account_service)
 ):
-    """获取账户余额"""
+    """获取账户余额，指定 at 时返回该时刻的历史余额"""
     try:
-        balance = await account_service.get_account_balance(account_id)
+        if at is not None:
+            balance = await account_service.get_balance_at(account_id, at)
+        else:
+            balance = await account_service.get_account_balance(account_id)
         return {"balance": balance}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
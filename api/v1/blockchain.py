@@ -1,20 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
-from security.blockchain import blockchain_instance
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from security.blockchain import Blockchain, get_blockchain
 from security.permission import has_role, get_current_user
+from utils.exceptions import LedgerLockedError
 
 router = APIRouter()
 
+
+def _ledger() -> Blockchain:
+    """账本只由写入进程打开，其他工作进程收到的账本查询返回 503，由客户端重试"""
+    try:
+        return get_blockchain()
+    except LedgerLockedError:
+        raise HTTPException(status_code=503, detail="Ledger is not available on this worker, please retry")
+
+
 @router.get("/blocks")
 @has_role(["customer", "bank_staff", "system_admin"])
-async def get_blocks(current_user = Depends(get_current_user)):
-    """获取所有区块"""
-    return blockchain_instance.get_blocks()
+async def get_blocks(
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = False,
+    current_user = Depends(get_current_user)
+):
+    """
+    按区块索引分页获取区块
+    stream=true 时以 NDJSON 流式返回从 cursor 开始的全部区块，每个区块生成后立即发送
+    """
+    blockchain = _ledger()
+    if stream:
+        lines = (json.dumps(block) + "\n" for block in blockchain.iter_blocks(cursor))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    blocks = blockchain.get_blocks(cursor, limit)
+    next_cursor = cursor + limit if cursor + limit < len(blockchain.chain) else None
+    return {"blocks": blocks, "next_cursor": next_cursor}
 
 @router.get("/validate")
 @has_role(["bank_staff", "system_admin"])
-async def validate_chain(current_user = Depends(get_current_user)):
-    """验证整个区块链的完整性"""
-    return {"is_valid": blockchain_instance.is_chain_valid()}
+async def validate_chain(full: bool = False, current_user = Depends(get_current_user)):
+    """
+    验证区块链的完整性
+    默认只验证上次检查点之后新增的区块，full=true 时从创世区块完整验证
+    """
+    return await run_in_threadpool(_ledger().validate_chain, full)
 
 @router.get("/transaction/{transaction_id}")
 @has_role(["customer", "bank_staff", "system_admin"])
@@ -23,7 +54,23 @@ async def verify_transaction(
     current_user = Depends(get_current_user)
 ):
     """验证交易是否在区块链中且未被篡改"""
-    result = blockchain_instance.verify_transaction(transaction_id)
+    result = _ledger().verify_transaction(transaction_id)
+    if not result["transaction_found"]:
+        raise HTTPException(status_code=404, detail="Transaction not found in blockchain")
+    return result
+
+@router.get("/transaction/{transaction_id}/proof")
+@has_role(["customer", "bank_staff", "system_admin"])
+async def get_transaction_proof(
+    transaction_id: int,
+    current_user = Depends(get_current_user)
+):
+    """
+    获取交易的默克尔包含证明
+    客户端验证方式：对交易JSON（sort_keys）计算叶子哈希，按 proof 自底向上合并得到默克尔根，
+    再对 block_header（sort_keys）计算 sha256，应与 block_hash 一致
+    """
+    result = _ledger().get_transaction_proof(transaction_id)
     if not result["transaction_found"]:
         raise HTTPException(status_code=404, detail="Transaction not found in blockchain")
-    return result
\ No newline at end of file
+    return result
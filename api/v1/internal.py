@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Request
+from config.database import get_pool_status
+from security.password_hasher import password_hasher
+from security.session_store import session_store
+from security.token_cache import token_cache
+from utils.cache import account_cache
+
+router = APIRouter()
+
+# 内部诊断接口只允许本机访问，且不依赖数据库连接（连接池耗尽时仍可用）
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def ensure_local_request(request: Request):
+    """检查请求是否来自本机"""
+    if not request.client or request.client.host not in LOCAL_HOSTS:
+        raise HTTPException(status_code=403, detail="Internal endpoint")
+
+
+@router.get("/db-pool")
+async def db_pool_status(request: Request):
+    """获取数据库连接池状态：已借出、溢出与等待时间"""
+    ensure_local_request(request)
+    return get_pool_status()
+
+
+@router.get("/cache")
+async def cache_status(request: Request):
+    """获取进程内缓存的命中率、淘汰与失效统计"""
+    ensure_local_request(request)
+    return {"accounts": account_cache.stats(), "tokens": token_cache.stats()}
+
+
+@router.get("/password-hashing")
+async def password_hashing_status(request: Request):
+    """获取bcrypt线程池的排队深度与等待时间"""
+    ensure_local_request(request)
+    return password_hasher.stats()
+
+
+@router.get("/sessions")
+async def session_store_status(request: Request):
+    """获取会话存储的索引大小与待写回数量"""
+    ensure_local_request(request)
+    return session_store.stats()
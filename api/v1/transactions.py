@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from services.transaction_service import TransactionService
-from api.dependencies import get_transaction_service
-from security.permission import has_role, owns_account, get_current_user
+from sqlalchemy.orm import Session
+from api.dependencies import get_transaction_service, get_db
+from security.permission import has_role, owns_account, get_current_user, get_user_account_ids
 
 router = APIRouter()
 
@@ -18,14 +19,40 @@ class TransactionCreate(BaseModel):
 
 class TransactionResponse(BaseModel):
     transaction_id: int
-    from_account_id: int
-    to_account_id: int
+    # 存款没有转出账户，取款没有转入账户
+    from_account_id: Optional[int] = None
+    to_account_id: Optional[int] = None
     amount: Decimal
     type: str
     status: str
     created_at: datetime
     description: Optional[str] = None
 
+class TransactionHistoryResponse(BaseModel):
+    transactions: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+class DecryptDescriptionsRequest(BaseModel):
+    transaction_ids: List[int]
+
+class DecryptDescriptionsResponse(BaseModel):
+    descriptions: Dict[int, Optional[str]]
+
+class BulkTransferItem(BaseModel):
+    to_account_id: int
+    amount: Decimal
+    description: Optional[str] = None
+
+class BulkTransactionCreate(BaseModel):
+    from_account_id: int
+    transfers: List[BulkTransferItem]
+
+class BulkTransactionResponse(BaseModel):
+    from_account_id: int
+    count: int
+    total_amount: Decimal
+    transactions: List[TransactionResponse]
+
 # API端点
 @router.post("/create", response_model=TransactionResponse)
 @owns_account
@@ -47,11 +74,29 @@ async def create_transaction(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=BulkTransactionResponse)
+@owns_account
+async def create_transactions_bulk(
+    request: BulkTransactionCreate,
+    transaction_service: TransactionService = Depends(get_transaction_service),
+    current_user = Depends(get_current_user)
+):
+    """批量转账（同一转出账户），整批在一个数据库事务中完成并封装为一个区块"""
+    try:
+        return await transaction_service.create_transactions_bulk(
+            from_account_id=request.from_account_id,
+            transfers=[transfer.model_dump() for transfer in request.transfers]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 @has_role(["customer", "bank_staff", "system_admin"])
 async def get_transaction(
         transaction_id: int,
         transaction_service: TransactionService = Depends(get_transaction_service),
+        db: Session = Depends(get_db),
         current_user=Depends(get_current_user)
 ):
     """获取交易详情"""
@@ -63,32 +108,57 @@ async def get_transaction(
         # 普通用户只能查看与自己账户相关的交易
         user_roles = [role.role_name for role in current_user.roles]
         if "customer" in user_roles:
-            # 获取用户的账户列表
-            from services.account_service import AccountService
-            from api.dependencies import get_account_service
-            account_service = get_account_service()
-            user_accounts = await account_service.get_user_accounts(current_user.user_id)
-            user_account_ids = [acc["account_id"] for acc in user_accounts]
-
-            # 检查交易是否属于用户
+            # 用户的账户ID集合（缓存），检查交易是否属于用户
+            user_account_ids = get_user_account_ids(current_user.user_id, db)
             if (transaction["from_account_id"] not in user_account_ids and
                     transaction["to_account_id"] not in user_account_ids):
                 raise HTTPException(status_code=403, detail="Not authorized to view this transaction")
 
         return transaction
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/account/{account_id}", response_model=List[TransactionResponse])
+@router.get("/account/{account_id}", response_model=TransactionHistoryResponse)
 @owns_account
 async def get_account_transactions(
     account_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    type: Optional[str] = None,
+    description_mode: str = "decrypted",
     transaction_service: TransactionService = Depends(get_transaction_service),
     current_user = Depends(get_current_user)
 ):
-    """获取账户的交易历史"""
+    """获取账户的交易历史（按时间倒序分页，使用返回的 next_cursor 获取下一页）"""
     try:
-        transactions = await transaction_service.get_transaction_history(account_id)
+        transactions = await transaction_service.get_transaction_history(
+            account_id,
+            limit=limit,
+            cursor=cursor,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=type,
+            description_mode=description_mode
+        )
         return transactions
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/account/{account_id}/descriptions", response_model=DecryptDescriptionsResponse)
+@owns_account
+async def decrypt_transaction_descriptions(
+    account_id: int,
+    request: DecryptDescriptionsRequest,
+    transaction_service: TransactionService = Depends(get_transaction_service),
+    current_user = Depends(get_current_user)
+):
+    """按需解密交易描述（配合 description_mode=encrypted/omitted 的交易历史使用）"""
+    try:
+        descriptions = await transaction_service.decrypt_descriptions(account_id, request.transaction_ids)
+        return {"descriptions": descriptions}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
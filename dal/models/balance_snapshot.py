@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, DECIMAL, ForeignKey
+from .base import BaseModel
+
+
+class BalanceSnapshot(BaseModel):
+    """账户日终余额快照，只为有交易发生的日期生成"""
+    __tablename__ = 'account_balance_snapshots'
+
+    account_id = Column(Integer, ForeignKey('accounts.account_id'), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    # 当日结束时的余额（仅包含 transaction_id <= 检查点 的已完成交易）
+    balance = Column(DECIMAL(20, 2), nullable=False)
+
+    def __repr__(self):
+        return f"<BalanceSnapshot {self.account_id}@{self.snapshot_date}>"
+
+
+class BalanceSnapshotCheckpoint(BaseModel):
+    """快照任务已处理到的交易ID"""
+    __tablename__ = 'balance_snapshot_checkpoints'
+
+    name = Column(String(50), primary_key=True)
+    last_transaction_id = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BalanceSnapshotCheckpoint {self.name}={self.last_transaction_id}>"
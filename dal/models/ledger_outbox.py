@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from .base import BaseModel
+
+
+class LedgerOutbox(BaseModel):
+    """已提交但尚未确认上链的交易，与交易在同一数据库事务中写入，区块封装后删除"""
+    __tablename__ = 'ledger_outbox'
+
+    transaction_id = Column(Integer, ForeignKey('transactions.transaction_id'), primary_key=True)
+
+    def __repr__(self):
+        return f"<LedgerOutbox {self.transaction_id}>"
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, BigInteger
+from .base import BaseModel
+
+
+class NumberSequence(BaseModel):
+    """编号序列，各工作进程按块租用区间"""
+    __tablename__ = 'number_sequences'
+
+    name = Column(String(50), primary_key=True)
+    # 下一个尚未分配的值
+    next_value = Column(BigInteger, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<NumberSequence {self.name}={self.next_value}>"
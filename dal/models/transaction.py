@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Enum, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, DECIMAL, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 
 class Transaction(BaseModel):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # 支持按账户+时间的键集分页（InnoDB二级索引隐含主键 transaction_id）
+        Index('ix_transactions_from_account_created', 'from_account_id', 'created_at'),
+        Index('ix_transactions_to_account_created', 'to_account_id', 'created_at'),
+    )
 
     transaction_id = Column(Integer, primary_key=True, autoincrement=True)
     from_account_id = Column(Integer, ForeignKey('accounts.account_id'))
@@ -1,6 +1,11 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import case, insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 from .base_repository import BaseRepository
 from ..models.account import Account
+from utils.cache_bus import invalidation_bus
 
 
 class AccountRepository(BaseRepository[Account]):
@@ -13,10 +18,88 @@ class AccountRepository(BaseRepository[Account]):
     def get_user_accounts(self, user_id: int) -> list[Account]:
         return self.db.query(Account).filter(Account.user_id == user_id).all()
 
+    def get_user_account_ids(self, user_id: int) -> List[int]:
+        """只查询用户的账户ID（所有权校验使用）"""
+        return [row.account_id for row in
+                self.db.query(Account.account_id).filter(Account.user_id == user_id).all()]
+
+    def exists(self, account_id: int) -> bool:
+        return self.db.query(Account.account_id).filter(Account.account_id == account_id).first() is not None
+
+    def create(self, obj_in: dict) -> Account:
+        account = super().create(obj_in)
+        # 用户的账户集合发生变化
+        invalidation_bus.publish("user_accounts", [account.user_id])
+        return account
+
+    def update(self, id_value: int, obj_in: dict) -> Optional[Account]:
+        self._publish_owner_change(id_value)
+        if "user_id" in obj_in:
+            self.publish_after_commit([obj_in["user_id"]], entity="user_accounts")
+        return super().update(id_value, obj_in)
+
+    def delete(self, id_value: int) -> bool:
+        self._publish_owner_change(id_value)
+        return super().delete(id_value)
+
+    def _publish_owner_change(self, account_id: int) -> None:
+        """账户状态（如销户）或所有者变更后失效所有者的账户集合"""
+        account = self.get_by_id(account_id)
+        if account is not None:
+            self.publish_after_commit([account.user_id], entity="user_accounts")
+
+    def bulk_insert(self, rows: list[dict]) -> list[Account]:
+        """
+        executemany 方式批量插入账户，按账户号码读回新账户（含主键），不提交事务
+        """
+        if not rows:
+            return []
+        self.db.execute(insert(Account), rows)
+        self.publish_after_commit({row["user_id"] for row in rows}, entity="user_accounts")
+        account_numbers = [row["account_number"] for row in rows]
+        return self.db.query(Account).filter(
+            Account.account_number.in_(account_numbers)
+        ).order_by(Account.account_id).all()
+
     def update_balance(self, account_id: int, amount: float) -> Account:
         account = self.get_by_id(account_id)
         if account:
-            account.balance += amount
-            self.db.commit()
+            try:
+                self.apply_balance_deltas({account_id: amount})
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                raise e
             self.db.refresh(account)
-        return account
\ No newline at end of file
+        return account
+
+    def lock_accounts(self, account_ids: Iterable[int]) -> Dict[int, Account]:
+        """
+        按账户ID升序加行锁读取账户（SELECT ... FOR UPDATE），固定加锁顺序避免死锁，不提交事务
+        会话中已加载的账户（如之前的归属与状态检查）用加锁读到的行刷新，余额校验不使用加锁前的旧值
+        """
+        accounts = (self.db.query(Account)
+                    .filter(Account.account_id.in_(sorted(set(account_ids))))
+                    .order_by(Account.account_id)
+                    .with_for_update()
+                    .execution_options(populate_existing=True)
+                    .all())
+        return {account.account_id: account for account in accounts}
+
+    def apply_balance_deltas(self, deltas: Dict[int, Decimal]) -> None:
+        """
+        用一条 UPDATE ... SET balance = balance + CASE ... 原子增减多个账户余额，不提交事务
+        """
+        if not deltas:
+            return
+        self.db.query(Account).filter(Account.account_id.in_(list(deltas))).update(
+            {Account.balance: Account.balance + case(deltas, value=Account.account_id)},
+            synchronize_session=False
+        )
+        # 余额变动后失效各工作进程的账户缓存（更新余额、存款、转账均经过此处）
+        self.publish_after_commit(deltas)
+        # 使会话中已加载账户的余额过期，下次访问时从数据库重新读取
+        for account_id in deltas:
+            account = self.db.identity_map.get(identity_key(Account, account_id))
+            if account is not None:
+                self.db.expire(account, ["balance"])
\ No newline at end of file
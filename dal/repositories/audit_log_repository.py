@@ -6,8 +6,8 @@ from utils.logger import bank_logger
 
 
 class AuditLogRepository(BaseRepository[AuditLog]):
-    def __init__(self, db: Session):
-        super().__init__(AuditLog, db)
+    def __init__(self, db: Session, read_db: Session = None):
+        super().__init__(AuditLog, db, read_db)
 
     def log_action(self, user_id: int, action: str, entity_type: str,
                    entity_id: int, details: str = None, ip_address: str = None) -> AuditLog:
@@ -33,7 +33,7 @@ class AuditLogRepository(BaseRepository[AuditLog]):
                       end_date: datetime = None) -> list[AuditLog]:
         """获取用户的审计日志"""
         try:
-            query = self.db.query(AuditLog).filter(AuditLog.user_id == user_id)
+            query = self.read_session.query(AuditLog).filter(AuditLog.user_id == user_id)
 
             if start_date:
                 query = query.filter(AuditLog.created_at >= start_date)
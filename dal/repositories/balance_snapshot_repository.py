@@ -0,0 +1,91 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .base_repository import BaseRepository
+from ..models.balance_snapshot import BalanceSnapshot, BalanceSnapshotCheckpoint
+
+CHECKPOINT_NAME = "daily_balance"
+
+
+class BalanceSnapshotRepository(BaseRepository[BalanceSnapshot]):
+    def __init__(self, db: Session, read_db: Session = None):
+        super().__init__(BalanceSnapshot, db, read_db)
+
+    def get_checkpoint(self) -> int:
+        """获取快照已覆盖的最大交易ID"""
+        checkpoint = self.db.query(BalanceSnapshotCheckpoint).filter(
+            BalanceSnapshotCheckpoint.name == CHECKPOINT_NAME
+        ).first()
+        return checkpoint.last_transaction_id if checkpoint else 0
+
+    def lock_checkpoint(self) -> BalanceSnapshotCheckpoint:
+        """加行锁读取检查点，保证同一时间只有一个快照任务在推进，不存在时创建，不提交事务"""
+        checkpoint = self.db.query(BalanceSnapshotCheckpoint).filter(
+            BalanceSnapshotCheckpoint.name == CHECKPOINT_NAME
+        ).with_for_update().first()
+        if checkpoint is None:
+            checkpoint = BalanceSnapshotCheckpoint(name=CHECKPOINT_NAME, last_transaction_id=0)
+            self.db.add(checkpoint)
+            self.db.flush()
+        return checkpoint
+
+    def get_latest_before(self, account_id: int, snapshot_date: date) -> Optional[BalanceSnapshot]:
+        """获取指定日期之前最近的一条快照"""
+        return self.db.query(BalanceSnapshot).filter(
+            BalanceSnapshot.account_id == account_id,
+            BalanceSnapshot.snapshot_date < snapshot_date
+        ).order_by(BalanceSnapshot.snapshot_date.desc()).first()
+
+    def apply_daily_deltas(self, deltas: Dict[Tuple[int, date], Decimal]) -> None:
+        """
+        将 {(账户ID, 日期): 余额变动} 累加到快照，不提交事务
+        当日快照不存在时以之前最近的快照为基础创建；晚于该日期的快照同步累加（交易晚到时）
+        """
+        if not deltas:
+            return
+
+        account_ids = {account_id for account_id, _ in deltas}
+        dates = {snapshot_date for _, snapshot_date in deltas}
+        existing = {
+            (snapshot.account_id, snapshot.snapshot_date): snapshot
+            for snapshot in self.db.query(BalanceSnapshot).filter(
+                BalanceSnapshot.account_id.in_(account_ids),
+                BalanceSnapshot.snapshot_date.in_(dates)
+            )
+        }
+        latest = dict(self.db.query(BalanceSnapshot.account_id, func.max(BalanceSnapshot.snapshot_date)).filter(
+            BalanceSnapshot.account_id.in_(account_ids)
+        ).group_by(BalanceSnapshot.account_id).all())
+
+        by_account = defaultdict(list)
+        for (account_id, snapshot_date), delta in deltas.items():
+            by_account[account_id].append((snapshot_date, delta))
+
+        for account_id, changes in by_account.items():
+            for snapshot_date, delta in sorted(changes):
+                if latest.get(account_id) and latest[account_id] > snapshot_date:
+                    self.db.query(BalanceSnapshot).filter(
+                        BalanceSnapshot.account_id == account_id,
+                        BalanceSnapshot.snapshot_date > snapshot_date
+                    ).update({BalanceSnapshot.balance: BalanceSnapshot.balance + delta},
+                             synchronize_session="fetch")
+
+                snapshot = existing.get((account_id, snapshot_date))
+                if snapshot is not None:
+                    snapshot.balance += delta
+                    continue
+
+                previous = self.get_latest_before(account_id, snapshot_date)
+                snapshot = BalanceSnapshot(
+                    account_id=account_id,
+                    snapshot_date=snapshot_date,
+                    balance=(previous.balance if previous else Decimal("0")) + delta
+                )
+                self.db.add(snapshot)
+                self.db.flush()
+                existing[(account_id, snapshot_date)] = snapshot
+                if not latest.get(account_id) or latest[account_id] < snapshot_date:
+                    latest[account_id] = snapshot_date
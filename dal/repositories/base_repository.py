@@ -1,14 +1,54 @@
-from typing import Generic, TypeVar, Type, List, Optional
+from typing import Generic, Iterable, TypeVar, Type, List, Optional
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from sqlalchemy.inspection import inspect
+from config.database import SessionLocal
 from dal.models.base import BaseModel
+from utils.cache_bus import invalidation_bus
 
 T = TypeVar('T', bound=BaseModel)
 
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_pending_invalidations(session):
+    """
+    事务提交后发布失效事件：本进程再次失效（丢弃提交前被并发读取重新写入的旧值），
+    并通知同一主机上的其他工作进程
+    """
+    for entity, ids in session.info.pop("pending_invalidations", []):
+        invalidation_bus.publish(entity, ids)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop("pending_invalidations", None)
+
+
 class BaseRepository(Generic[T]):
-    def __init__(self, model: Type[T], db: Session):
+    def __init__(self, model: Type[T], db: Session, read_db: Optional[Session] = None):
         self.model = model
         self.db = db
+        self.read_db = read_db
+
+    @property
+    def read_session(self) -> Session:
+        """
+        纯读查询使用的会话
+        配置了只读副本且本次请求尚未在主库写入时走副本，否则走主库
+        """
+        if self.read_db is None or self.db.info.get("has_written"):
+            return self.db
+        return self.read_db
+
+    def publish_after_commit(self, ids: Iterable, entity: str = None) -> None:
+        """
+        发布实体失效事件（实体类型默认为表名）
+        本进程缓存立即失效，当前事务提交后再广播给所有工作进程
+        """
+        entity = entity or self.model.__tablename__
+        ids = list(ids)
+        invalidation_bus.publish_local(entity, ids)
+        self.db.info.setdefault("pending_invalidations", []).append((entity, ids))
 
     def get_primary_key(self) -> str:
         """动态获取模型的主键字段名称"""
@@ -21,8 +61,11 @@ class BaseRepository(Generic[T]):
         pk = self.get_primary_key()
         return self.db.query(self.model).filter(getattr(self.model, pk) == id_value).first()
 
-    def get_all(self) -> List[T]:
-        return self.db.query(self.model).all()
+    def get_all(self, skip: int = 0, limit: Optional[int] = None) -> List[T]:
+        query = self.read_session.query(self.model).offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
 
     def create(self, obj_in: dict) -> T:
         obj = self.model(**obj_in)
@@ -33,11 +76,20 @@ class BaseRepository(Generic[T]):
             self.db.rollback()
             raise e
         self.db.refresh(obj)
+        invalidation_bus.publish(self.model.__tablename__, [getattr(obj, self.get_primary_key())])
+        return obj
+
+    def add(self, obj_in: dict) -> T:
+        """加入当前事务并flush获取主键，不提交（由调用方统一提交）"""
+        obj = self.model(**obj_in)
+        self.db.add(obj)
+        self.db.flush()
         return obj
 
     def update(self, id_value: int, obj_in: dict) -> Optional[T]:
         obj = self.get_by_id(id_value)
         if obj:
+            self.publish_after_commit([id_value])
             for key, value in obj_in.items():
                 setattr(obj, key, value)
             try:
@@ -51,6 +103,7 @@ class BaseRepository(Generic[T]):
     def delete(self, id_value: int) -> bool:
         obj = self.get_by_id(id_value)
         if obj:
+            self.publish_after_commit([id_value])
             self.db.delete(obj)
             try:
                 self.db.commit()
@@ -8,13 +8,14 @@ class EncryptionKeyRepository(BaseRepository[EncryptionKey]):
     def __init__(self, db: Session):
         super().__init__(EncryptionKey, db)
 
-    def get_current_key(self) -> EncryptionKey:
+    def get_current_key(self, key_type: str = 'symmetric') -> EncryptionKey:
         """获取当前活跃的密钥"""
         try:
             key = self.db.query(EncryptionKey).filter(
+                EncryptionKey.key_type == key_type,
                 EncryptionKey.status == 'active',
                 EncryptionKey.expiry_date > datetime.utcnow()
-            ).first()
+            ).order_by(EncryptionKey.key_id.desc()).first()
 
             if key:
                 bank_logger.info(f"Retrieved active key: {key.key_id}")
@@ -30,5 +31,6 @@ class EncryptionKeyRepository(BaseRepository[EncryptionKey]):
         """停用密钥"""
         key = self.get_by_id(key_id)
         if key:
+            self.publish_after_commit([key_id])
             key.status = 'inactive'
             self.db.commit()
\ No newline at end of file
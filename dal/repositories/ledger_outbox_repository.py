@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from .base_repository import BaseRepository
+from ..models.ledger_outbox import LedgerOutbox
+from ..models.transaction import Transaction
+
+
+class LedgerOutboxRepository(BaseRepository[LedgerOutbox]):
+    def __init__(self, db: Session):
+        super().__init__(LedgerOutbox, db)
+
+    def add_many(self, transaction_ids: Iterable[int]) -> None:
+        """记录待上链的交易，不提交事务（与交易写入同一事务）"""
+        now = datetime.utcnow()
+        rows = [{"transaction_id": transaction_id, "created_at": now, "updated_at": now}
+                for transaction_id in transaction_ids]
+        if rows:
+            self.db.execute(insert(LedgerOutbox), rows)
+
+    def get_pending(self, created_before: datetime, after_id: int, limit: int) -> list[Transaction]:
+        """按交易ID顺序获取在 created_before 之前记录、仍未确认上链的交易"""
+        return self.db.query(Transaction).join(
+            LedgerOutbox, LedgerOutbox.transaction_id == Transaction.transaction_id
+        ).filter(
+            LedgerOutbox.created_at <= created_before,
+            LedgerOutbox.transaction_id > after_id
+        ).order_by(LedgerOutbox.transaction_id).limit(limit).all()
+
+    def remove(self, transaction_ids: Iterable[int]) -> None:
+        """删除已上链交易的记录，不提交事务"""
+        transaction_ids = list(transaction_ids)
+        if transaction_ids:
+            self.db.query(LedgerOutbox).filter(
+                LedgerOutbox.transaction_id.in_(transaction_ids)
+            ).delete(synchronize_session=False)
@@ -4,12 +4,12 @@ from .base_repository import BaseRepository
 from ..models.message import SecureMessage
 
 class MessageRepository(BaseRepository[SecureMessage]):
-    def __init__(self, db: Session):
-        super().__init__(SecureMessage, db)
+    def __init__(self, db: Session, read_db: Session = None):
+        super().__init__(SecureMessage, db, read_db)
 
     def get_messages_for_user(self, user_id: int, is_sender: bool = False):
         """获取用户的消息"""
-        query = self.db.query(SecureMessage)
+        query = self.read_session.query(SecureMessage)
         if is_sender:
             return query.filter(SecureMessage.sender_id == user_id).all()
         else:
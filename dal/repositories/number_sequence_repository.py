@@ -0,0 +1,41 @@
+from typing import Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .base_repository import BaseRepository
+from ..models.number_sequence import NumberSequence
+
+
+class NumberSequenceRepository(BaseRepository[NumberSequence]):
+    def __init__(self, db: Session):
+        super().__init__(NumberSequence, db)
+
+    def allocate_block(self, name: str, size: int) -> Tuple[int, int]:
+        """
+        加行锁从序列中租用一段连续区间并提交
+        应使用独立会话调用，避免提交调用方的业务事务
+        :return: [start, end) 区间
+        """
+        try:
+            sequence = self._lock(name)
+            if sequence is None:
+                try:
+                    sequence = NumberSequence(name=name, next_value=1)
+                    self.db.add(sequence)
+                    self.db.flush()
+                except IntegrityError:
+                    # 其他进程同时创建了该序列
+                    self.db.rollback()
+                    sequence = self._lock(name)
+
+            start = sequence.next_value
+            sequence.next_value = start + size
+            self.db.commit()
+            return start, start + size
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _lock(self, name: str) -> NumberSequence:
+        return self.db.query(NumberSequence).filter(
+            NumberSequence.name == name
+        ).with_for_update().first()
@@ -1,6 +1,9 @@
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from .base_repository import BaseRepository
+from ..models.account import Account
 from ..models.role import Role
+from ..models.user_role import UserRole
 from utils.logger import bank_logger
 
 
@@ -27,6 +30,38 @@ class RoleRepository(BaseRepository[Role]):
             bank_logger.error(f"Error getting user roles: {str(e)}")
             raise
 
+    def get_user_role_names(self, user_id: int) -> List[str]:
+        """获取用户的角色名称（单次连接查询）"""
+        try:
+            rows = (self.db.query(Role.role_name)
+                    .join(UserRole, UserRole.role_id == Role.role_id)
+                    .filter(UserRole.user_id == user_id)
+                    .all())
+            return [row.role_name for row in rows]
+        except Exception as e:
+            bank_logger.error(f"Error getting user role names: {str(e)}")
+            raise
+
+    def get_role_names_and_account_owner(self, user_id: int,
+                                         account_id: int) -> Optional[Tuple[List[str], int]]:
+        """
+        一次查询同时获取用户角色与账户所有者
+        :return: (角色名称列表, 账户所有者ID)，账户不存在时返回None
+        """
+        try:
+            rows = (self.db.query(Account.user_id, Role.role_name)
+                    .select_from(Account)
+                    .outerjoin(UserRole, UserRole.user_id == user_id)
+                    .outerjoin(Role, Role.role_id == UserRole.role_id)
+                    .filter(Account.account_id == account_id)
+                    .all())
+            if not rows:
+                return None
+            return [row.role_name for row in rows if row.role_name], rows[0].user_id
+        except Exception as e:
+            bank_logger.error(f"Error getting user roles and account owner: {str(e)}")
+            raise
+
     def create_default_roles(self):
         """创建默认角色"""
         try:
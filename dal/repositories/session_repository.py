@@ -1,7 +1,9 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 from .base_repository import BaseRepository
 from ..models.session import Session as UserSession
+from security.security_utils import SecurityUtils
 from utils.logger import bank_logger
 
 class SessionRepository(BaseRepository[UserSession]):
@@ -27,6 +29,17 @@ class SessionRepository(BaseRepository[UserSession]):
             self.db.rollback()
             raise
 
+    def bulk_insert(self, rows: list[dict]) -> None:
+        """executemany 方式批量插入会话，不提交事务"""
+        if rows:
+            self.db.execute(insert(UserSession), rows)
+
+    def deactivate_tokens(self, tokens: list[str]) -> None:
+        """批量使会话失效，不提交事务"""
+        if tokens:
+            self.db.query(UserSession).filter(UserSession.token.in_(tokens)).update(
+                {UserSession.is_active: False}, synchronize_session=False)
+
     def get_active_session(self, token: str) -> UserSession:
         """获取有效的会话"""
         try:
@@ -53,6 +66,36 @@ class SessionRepository(BaseRepository[UserSession]):
             self.db.rollback()
             raise
 
+    def invalidate_session_by_token(self, token: str) -> bool:
+        """按令牌使会话失效（登出）"""
+        try:
+            result = self.db.query(UserSession).filter(
+                UserSession.token == token,
+                UserSession.is_active == True
+            ).update({UserSession.is_active: False}, synchronize_session=False)
+            self.publish_after_commit([SecurityUtils.token_digest(token)], entity="session_tokens")
+            self.db.commit()
+            return result > 0
+        except Exception as e:
+            bank_logger.error(f"Error invalidating session by token: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def invalidate_all_user_sessions(self, user_id: int) -> int:
+        """使用户的全部会话失效"""
+        try:
+            result = self.db.query(UserSession).filter(
+                UserSession.user_id == user_id,
+                UserSession.is_active == True
+            ).update({UserSession.is_active: False}, synchronize_session=False)
+            self.publish_after_commit([user_id], entity="user_sessions")
+            self.db.commit()
+            return result
+        except Exception as e:
+            bank_logger.error(f"Error invalidating user sessions: {str(e)}")
+            self.db.rollback()
+            raise
+
     def clean_expired_sessions(self) -> int:
         """清理过期会话"""
         try:
@@ -1,19 +1,138 @@
+import heapq
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Tuple
+from sqlalchemy import and_, func, insert, or_
 from sqlalchemy.orm import Session
 from .base_repository import BaseRepository
 from ..models.transaction import Transaction
 
 
 class TransactionRepository(BaseRepository[Transaction]):
-    def __init__(self, db: Session):
-        super().__init__(Transaction, db)
+    def __init__(self, db: Session, read_db: Session = None):
+        super().__init__(Transaction, db, read_db)
 
     def get_account_transactions(self, account_id: int) -> list[Transaction]:
-        return self.db.query(Transaction).filter(
+        return self.read_session.query(Transaction).filter(
             (Transaction.from_account_id == account_id) |
             (Transaction.to_account_id == account_id)
+        ).order_by(Transaction.created_at.desc(), Transaction.transaction_id.desc()).all()
+
+    def get_account_transactions_page(self, account_id: int, limit: int,
+                                      cursor: Optional[Tuple[datetime, int]] = None,
+                                      start_date: datetime = None, end_date: datetime = None,
+                                      transaction_type: str = None) -> list[Transaction]:
+        """
+        按 (created_at, transaction_id) 倒序键集分页获取账户交易
+        转出与转入分别走 (from_account_id, created_at) / (to_account_id, created_at) 索引查询，
+        再归并取前 limit 条
+        :param cursor: 上一页最后一条的 (created_at, transaction_id)
+        """
+        pages = []
+        for column in (Transaction.from_account_id, Transaction.to_account_id):
+            query = self.read_session.query(Transaction).filter(column == account_id)
+            if cursor:
+                created_at, transaction_id = cursor
+                query = query.filter(or_(
+                    Transaction.created_at < created_at,
+                    and_(Transaction.created_at == created_at, Transaction.transaction_id < transaction_id)
+                ))
+            if start_date:
+                query = query.filter(Transaction.created_at >= start_date)
+            if end_date:
+                query = query.filter(Transaction.created_at <= end_date)
+            if transaction_type:
+                query = query.filter(Transaction.transaction_type == transaction_type)
+            pages.append(query.order_by(
+                Transaction.created_at.desc(), Transaction.transaction_id.desc()
+            ).limit(limit).all())
+
+        merged = heapq.merge(*pages, key=lambda tx: (tx.created_at, tx.transaction_id), reverse=True)
+        result = []
+        for tx in merged:
+            # 账户向自身转账时两侧查询会返回同一行
+            if result and result[-1].transaction_id == tx.transaction_id:
+                continue
+            result.append(tx)
+            if len(result) == limit:
+                break
+        return result
+
+    def stream_account_transactions(self, account_id: int, start_date: datetime = None,
+                                    end_date: datetime = None, batch_size: int = 1000):
+        """
+        按时间正序流式读取账户交易（服务端游标，每次从数据库取 batch_size 行）
+        只查询列而不构造ORM对象，结果不会进入会话的身份映射
+        """
+        query = self.read_session.query(
+            Transaction.transaction_id,
+            Transaction.from_account_id,
+            Transaction.to_account_id,
+            Transaction.amount,
+            Transaction.transaction_type,
+            Transaction.status,
+            Transaction.created_at,
+            Transaction.description
+        ).filter(
+            or_(Transaction.from_account_id == account_id, Transaction.to_account_id == account_id)
+        )
+        if start_date:
+            query = query.filter(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.filter(Transaction.created_at <= end_date)
+
+        return query.order_by(
+            Transaction.created_at, Transaction.transaction_id
+        ).execution_options(stream_results=True).yield_per(batch_size)
+
+    def get_account_descriptions(self, account_id: int, transaction_ids: list[int]) -> list[Tuple[int, str]]:
+        """获取指定交易的加密描述，仅返回与该账户相关的交易"""
+        return self.read_session.query(Transaction.transaction_id, Transaction.description).filter(
+            Transaction.transaction_id.in_(transaction_ids),
+            or_(Transaction.from_account_id == account_id, Transaction.to_account_id == account_id)
+        ).all()
+
+    def get_after_id(self, after_id: int, limit: int) -> list[Transaction]:
+        """按ID顺序获取 after_id 之后的交易（余额快照任务增量读取）"""
+        return self.db.query(Transaction).filter(
+            Transaction.transaction_id > after_id
+        ).order_by(Transaction.transaction_id).limit(limit).all()
+
+    def get_balance_replay(self, account_id: int, since: datetime, until: datetime,
+                           after_id: int) -> list[Tuple[int, int, Decimal]]:
+        """
+        获取重放账户余额所需的已完成交易 (from_account_id, to_account_id, amount)
+        包括 [since, until] 内的交易，以及快照检查点 after_id 之后尚未计入快照、且不晚于 until 的交易
+        """
+        return self.db.query(
+            Transaction.from_account_id, Transaction.to_account_id, Transaction.amount
+        ).filter(
+            or_(Transaction.from_account_id == account_id, Transaction.to_account_id == account_id),
+            Transaction.status == 'completed',
+            Transaction.created_at <= until,
+            or_(Transaction.created_at >= since, Transaction.transaction_id > after_id)
         ).all()
 
     def get_pending_transactions(self) -> list[Transaction]:
         return self.db.query(Transaction).filter(
             Transaction.status == 'pending'
-        ).all()
\ No newline at end of file
+        ).all()
+
+    def get_last_outgoing_id(self, account_id: int) -> int:
+        """获取账户最近一笔转出交易的ID，没有时返回0"""
+        last_id = self.db.query(func.max(Transaction.transaction_id)).filter(
+            Transaction.from_account_id == account_id
+        ).scalar()
+        return last_id or 0
+
+    def bulk_insert(self, rows: list[dict]) -> None:
+        """executemany 方式批量插入交易，不提交事务"""
+        if rows:
+            self.db.execute(insert(Transaction), rows)
+
+    def get_outgoing_after(self, account_id: int, after_id: int) -> list[Transaction]:
+        """按ID顺序获取账户在 after_id 之后的转出交易"""
+        return self.db.query(Transaction).filter(
+            Transaction.from_account_id == account_id,
+            Transaction.transaction_id > after_id
+        ).order_by(Transaction.transaction_id).all()
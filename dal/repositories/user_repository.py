@@ -3,8 +3,8 @@ from dal.repositories.base_repository import BaseRepository
 from dal.models.user import User
 
 class UserRepository(BaseRepository[User]):
-    def __init__(self, db: Session):
-        super().__init__(User, db)
+    def __init__(self, db: Session, read_db: Session = None):
+        super().__init__(User, db, read_db)
 
     def get_by_username(self, username: str) -> User:
         return self.db.query(User).filter(User.username == username).first()
@@ -12,6 +12,8 @@ class UserRoleRepository(BaseRepository[UserRole]):
         try:
             user_role = UserRole(user_id=user_id, role_id=role_id)
             self.db.add(user_role)
+            # 角色变更使该用户的缓存身份失效
+            self.publish_after_commit([user_id], entity="users")
             self.db.commit()
             return user_role
         except Exception as e:
@@ -26,6 +28,7 @@ class UserRoleRepository(BaseRepository[UserRole]):
                 UserRole.user_id == user_id,
                 UserRole.role_id == role_id
             ).delete()
+            self.publish_after_commit([user_id], entity="users")
             self.db.commit()
             return result > 0
         except Exception as e:
@@ -4,7 +4,10 @@ from dal.models.base import Base
 from config.database import engine, Base
 from dal.models.user import User
 from dal.models.account import Account
+from dal.models.number_sequence import NumberSequence
 from dal.models.transaction import Transaction
+from dal.models.ledger_outbox import LedgerOutbox
+from dal.models.balance_snapshot import BalanceSnapshot, BalanceSnapshotCheckpoint
 from dal.models.encryption_keys import EncryptionKey
 from dal.models.role import Role
 from dal.models.user_role import UserRole
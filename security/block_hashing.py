@@ -0,0 +1,70 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+
+def hash_block_header(header: Dict) -> str:
+    """计算区块头哈希：sha256(JSON(sort_keys))"""
+    block_string = json.dumps(header, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+class MerkleTree:
+    """
+    交易默克尔树
+    叶子为 sha256(0x00 || 交易JSON)，内部节点为 sha256(0x01 || 左 || 右)，
+    某层节点数为奇数时最后一个节点直接提升到上一层
+    """
+
+    LEAF_PREFIX = b"\x00"
+    NODE_PREFIX = b"\x01"
+
+    def __init__(self, transactions: List[Dict]):
+        leaves = [self.hash_leaf(tx) for tx in transactions]
+        self.levels: List[List[bytes]] = [leaves or [hashlib.sha256(b"").digest()]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parent = [self.hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parent.append(level[-1])
+            self.levels.append(parent)
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0].hex()
+
+    @classmethod
+    def hash_leaf(cls, transaction: Any) -> bytes:
+        return hashlib.sha256(cls.LEAF_PREFIX + json.dumps(transaction, sort_keys=True).encode()).digest()
+
+    @classmethod
+    def hash_node(cls, left: bytes, right: bytes) -> bytes:
+        return hashlib.sha256(cls.NODE_PREFIX + left + right).digest()
+
+    def get_proof(self, position: int) -> List[Dict]:
+        """
+        生成第 position 笔交易的包含证明
+        :return: 自底向上的兄弟节点列表，side 表示兄弟节点在左侧还是右侧
+        """
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = position ^ 1
+            if sibling < len(level):
+                proof.append({
+                    "side": "left" if sibling < position else "right",
+                    "hash": level[sibling].hex()
+                })
+            position //= 2
+        return proof
+
+    @classmethod
+    def verify_proof(cls, transaction: Any, proof: List[Dict], merkle_root: str) -> bool:
+        """验证交易的包含证明，计算量为 O(log n)"""
+        current = cls.hash_leaf(transaction)
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+            if step["side"] == "left":
+                current = cls.hash_node(sibling, current)
+            else:
+                current = cls.hash_node(current, sibling)
+        return current.hex() == merkle_root
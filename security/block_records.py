@@ -0,0 +1,22 @@
+import json
+import struct
+from typing import Dict, List
+
+# 分段文件中每条区块记录为 "4字节长度前缀 + JSON"
+# 本模块只依赖标准库：校验进程池的工作进程通过它读取分段文件，不导入日志、配置等有副作用的模块
+LENGTH_PREFIX = struct.Struct(">I")
+
+
+def read_records(path: str, start: int, end: int) -> List[Dict]:
+    """读取分段文件 [start, end) 字节范围内的连续区块记录"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    records = []
+    position = 0
+    while position < len(data):
+        (length,) = LENGTH_PREFIX.unpack_from(data, position)
+        position += LENGTH_PREFIX.size
+        records.append(json.loads(data[position:position + length]))
+        position += length
+    return records
@@ -0,0 +1,197 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, List, Optional
+from security.block_records import LENGTH_PREFIX, read_records
+from utils.exceptions import LedgerLockedError
+from utils.logger import bank_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class BlockStore:
+    """
+    区块链的追加写磁盘存储
+    - 区块记录以 "4字节长度前缀 + JSON" 的形式追加写入分段文件 segment_XXXXXX.log
+    - blocks.idx 为定长索引，每个区块一条 (分段号, 偏移, 长度)，可按区块索引随机访问
+    - 读取通过 mmap 完成，重新打开时只需加载索引文件，与账本大小无关
+    同一目录只允许一个进程打开：打开时对目录下的 LOCK 文件加独占锁，已被其他进程持有时立即失败
+    """
+
+    INDEX_RECORD = struct.Struct(">IQI")
+    LENGTH_PREFIX = LENGTH_PREFIX
+    INDEX_FILE = "blocks.idx"
+    LOCK_FILE = "LOCK"
+    SEGMENT_FILE = "segment_{:06d}.log"
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, fsync: bool = True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._maps: Dict[int, mmap.mmap] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_directory_lock()
+
+        self._index = bytearray()
+        self._load_index()
+
+        self._index_file = open(self._index_path(), "ab")
+        self._segment_file = open(self.segment_path(self._active_segment), "ab")
+
+    def _acquire_directory_lock(self):
+        lock_file = open(os.path.join(self.directory, self.LOCK_FILE), "a")
+        if fcntl is None:
+            bank_logger.warning("fcntl is not available, block store directory is not locked")
+            return lock_file
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise LedgerLockedError(f"Block store {self.directory} is already opened by another process")
+        return lock_file
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, self.SEGMENT_FILE.format(segment))
+
+    def _entry(self, block_index: int):
+        return self.INDEX_RECORD.unpack_from(self._index, block_index * self.INDEX_RECORD.size)
+
+    def locate(self, block_index: int):
+        """
+        获取区块记录在分段文件中的位置
+        :return: (分段号, 记录起始偏移, 记录结束偏移)
+        """
+        with self._lock:
+            if block_index < 0 or block_index >= len(self):
+                raise IndexError("block index out of range")
+            segment, offset, length = self._entry(block_index)
+        return segment, offset, offset + self.LENGTH_PREFIX.size + length
+
+    @staticmethod
+    def read_range(path: str, start: int, end: int) -> List[Dict]:
+        """
+        直接从分段文件读取 [start, end) 字节范围内的连续区块记录，不依赖打开的存储实例
+        （供校验进程池的工作进程各自读取）
+        """
+        return read_records(path, start, end)
+
+    def _load_index(self) -> None:
+        """加载索引并修复上次崩溃时可能留下的不完整写入"""
+        path = self._index_path()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self._index = bytearray(f.read())
+
+        record_size = self.INDEX_RECORD.size
+        count = len(self._index) // record_size
+
+        # 丢弃指向不完整区块数据的索引记录
+        while count:
+            segment, offset, length = self._entry(count - 1)
+            segment_path = self.segment_path(segment)
+            end = offset + self.LENGTH_PREFIX.size + length
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) >= end:
+                break
+            count -= 1
+
+        if len(self._index) != count * record_size:
+            bank_logger.warning(f"Block index truncated to {count} entries during recovery")
+            del self._index[count * record_size:]
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(len(self._index))
+
+        if count:
+            segment, offset, length = self._entry(count - 1)
+            self._active_segment = segment
+            self._write_offset = offset + self.LENGTH_PREFIX.size + length
+        else:
+            self._active_segment = 0
+            self._write_offset = 0
+
+        # 截断最后一个索引记录之后的残留数据（区块已写入但索引未写入）
+        segment_path = self.segment_path(self._active_segment)
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > self._write_offset:
+            bank_logger.warning(f"Discarding unindexed data in {segment_path}")
+            with open(segment_path, "r+b") as f:
+                f.truncate(self._write_offset)
+
+    def __len__(self) -> int:
+        return len(self._index) // self.INDEX_RECORD.size
+
+    def append(self, record: Dict) -> int:
+        """
+        追加一个区块记录
+        :return: 区块在存储中的序号
+        """
+        data = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+        with self._lock:
+            size = self.LENGTH_PREFIX.size + len(data)
+            if self._write_offset and self._write_offset + size > self.segment_size:
+                self._roll_segment()
+
+            offset = self._write_offset
+            self._segment_file.write(self.LENGTH_PREFIX.pack(len(data)) + data)
+            self._sync(self._segment_file)
+
+            # 数据落盘后才写索引，保证索引不会指向不存在的数据
+            entry = self.INDEX_RECORD.pack(self._active_segment, offset, len(data))
+            self._index_file.write(entry)
+            self._sync(self._index_file)
+
+            self._index += entry
+            self._write_offset = offset + size
+            return len(self) - 1
+
+    def read(self, block_index: int) -> Dict:
+        """按区块序号读取区块记录"""
+        with self._lock:
+            if block_index < 0 or block_index >= len(self):
+                raise IndexError("block index out of range")
+            segment, offset, length = self._entry(block_index)
+            start = offset + self.LENGTH_PREFIX.size
+            mapped = self._get_map(segment, start + length)
+            data = mapped[start:start + length]
+        return json.loads(data)
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._segment_file.close()
+            self._index_file.close()
+            # 关闭文件即释放目录锁
+            self._lock_file.close()
+
+    def _roll_segment(self) -> None:
+        """当前分段写满，切换到新的分段文件"""
+        self._segment_file.close()
+        self._active_segment += 1
+        self._write_offset = 0
+        # 新分段必然为空，覆盖上次崩溃可能遗留的未索引文件
+        self._segment_file = open(self.segment_path(self._active_segment), "wb")
+
+    def _sync(self, file) -> None:
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def _get_map(self, segment: int, end: int) -> mmap.mmap:
+        """获取分段文件的内存映射，活跃分段增长后重新映射"""
+        mapped: Optional[mmap.mmap] = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            with open(self.segment_path(segment), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
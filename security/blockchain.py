@@ -1,11 +1,65 @@
 import hashlib
 import json
+import queue
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Iterator, Optional, Tuple
+from config.setting import BLOCKCHAIN
+from security.block_hashing import MerkleTree, hash_block_header
+from security.block_store import BlockStore
+from security.chain_validator import ChainValidator
+from security.ledger_index import LedgerIndex
 from utils.logger import bank_logger
+from utils.exceptions import LedgerLockedError, TransactionError
 from datetime import datetime
 
 
+class MiningEngine:
+    """
+    增量式随机数搜索
+    区块头只序列化一次：随机数之前的前缀预先哈希，每次尝试复制哈希状态，
+    只追加随机数和预编码好的后缀字节，结果与 Block.calculate_hash 一致
+    """
+
+    def __init__(self, block: "Block"):
+        prefix, self.suffix = self.serialize_header(block)
+        self._prefix_state = hashlib.sha256(prefix)
+
+    @staticmethod
+    def serialize_header(block: "Block") -> Tuple[bytes, bytes]:
+        """
+        按 calculate_hash 的 JSON 格式（sort_keys）拆分为随机数前后两段
+        区块头只包含默克尔根，后缀长度与区块中的交易数无关
+        :return: (前缀, 后缀)
+        """
+        prefix = ('{"index": ' + json.dumps(block.index) +
+                  ', "merkle_root": ' + json.dumps(block.merkle_root) + ', "nonce": ')
+        suffix = (', "previous_hash": ' + json.dumps(block.previous_hash) +
+                  ', "timestamp": ' + json.dumps(block.timestamp) + '}')
+        return prefix.encode(), suffix.encode()
+
+    def hash_with_nonce(self, nonce: int) -> str:
+        """计算指定随机数下的区块哈希"""
+        sha = self._prefix_state.copy()
+        sha.update(str(nonce).encode())
+        sha.update(self.suffix)
+        return sha.hexdigest()
+
+    def search(self, difficulty: int, start_nonce: int = 0) -> Tuple[int, str]:
+        """
+        从 start_nonce 开始寻找满足难度的随机数
+        :return: (随机数, 哈希)
+        """
+        target = "0" * difficulty
+        nonce = start_nonce
+        block_hash = self.hash_with_nonce(nonce)
+        while not block_hash.startswith(target):
+            nonce += 1
+            block_hash = self.hash_with_nonce(nonce)
+        return nonce, block_hash
+
+
 class Block:
     """区块链中的单个区块"""
 
@@ -16,25 +70,59 @@ class Block:
         self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = nonce
+        self._merkle_tree = MerkleTree(transactions)
+        self.merkle_root = self._merkle_tree.root
         self.hash = self.calculate_hash()
 
-    def calculate_hash(self) -> str:
-        """计算区块的哈希值"""
-        block_string = json.dumps({
+    def header(self) -> Dict:
+        """区块头：哈希只覆盖区块头，交易通过默克尔根间接覆盖"""
+        return {
             "index": self.index,
             "timestamp": self.timestamp,
-            "transactions": self.transactions,
+            "merkle_root": self.merkle_root,
             "previous_hash": self.previous_hash,
             "nonce": self.nonce
-        }, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        }
+
+    def calculate_hash(self) -> str:
+        """计算区块的哈希值"""
+        return hash_block_header(self.header())
+
+    def calculate_merkle_root(self) -> str:
+        """根据当前交易重新计算默克尔根"""
+        return MerkleTree(self.transactions).root
+
+    def get_transaction_proof(self, position: int) -> List[Dict]:
+        """获取区块内第 position 笔交易的包含证明"""
+        return self._merkle_tree.get_proof(position)
 
     def mine_block(self, difficulty: int) -> None:
         """'挖掘'区块 - 找到满足特定难度的哈希"""
         target = "0" * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if self.hash[:difficulty] == target:
+            return
+        self.nonce, self.hash = MiningEngine(self).search(difficulty, start_nonce=self.nonce + 1)
+
+    def to_record(self) -> Dict:
+        """转换为持久化记录"""
+        return {
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "transactions": self.transactions,
+            "previous_hash": self.previous_hash,
+            "merkle_root": self.merkle_root,
+            "nonce": self.nonce,
+            "hash": self.hash
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "Block":
+        """从持久化记录恢复区块，保留存储的哈希与默克尔根以便校验"""
+        block = cls(record["index"], record["timestamp"], record["transactions"],
+                    record["previous_hash"], record["nonce"])
+        block.merkle_root = record["merkle_root"]
+        block.hash = record["hash"]
+        return block
 
     def to_dict(self) -> Dict:
         """将区块转换为字典"""
@@ -43,31 +131,102 @@ class Block:
             "timestamp": self.timestamp,
             "transactions": self.transactions,
             "previous_hash": self.previous_hash,
+            "merkle_root": self.merkle_root,
             "nonce": self.nonce,
             "hash": self.hash,
             "time": datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M:%S')
         }
 
 
+class PersistentChain:
+    """由 BlockStore 支撑的区块序列，按需从磁盘解码区块并缓存最近访问的区块"""
+
+    def __init__(self, store: BlockStore, cache_size: int = 1024):
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, Block]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+
+        length = len(self)
+        if item < 0:
+            item += length
+        if item < 0 or item >= length:
+            raise IndexError("chain index out of range")
+
+        with self._lock:
+            block = self._cache.get(item)
+            if block is not None:
+                self._cache.move_to_end(item)
+                return block
+
+        block = Block.from_record(self.store.read(item))
+        self._remember(block)
+        return block
+
+    def append(self, block: Block) -> None:
+        self.store.append(block.to_record())
+        self._remember(block)
+
+    def _remember(self, block: Block) -> None:
+        with self._lock:
+            self._cache[block.index] = block
+            self._cache.move_to_end(block.index)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
 class Blockchain:
     """简单的区块链实现"""
 
-    def __init__(self, difficulty: int = 2):
-        self.chain: List[Block] = []
+    def __init__(self, difficulty: int = 2, store: Optional[BlockStore] = None,
+                 validation_workers: Optional[int] = None, validation_chunk_size: int = 500):
+        self.chain = PersistentChain(store) if store is not None else []
         self.pending_transactions: List[Dict] = []
         self.difficulty = difficulty
         self.mining_reward = 0
+        # 串行化区块追加，防止并发封装产生分叉
+        self._seal_lock = threading.RLock()
+        # 二级索引：交易ID / 账户ID -> 区块内位置，持久化链的索引与区块存储在同一目录
+        self.index = LedgerIndex(store.directory, fsync=store.fsync) if store is not None else LedgerIndex()
+        self.index.load(self.chain)
+        self.validator = ChainValidator(
+            self,
+            checkpoint_dir=store.directory if store is not None else None,
+            max_workers=validation_workers,
+            chunk_size=validation_chunk_size
+        )
 
-        # 创建创世区块
-        self.create_genesis_block()
+        if len(self.chain):
+            bank_logger.info(f"区块链已从存储加载，共 {len(self.chain)} 个区块")
+        else:
+            # 创建创世区块
+            self.create_genesis_block()
 
     def create_genesis_block(self) -> None:
         """创建链的第一个区块"""
         genesis_block = Block(0, time.time(), [{"transaction": "Genesis Block"}], "0")
         genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+        self._append_block(genesis_block)
         bank_logger.info("创世区块已创建")
 
+    def close(self) -> None:
+        """关闭底层存储"""
+        self.validator.shutdown()
+        self.index.close()
+        if isinstance(self.chain, PersistentChain):
+            self.chain.store.close()
+
     def get_latest_block(self) -> Block:
         """获取最新区块"""
         return self.chain[-1]
@@ -79,20 +238,35 @@ class Blockchain:
 
     def mine_pending_transactions(self) -> Block:
         """挖掘所有待处理交易"""
-        if not self.pending_transactions:
+        with self._seal_lock:
+            if not self.pending_transactions:
+                return None
+
+            block = self.seal_block(self.pending_transactions.copy())
+            self.pending_transactions = []
+            return block
+
+    def seal_block(self, transactions: List[Dict]) -> Optional[Block]:
+        """将一批交易封装为一个新区块并追加到链上"""
+        if not transactions:
             return None
 
-        block = Block(
-            len(self.chain),
-            time.time(),
-            self.pending_transactions.copy(),
-            self.get_latest_block().hash
-        )
+        with self._seal_lock:
+            block = Block(
+                len(self.chain),
+                time.time(),
+                transactions,
+                self.get_latest_block().hash
+            )
+
+            block.mine_block(self.difficulty)
+            self._append_block(block)
+            return block
 
-        block.mine_block(self.difficulty)
+    def _append_block(self, block: Block) -> None:
+        """追加区块并更新二级索引"""
         self.chain.append(block)
-        self.pending_transactions = []
-        return block
+        self.index.add_block(block)
 
     def is_chain_valid(self) -> bool:
         """验证区块链的完整性"""
@@ -100,6 +274,10 @@ class Blockchain:
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
 
+            # 验证交易与默克尔根一致
+            if current_block.merkle_root != current_block.calculate_merkle_root():
+                return False
+
             # 验证当前区块的哈希
             if current_block.hash != current_block.calculate_hash():
                 return False
@@ -110,45 +288,405 @@ class Blockchain:
 
         return True
 
+    def validate_chain(self, full: bool = False) -> Dict:
+        """
+        校验区块链：并行校验区块哈希，默认只校验上次检查点之后新增的区块
+        :param full: 是否从创世区块开始完整校验
+        """
+        return self.validator.validate(full)
+
+    def get_block_record(self, index: int) -> Dict:
+        """获取区块的原始记录，持久化链直接读取存储，避免构建区块对象"""
+        if isinstance(self.chain, PersistentChain):
+            return self.chain.store.read(index)
+        return self.chain[index].to_record()
+
     def get_transaction_history(self, account_id: int = None) -> List[Dict]:
         """获取交易历史，可选按账户ID过滤"""
+        if account_id is None:
+            locations = [(block.index, position)
+                         for block in self.chain
+                         for position, tx in enumerate(block.transactions)
+                         if isinstance(tx, dict)]
+        else:
+            # 通过账户索引直接定位，只访问与该账户相关的交易
+            locations = self.index.account_locations(account_id)
+
         all_transactions = []
-        for block in self.chain:
-            for tx in block.transactions:
-                if isinstance(tx, dict) and (account_id is None or
-                                             (tx.get('from_account_id') == account_id or
-                                              tx.get('to_account_id') == account_id)):
-                    tx_copy = tx.copy()
-                    tx_copy["block_index"] = block.index
-                    tx_copy["block_hash"] = block.hash
-                    tx_copy["timestamp"] = block.timestamp
-                    all_transactions.append(tx_copy)
+        for block_index, position in locations:
+            block = self.chain[block_index]
+            tx_copy = block.transactions[position].copy()
+            tx_copy["block_index"] = block.index
+            tx_copy["block_hash"] = block.hash
+            tx_copy["timestamp"] = block.timestamp
+            all_transactions.append(tx_copy)
 
         return all_transactions
 
-    def get_blocks(self) -> List[Dict]:
-        """获取所有区块"""
-        return [block.to_dict() for block in self.chain]
+    def iter_blocks(self, start: int = 0, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        按区块索引顺序逐个生成区块字典，不物化整条链
+        :param start: 起始区块索引
+        :param limit: 最多返回的区块数，None表示直到链尾
+        """
+        length = len(self.chain)
+        end = length if limit is None else min(length, start + limit)
+        for index in range(max(start, 0), end):
+            block = self.get_block_record(index)
+            block["time"] = datetime.fromtimestamp(block["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            yield block
+
+    def get_blocks(self, start: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """获取区块列表，可按区块索引分页"""
+        return list(self.iter_blocks(start, limit))
+
+    def _find_transaction(self, transaction_id: int) -> Optional[Tuple[Block, int]]:
+        """通过交易索引查找交易所在的区块及其在区块内的位置"""
+        location = self.index.find_transaction(transaction_id)
+        if location is None:
+            return None
+        block_index, position = location
+        return self.chain[block_index], position
 
     def verify_transaction(self, transaction_id: int) -> Dict:
         """验证交易是否在区块链中且未被篡改"""
-        for block in self.chain:
-            for tx in block.transactions:
-                if isinstance(tx, dict) and tx.get('transaction_id') == transaction_id:
-                    # 验证区块的完整性
-                    recalculated_hash = block.calculate_hash()
-                    is_valid = recalculated_hash == block.hash
-
-                    return {
-                        "transaction_found": True,
-                        "block_index": block.index,
-                        "block_hash": block.hash,
-                        "timestamp": block.timestamp,
-                        "is_valid": is_valid
-                    }
-
-        return {"transaction_found": False}
-
-
-# 单例模式：全局区块链实例
-blockchain_instance = Blockchain(difficulty=2)
\ No newline at end of file
+        location = self._find_transaction(transaction_id)
+        if not location:
+            return {"transaction_found": False}
+
+        block, position = location
+        # 通过默克尔证明验证交易，再验证区块头哈希，无需重新哈希整个区块
+        proof = block.get_transaction_proof(position)
+        is_valid = (MerkleTree.verify_proof(block.transactions[position], proof, block.merkle_root)
+                    and block.calculate_hash() == block.hash)
+
+        return {
+            "transaction_found": True,
+            "block_index": block.index,
+            "block_hash": block.hash,
+            "timestamp": block.timestamp,
+            "is_valid": is_valid
+        }
+
+    def get_transaction_proof(self, transaction_id: int) -> Dict:
+        """获取交易的默克尔包含证明，客户端可据此独立验证"""
+        location = self._find_transaction(transaction_id)
+        if not location:
+            return {"transaction_found": False}
+
+        block, position = location
+        return {
+            "transaction_found": True,
+            "transaction": block.transactions[position],
+            "position": position,
+            "proof": block.get_transaction_proof(position),
+            "block_header": block.header(),
+            "block_hash": block.hash
+        }
+
+
+class BlockSealer:
+    """后台区块封装器：收集待上链交易，达到数量或时间阈值时批量封装为一个区块"""
+
+    # 轮询停止信号的间隔（秒）
+    _POLL_INTERVAL = 0.05
+    # 封装失败后的重试间隔（秒），连续失败时指数增长
+    _RETRY_BACKOFF = 0.5
+    _MAX_RETRY_BACKOFF = 30.0
+
+    def __init__(self, blockchain: Blockchain, batch_size: int = 100,
+                 batch_interval_ms: int = 200, max_pending: int = 10000,
+                 submit_timeout: float = 5.0, on_sealed: Optional[Callable[[Block], None]] = None):
+        self.blockchain = blockchain
+        # 区块封装后的回调（在封装线程中执行，如删除对账记录）
+        self.on_sealed = on_sealed
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        # 队列项为 (交易列表, 是否单独成块)
+        self._queue: "queue.Queue[Tuple[List[Dict], bool]]" = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        # 待封装容量：提交方在打开数据库事务之前预留，封装线程取出交易后归还
+        self._capacity = threading.Semaphore(max_pending)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """启动后台封装线程（重复调用无副作用）"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="block-sealer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """停止后台线程，并封装队列中剩余的交易"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            # 未封装的交易仍在对账表中，下次启动时由对账任务重新提交
+            bank_logger.error(f"Failed to seal remaining transactions on shutdown: {str(e)}")
+
+    def reserve(self, count: int = 1) -> None:
+        """
+        为即将提交的交易预留队列容量（背压）
+        须在打开数据库事务之前调用：队列已满时阻塞，超过 submit_timeout 仍无空位则抛出异常，
+        此时交易尚未写入数据库，调用方可以安全重试
+        """
+        if count > self.max_pending:
+            raise TransactionError(f"At most {self.max_pending} ledger entries can be queued")
+        self.start()
+        deadline = time.monotonic() + self.submit_timeout
+        acquired = 0
+        while acquired < count:
+            if not self._capacity.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                self.release(acquired)
+                bank_logger.error("Block sealer queue is full")
+                raise TransactionError("Ledger is busy, please retry later")
+            acquired += 1
+
+    def release(self, count: int = 1) -> None:
+        """归还未使用的预留容量（如数据库事务回滚）"""
+        if count:
+            self._capacity.release(count)
+
+    def submit(self, transaction: Dict) -> None:
+        """提交交易等待上链，调用方须先通过 reserve 预留容量，因此不会阻塞或失败"""
+        self._put([transaction], standalone=False)
+
+    def submit_batch(self, transactions: List[Dict]) -> None:
+        """提交一批交易单独封装为一个区块（如批量转账），调用方须先预留 len(transactions) 的容量"""
+        if transactions:
+            self._put(list(transactions), standalone=True)
+
+    def _put(self, transactions: List[Dict], standalone: bool) -> None:
+        with self._pending_lock:
+            self._pending += len(transactions)
+        self._queue.put((transactions, standalone))
+
+    def _take(self, item) -> None:
+        """从队列取出一项后归还容量"""
+        transactions, _ = item
+        with self._pending_lock:
+            self._pending -= len(transactions)
+        self._capacity.release(len(transactions))
+
+    def pending_count(self) -> int:
+        """获取等待封装的交易数"""
+        with self._pending_lock:
+            return self._pending
+
+    def flush(self) -> List[Block]:
+        """立即封装队列中的全部交易"""
+        blocks = []
+        while True:
+            batches = self._drain()
+            if not batches:
+                return blocks
+            for batch in batches:
+                block = self._seal(batch)
+                if block is not None:
+                    blocks.append(block)
+
+    def _drain(self) -> List[List[Dict]]:
+        """非阻塞地取出队列中的全部交易，按批量上限切分为区块，整批提交的交易单独成块"""
+        batches = []
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._take(item)
+            transactions, standalone = item
+            if standalone:
+                if batch:
+                    batches.append(batch)
+                    batch = []
+                batches.append(transactions)
+                continue
+            batch.extend(transactions)
+            if len(batch) >= self.batch_size:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _collect_batches(self) -> List[List[Dict]]:
+        """
+        等待首笔交易，然后在时间窗口内继续收集直到达到批量上限
+        遇到整批提交的交易时停止收集：已收集的交易与该批交易各自成块
+        :return: 按顺序待封装的区块交易列表
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size and not self._stop_event.is_set():
+            if deadline is None:
+                timeout = self._POLL_INTERVAL
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(remaining, self._POLL_INTERVAL)
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is None:
+                    break
+                continue
+            self._take(item)
+
+            transactions, standalone = item
+            if standalone:
+                return [b for b in (batch, transactions) if b]
+            batch.extend(transactions)
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_interval
+        return [batch] if batch else []
+
+    def _seal(self, batch: List[Dict]) -> Optional[Block]:
+        with self.blockchain._seal_lock:
+            # 合并之前封装失败或通过 add_transaction 加入的待处理交易
+            if self.blockchain.pending_transactions:
+                batch = self.blockchain.pending_transactions + batch
+                self.blockchain.pending_transactions = []
+            # 对账任务可能重新提交已上链的交易，跳过链上已有的交易，保证每笔交易只上链一次
+            batch = self._unsealed(batch)
+            if not batch:
+                return None
+            try:
+                block = self.blockchain.seal_block(batch)
+            except Exception:
+                # 封装失败时将交易放回待处理列表，下一批一并封装，避免丢失
+                self.blockchain.pending_transactions.extend(batch)
+                raise
+
+        bank_logger.info(f"Sealed block {block.index} with {len(batch)} transactions")
+        if self.on_sealed is not None:
+            try:
+                self.on_sealed(block)
+            except Exception as e:
+                bank_logger.error(f"Block {block.index} sealed callback failed: {str(e)}")
+        return block
+
+    def _unsealed(self, batch: List[Dict]) -> List[Dict]:
+        seen = set()
+        result = []
+        for transaction in batch:
+            transaction_id = transaction.get("transaction_id")
+            if transaction_id is not None:
+                if transaction_id in seen or self.blockchain.index.find_transaction(transaction_id):
+                    continue
+                seen.add(transaction_id)
+            result.append(transaction)
+        return result
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop_event.is_set():
+            batches = self._collect_batches()
+            if not batches and failures and self.blockchain.pending_transactions:
+                # 没有新交易时也要重试之前封装失败的交易
+                batches = [[]]
+            for batch in batches:
+                try:
+                    self._seal(batch)
+                    failures = 0
+                except Exception as e:
+                    # 交易已放回待处理列表，退避后随下一批重试
+                    failures += 1
+                    delay = min(self._RETRY_BACKOFF * 2 ** (failures - 1), self._MAX_RETRY_BACKOFF)
+                    bank_logger.error(f"Failed to seal block ({failures} consecutive failures), "
+                                      f"retrying in {delay:.1f}s: {str(e)}")
+                    self._stop_event.wait(delay)
+
+
+# 全局区块链实例与封装器：首次使用时才打开存储（持有存储目录的独占锁），导入模块不会打开账本
+# 多工作进程部署时只有取得存储锁的进程是账本写入进程，其他进程不封装区块
+_instance_lock = threading.Lock()
+_blockchain: Optional[Blockchain] = None
+_block_sealer: Optional[BlockSealer] = None
+# 存储已被其他进程持有时记录错误，之后直接抛出，不再反复尝试打开
+_ledger_locked: Optional[LedgerLockedError] = None
+
+
+def get_blockchain() -> Blockchain:
+    """
+    获取全局区块链实例
+    存储目录已被其他进程（账本写入进程）持有时抛出 LedgerLockedError
+    """
+    global _blockchain, _ledger_locked
+    with _instance_lock:
+        if _ledger_locked is not None:
+            raise _ledger_locked
+        if _blockchain is None:
+            try:
+                _blockchain = _open_blockchain()
+            except LedgerLockedError as e:
+                _ledger_locked = e
+                bank_logger.warning(f"{str(e)}: block sealing disabled in this process, "
+                                    f"transfers are sealed by the ledger writer from the outbox")
+                raise
+        return _blockchain
+
+
+def _open_blockchain() -> Blockchain:
+    return Blockchain(
+        difficulty=BLOCKCHAIN["difficulty"],
+        validation_workers=BLOCKCHAIN["validation_workers"],
+        validation_chunk_size=BLOCKCHAIN["validation_chunk_size"],
+        store=BlockStore(
+            BLOCKCHAIN["storage_dir"],
+            segment_size=BLOCKCHAIN["segment_size_mb"] * 1024 * 1024,
+            fsync=BLOCKCHAIN["fsync"]
+        ) if BLOCKCHAIN["persistent"] else None
+    )
+
+
+def get_block_sealer() -> BlockSealer:
+    """获取全局区块封装器"""
+    global _block_sealer
+    blockchain = get_blockchain()
+    with _instance_lock:
+        if _block_sealer is None:
+            _block_sealer = BlockSealer(
+                blockchain,
+                batch_size=BLOCKCHAIN["batch_size"],
+                batch_interval_ms=BLOCKCHAIN["batch_interval_ms"],
+                max_pending=BLOCKCHAIN["max_pending"],
+                submit_timeout=BLOCKCHAIN["submit_timeout"]
+            )
+        return _block_sealer
+
+
+def get_ledger_writer() -> Optional[BlockSealer]:
+    """
+    获取本进程的区块封装器，本进程不是账本写入进程（存储由其他进程持有）时返回 None
+    此时已提交的交易留在 ledger_outbox 中，由写入进程的对账任务封装上链
+    """
+    try:
+        return get_block_sealer()
+    except LedgerLockedError:
+        return None
+
+
+def close_blockchain(timeout: float = None) -> None:
+    """封装剩余交易并关闭账本存储（未打开时无操作）"""
+    global _blockchain, _block_sealer, _ledger_locked
+    with _instance_lock:
+        blockchain, sealer = _blockchain, _block_sealer
+        _blockchain, _block_sealer, _ledger_locked = None, None, None
+    if sealer is not None:
+        sealer.stop(timeout)
+    if blockchain is not None:
+        blockchain.close()
@@ -0,0 +1,37 @@
+from typing import Dict, List, Optional, Tuple
+from security.block_hashing import MerkleTree, hash_block_header
+from security.block_records import read_records
+
+# 链校验进程池的工作函数
+# 工作进程以 spawn 方式启动并重新导入本模块，因此这里只依赖标准库与纯计算模块，
+# 不导入日志、配置、数据库等导入时有副作用的模块
+
+HEADER_FIELDS = ("index", "timestamp", "merkle_root", "previous_hash", "nonce")
+
+
+def find_invalid_block(records: List[Dict]) -> Optional[int]:
+    """
+    校验一段连续区块的默克尔根与区块头哈希
+    :return: 第一个无效区块的索引，全部有效时返回None
+    """
+    for record in records:
+        if MerkleTree(record["transactions"]).root != record["merkle_root"]:
+            return record["index"]
+        header = {field: record[field] for field in HEADER_FIELDS}
+        if hash_block_header(header) != record["hash"]:
+            return record["index"]
+    return None
+
+
+def check_records(records: List[Dict]) -> Tuple[Optional[int], List[Tuple[int, str, str]]]:
+    """内存链的工作函数：校验主进程读取的区块记录"""
+    return find_invalid_block(records), [(record["index"], record["previous_hash"], record["hash"])
+                                         for record in records]
+
+
+def check_segment_range(path: str, start: int, end: int) -> Tuple[Optional[int], List[Tuple[int, str, str]]]:
+    """
+    持久化链的工作函数：自行读取分段文件 [start, end) 内的区块记录并校验，主进程不解码也不传输区块
+    :return: (第一个无效区块的索引, [(区块索引, previous_hash, hash)])
+    """
+    return check_records(read_records(path, start, end))
@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from security.block_store import BlockStore
+from security.chain_check import check_records, check_segment_range
+from utils.logger import bank_logger
+
+
+class ChainValidator:
+    """
+    区块链校验器
+    - 区块哈希按连续区间分发到进程池（spawn 方式启动）并行计算，全部完成后再检查区块链接；
+      持久化链只分发 (分段文件, 偏移范围)，由工作进程各自读取和解码区块
+    - 保存可信检查点（已验证的高度与哈希），增量校验只验证检查点之后新增的区块
+    - full=True 时忽略检查点，从创世区块开始完整校验
+    """
+
+    CHECKPOINT_FILE = "checkpoint.json"
+
+    def __init__(self, blockchain, checkpoint_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None, chunk_size: int = 500):
+        self.blockchain = blockchain
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = os.path.join(checkpoint_dir, self.CHECKPOINT_FILE) if checkpoint_dir else None
+        self.checkpoint: Optional[Dict] = self._load_checkpoint()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def validate(self, full: bool = False) -> Dict:
+        """
+        校验区块链
+        :param full: 是否忽略检查点进行完整校验
+        :return: 校验结果
+        """
+        with self._lock:
+            height = len(self.blockchain.chain) - 1
+            start = 1
+
+            if not full and self.checkpoint and self.checkpoint["height"] <= height:
+                checkpoint_record = self.blockchain.get_block_record(self.checkpoint["height"])
+                if checkpoint_record["hash"] != self.checkpoint["hash"]:
+                    # 检查点之前的区块被改写
+                    return self._result(False, height, 0, full, self.checkpoint["height"])
+                start = self.checkpoint["height"] + 1
+
+            if start > height:
+                return self._result(True, height, 0, full)
+
+            invalid_block, hashes = self._check_hashes(start, height)
+            if invalid_block is None:
+                invalid_block = self._check_links(start, height, hashes)
+
+            if invalid_block is not None:
+                bank_logger.error(f"Blockchain validation failed at block {invalid_block}")
+                return self._result(False, height, height - start + 1, full, invalid_block)
+
+            self._save_checkpoint(height, hashes[height][1])
+            return self._result(True, height, height - start + 1, full)
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _check_hashes(self, start: int, end: int):
+        """
+        并行校验 [start, end] 区间内区块的哈希
+        :return: (第一个无效区块索引, {区块索引: (previous_hash, hash)})
+        """
+        store = getattr(self.blockchain.chain, "store", None)
+        if store is not None:
+            tasks = self._segment_ranges(store, start, end)
+            worker = check_segment_range
+        else:
+            # 内存链没有可供工作进程读取的文件，由主进程读取区块记录
+            tasks = []
+            for chunk_start in range(start, end + 1, self.chunk_size):
+                chunk_end = min(chunk_start + self.chunk_size, end + 1)
+                tasks.append(([self.blockchain.get_block_record(i) for i in range(chunk_start, chunk_end)],))
+            worker = check_records
+
+        if len(tasks) == 1 or self.max_workers <= 1:
+            results = [worker(*task) for task in tasks]
+        else:
+            results = list(self._get_executor().map(worker, *zip(*tasks)))
+
+        # 前一个区块的哈希用于链接检查
+        hashes = {start - 1: (None, self.blockchain.get_block_record(start - 1)["hash"])}
+        invalid = []
+        for invalid_block, block_hashes in results:
+            if invalid_block is not None:
+                invalid.append(invalid_block)
+            for index, previous_hash, block_hash in block_hashes:
+                hashes[index] = (previous_hash, block_hash)
+        return (min(invalid) if invalid else None), hashes
+
+    def _segment_ranges(self, store: BlockStore, start: int, end: int) -> List[Tuple[str, int, int]]:
+        """将 [start, end] 区间按分段文件和 chunk_size 切分为 (分段文件路径, 起始偏移, 结束偏移)"""
+        ranges = []
+        current = None
+        count = 0
+        for i in range(start, end + 1):
+            segment, record_start, record_end = store.locate(i)
+            if current is not None and current[0] == segment and count < self.chunk_size:
+                current[2] = record_end
+                count += 1
+                continue
+            if current is not None:
+                ranges.append((store.segment_path(current[0]), current[1], current[2]))
+            current = [segment, record_start, record_end]
+            count = 1
+        if current is not None:
+            ranges.append((store.segment_path(current[0]), current[1], current[2]))
+        return ranges
+
+    @staticmethod
+    def _check_links(start: int, end: int, hashes: Dict) -> Optional[int]:
+        """哈希校验完成后检查区块链接"""
+        for i in range(start, end + 1):
+            if hashes[i][0] != hashes[i - 1][1]:
+                return i
+        return None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 不使用 fork：应用进程中运行着封装器、对账、总线监听、数据库连接池等线程，
+            # fork 出的子进程会继承其持有的锁与数据库连接；spawn 启动的工作进程只导入 chain_check
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            bank_logger.warning(f"Ignoring unreadable validation checkpoint: {str(e)}")
+            return None
+
+    def _save_checkpoint(self, height: int, block_hash: str) -> None:
+        self.checkpoint = {"height": height, "hash": block_hash}
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _result(is_valid: bool, height: int, checked_blocks: int, full: bool,
+                invalid_block: Optional[int] = None) -> Dict:
+        return {
+            "is_valid": is_valid,
+            "height": height,
+            "checked_blocks": checked_blocks,
+            "full": full,
+            "invalid_block": invalid_block
+        }
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
@@ -5,6 +7,19 @@ from base64 import b64encode, b64decode
 from .key_manager import KeyManager
 from utils.logger import bank_logger
 from utils.exceptions import SecurityError
+from config.setting import ENCRYPTION
+
+# 批量解密共用的线程池（进程级，按需创建）
+_decrypt_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_decrypt_executor() -> ThreadPoolExecutor:
+    global _decrypt_executor
+    if _decrypt_executor is None:
+        _decrypt_executor = ThreadPoolExecutor(max_workers=ENCRYPTION["decrypt_workers"],
+                                               thread_name_prefix="decrypt")
+    return _decrypt_executor
+
 
 class EncryptionService:
     def __init__(self, key_manager: KeyManager):
@@ -37,6 +52,30 @@ class EncryptionService:
             bank_logger.error(f"Decryption failed: {str(e)}")
             raise SecurityError("Failed to decrypt data")
 
+    def decrypt_many(self, encrypted_values: List[str]) -> List[Optional[str]]:
+        """
+        批量解密，按块分发到解密线程池
+        :return: 与输入顺序一致的明文列表，无法解密的条目为None
+        """
+        chunk_size = ENCRYPTION["decrypt_chunk_size"]
+        chunks = [encrypted_values[i:i + chunk_size] for i in range(0, len(encrypted_values), chunk_size)]
+        if len(chunks) <= 1:
+            return self._decrypt_chunk(encrypted_values)
+
+        results = []
+        for decrypted in _get_decrypt_executor().map(self._decrypt_chunk, chunks):
+            results.extend(decrypted)
+        return results
+
+    def _decrypt_chunk(self, encrypted_values: List[str]) -> List[Optional[str]]:
+        results = []
+        for value in encrypted_values:
+            try:
+                results.append(self.decrypt_data(value))
+            except SecurityError:
+                results.append(None)
+        return results
+
     def generate_signature(self, data: str) -> str:
         """生成数字签名"""
         try:
@@ -0,0 +1,79 @@
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from dal.repositories.encryption_keys import EncryptionKeyRepository
+from security.encryption import EncryptionService
+from security.key_manager import KeyManager
+from utils.cache_bus import invalidation_bus
+from utils.logger import bank_logger
+
+
+class KeyContainer:
+    """
+    进程级密钥与加密服务容器
+    启动时从数据库加载一次密钥材料，所有请求共享同一个 KeyManager / EncryptionService，
+    当前对称密钥过期、调用 refresh() 或收到密钥变更事件（invalidate）时重新加载
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._key_manager: Optional[KeyManager] = None
+        self._encryption_service: Optional[EncryptionService] = None
+        self._stale = False
+
+    def load(self) -> None:
+        """从数据库加载密钥并构建加密服务"""
+        with self._lock:
+            self._load()
+
+    def refresh(self) -> None:
+        """密钥轮换后重新加载"""
+        self.load()
+        bank_logger.info("Key material refreshed")
+
+    def invalidate(self, *args) -> None:
+        """标记密钥材料已变更，下次使用时重新加载"""
+        self._stale = True
+
+    def get_key_manager(self) -> KeyManager:
+        self._ensure_loaded()
+        return self._key_manager
+
+    def get_encryption_service(self) -> EncryptionService:
+        self._ensure_loaded()
+        return self._encryption_service
+
+    def _ensure_loaded(self) -> None:
+        key_manager = self._key_manager
+        if key_manager is not None and not self._stale and not self._is_expired(key_manager):
+            return
+        with self._lock:
+            # 双重检查，避免并发请求重复加载
+            if self._key_manager is None or self._stale or self._is_expired(self._key_manager):
+                self._load()
+
+    @staticmethod
+    def _is_expired(key_manager: KeyManager) -> bool:
+        expiry = key_manager.current_key_expiry
+        return expiry is not None and expiry <= datetime.utcnow()
+
+    def _load(self) -> None:
+        # 先清除标记，加载期间到达的变更事件会触发下一次重新加载
+        self._stale = False
+        db = self._session_factory()
+        try:
+            key_manager = KeyManager(EncryptionKeyRepository(db))
+            encryption_service = EncryptionService(key_manager)
+        finally:
+            db.close()
+
+        self._key_manager = key_manager
+        self._encryption_service = encryption_service
+
+
+# 全局密钥容器
+key_container = KeyContainer(SessionLocal)
+invalidation_bus.subscribe("encryption_keys", key_container.invalidate)
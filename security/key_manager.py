@@ -11,6 +11,7 @@ class KeyManager:
     def __init__(self, key_repository: EncryptionKeyRepository):
         self.key_repository = key_repository
         self.current_key = None
+        self.current_key_expiry = None
         self.private_key = None
         self.public_key = None
         self._initialize_keys()
@@ -21,10 +22,15 @@ class KeyManager:
             current_key = self.key_repository.get_current_key()
             if current_key:
                 self.current_key = current_key.key_value
+                self.current_key_expiry = current_key.expiry_date
             else:
                 self.generate_new_key()
         return self.current_key
 
+    def get_private_key(self):
+        """获取RSA私钥"""
+        return self.private_key
+
     def _initialize_keys(self):
         """初始化密钥"""
         try:
@@ -32,11 +38,19 @@ class KeyManager:
             current_key = self.key_repository.get_current_key()
             if current_key:
                 self.current_key = current_key.key_value  # 使用key_value
+                self.current_key_expiry = current_key.expiry_date
             else:
                 self.generate_new_key()
 
-            # 获取或生成非对称密钥对
-            if not self.private_key:
+            # 获取或生成非对称密钥对：优先加载已存储的私钥，避免重复生成
+            key_pair = self.key_repository.get_current_key(key_type='asymmetric')
+            if key_pair:
+                key_value = key_pair.key_value
+                if isinstance(key_value, str):
+                    key_value = key_value.encode()
+                self.private_key = serialization.load_pem_private_key(key_value, password=None)
+                self.public_key = self.private_key.public_key()
+            else:
                 self.generate_key_pair()
         except Exception as e:
             bank_logger.error(f"Key initialization failed: {str(e)}")
@@ -56,6 +70,7 @@ class KeyManager:
             })
 
             self.current_key = new_key
+            self.current_key_expiry = expiry_date
             return new_key
         except Exception as e:
             bank_logger.error(f"Key generation failed: {str(e)}")
@@ -0,0 +1,100 @@
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+from utils.logger import bank_logger
+
+
+class LedgerIndex:
+    """
+    区块链二级索引：交易ID -> (区块索引, 区块内位置)，账户ID -> [(区块索引, 区块内位置)]
+    指定目录时，每个区块的索引条目在区块写入后追加到 ledger.idx（定长记录），
+    重新打开时直接加载索引文件，只需解码索引文件之后新增的区块
+    """
+
+    # (条目类型, 交易ID或账户ID, 区块索引, 区块内位置)
+    ENTRY = struct.Struct(">BQII")
+    INDEX_FILE = "ledger.idx"
+    TRANSACTION = 0
+    ACCOUNT = 1
+
+    def __init__(self, directory: Optional[str] = None, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self._transactions: Dict[int, Tuple[int, int]] = {}
+        self._accounts: Dict[int, List[Tuple[int, int]]] = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def load(self, chain) -> None:
+        """加载索引文件，并补建索引文件中缺失的区块（上次崩溃时未写入或未写完的区块）"""
+        entries = []
+        if self.directory is not None and os.path.exists(self._path()):
+            with open(self._path(), "rb") as f:
+                data = f.read()
+            data = data[:len(data) - len(data) % self.ENTRY.size]
+            entries = list(self.ENTRY.iter_unpack(data))
+
+        # 丢弃指向已不存在区块的条目（区块存储在恢复时被截断）
+        while entries and entries[-1][2] >= len(chain):
+            entries.pop()
+        # 最后一个区块的条目可能不完整，连同其后的区块一起重建
+        resume = entries[-1][2] if entries else 0
+        while entries and entries[-1][2] == resume:
+            entries.pop()
+
+        for kind, id_value, block_index, position in entries:
+            self._remember(kind, id_value, (block_index, position))
+
+        if self.directory is not None:
+            with open(self._path(), "ab") as f:
+                f.truncate(len(entries) * self.ENTRY.size)
+            self._file = open(self._path(), "ab")
+
+        if resume < len(chain):
+            bank_logger.info(f"Rebuilding ledger index from block {resume}")
+        for block_index in range(resume, len(chain)):
+            self.add_block(chain[block_index])
+
+    def add_block(self, block) -> None:
+        """索引新区块的交易，持久化时写入索引文件"""
+        entries = []
+        for position, tx in enumerate(block.transactions):
+            if not isinstance(tx, dict):
+                continue
+            transaction_id = tx.get('transaction_id')
+            if isinstance(transaction_id, int):
+                entries.append((self.TRANSACTION, transaction_id, block.index, position))
+            for account_id in {tx.get('from_account_id'), tx.get('to_account_id')}:
+                if isinstance(account_id, int):
+                    entries.append((self.ACCOUNT, account_id, block.index, position))
+
+        with self._lock:
+            for kind, id_value, block_index, position in entries:
+                self._remember(kind, id_value, (block_index, position))
+            if self._file is not None and entries:
+                self._file.write(b"".join(self.ENTRY.pack(*entry) for entry in entries))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+
+    def find_transaction(self, transaction_id: int) -> Optional[Tuple[int, int]]:
+        return self._transactions.get(transaction_id)
+
+    def account_locations(self, account_id: int) -> List[Tuple[int, int]]:
+        return list(self._accounts.get(account_id, []))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _remember(self, kind: int, id_value: int, location: Tuple[int, int]) -> None:
+        if kind == self.TRANSACTION:
+            self._transactions[id_value] = location
+        else:
+            self._accounts.setdefault(id_value, []).append(location)
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+import bcrypt
+from config.setting import PASSWORD_HASHING
+from utils.exceptions import SecurityError
+from utils.logger import bank_logger
+
+
+class PasswordHasher:
+    """
+    bcrypt 密码哈希线程池
+    bcrypt 计算期间释放GIL，放到独立的有界线程池执行，不阻塞事件循环；
+    排队任务超过 max_pending 时直接拒绝，避免登录高峰时请求无限堆积
+    """
+
+    def __init__(self, max_workers: int, rounds: int = 12, max_pending: int = 1000):
+        self.max_workers = max_workers
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def hash_password(self, password: str) -> str:
+        """同步哈希（在调用线程中执行）"""
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=self.rounds)).decode()
+
+    @staticmethod
+    def verify_password(password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    async def hash_password_async(self, password: str) -> str:
+        return await self._submit(self.hash_password, password)
+
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        return await self._submit(self.verify_password, password, hashed)
+
+    async def _submit(self, func: Callable, *args):
+        with self._lock:
+            if self.max_pending and self._queued >= self.max_pending:
+                self._rejected += 1
+                raise SecurityError("Password service is busy, please retry")
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        try:
+            future = self._executor.submit(self._run, func, time.monotonic(), *args)
+        except Exception:
+            self._dequeue()
+            raise
+        # 等待的请求被取消时，asyncio 会一并取消尚未开始的任务，此时 _run 不会执行，由回调归还排队计数
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future) -> None:
+        if future.cancelled():
+            self._dequeue()
+
+    def _dequeue(self) -> None:
+        with self._lock:
+            self._queued -= 1
+
+    def _run(self, func: Callable, enqueued_at: float, *args):
+        wait = time.monotonic() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "rounds": self.rounds,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queue_depth,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / self._completed * 1000, 3) if self._completed else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3)
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+        bank_logger.info("Password hashing pool stopped")
+
+
+# 全局密码哈希线程池
+password_hasher = PasswordHasher(
+    max_workers=PASSWORD_HASHING["workers"],
+    rounds=PASSWORD_HASHING["bcrypt_rounds"],
+    max_pending=PASSWORD_HASHING["max_pending"]
+)
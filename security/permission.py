@@ -1,10 +1,17 @@
+from contextlib import contextmanager
 from functools import wraps
 from fastapi import Depends, HTTPException, status
 from dal.repositories.user_repository import UserRepository
 from dal.repositories.role_repository import RoleRepository
 from security.security_utils import SecurityUtils
+from security.token_cache import UserPrincipal, token_cache
 from api.dependencies import get_db
+from config.database import SessionLocal
 from sqlalchemy.orm import Session
+from utils.cache import role_cache, user_accounts_cache
+
+
+security_utils = SecurityUtils("your-secret-key")
 
 
 def get_token_from_header(authorization: str = None):
@@ -20,7 +27,10 @@ def get_token_from_header(authorization: str = None):
 
 
 def get_current_user(db: Session = Depends(get_db), authorization: str = None):
-    """获取当前登录用户"""
+    """
+    获取当前登录用户
+    已验证过的令牌直接从令牌缓存返回用户身份，不再解码JWT和查询数据库
+    """
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,7 +46,9 @@ def get_current_user(db: Session = Depends(get_db), authorization: str = None):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    security_utils = SecurityUtils("your-secret-key")
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached[1]
 
     try:
         # 解析令牌
@@ -56,6 +68,7 @@ def get_current_user(db: Session = Depends(get_db), authorization: str = None):
         )
 
     # 获取用户
+    generation = token_cache.generation(user_id)
     user_repository = UserRepository(db)
     user = user_repository.get_by_id(user_id)
     if user is None:
@@ -65,7 +78,33 @@ def get_current_user(db: Session = Depends(get_db), authorization: str = None):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    principal = UserPrincipal.from_user(user)
+    token_cache.put(token, payload, principal, generation)
+    return principal
+
+
+@contextmanager
+def request_session(kwargs):
+    """
+    装饰器使用的数据库会话：优先使用端点注入的会话，否则创建临时会话并在结束时关闭
+    （会话在首次查询时才获取连接，缓存命中时不占用连接）
+    """
+    db = kwargs.get("db")
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_user_role_names(user_id: int, db: Session) -> frozenset:
+    """获取用户角色名称（经过角色缓存）"""
+    return role_cache.get_or_load(
+        user_id, lambda: frozenset(RoleRepository(db).get_user_role_names(user_id)))
 
 
 def has_role(required_roles):
@@ -75,16 +114,14 @@ def has_role(required_roles):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # 获取当前用户和数据库会话
-            db = kwargs.get("db") or next(get_db())
-            user = kwargs.get("current_user")
-            if not user:
-                authorization = kwargs.get("authorization")
-                user = get_current_user(db, authorization)
+            with request_session(kwargs) as db:
+                user = kwargs.get("current_user")
+                if not user:
+                    authorization = kwargs.get("authorization")
+                    user = get_current_user(db, authorization)
 
-            # 获取用户角色
-            role_repository = RoleRepository(db)
-            user_roles = role_repository.get_user_roles(user.user_id)
-            user_role_names = [role.role_name for role in user_roles]
+                # 获取用户角色
+                user_role_names = get_user_role_names(user.user_id, db)
 
             # 检查是否拥有所需角色
             if not any(role in user_role_names for role in required_roles):
@@ -100,25 +137,30 @@ def has_role(required_roles):
     return decorator
 
 
+def get_user_account_ids(user_id: int, db: Session) -> frozenset:
+    """获取用户拥有的账户ID集合（经过账户集合缓存）"""
+    from dal.repositories.account_repository import AccountRepository
+    return user_accounts_cache.get_or_load(
+        user_id, lambda: frozenset(AccountRepository(db).get_user_account_ids(user_id)))
+
+
 def is_account_owner(account_id: int, user_id: int, db: Session):
     """检查用户是否是账户的所有者"""
-    from dal.repositories.account_repository import AccountRepository
-    account_repository = AccountRepository(db)
-    account = account_repository.get_by_id(account_id)
+    if account_id in get_user_account_ids(user_id, db):
+        return True
 
-    if not account:
+    # 校验失败时再区分账户不存在与无权访问
+    from dal.repositories.account_repository import AccountRepository
+    if not AccountRepository(db).exists(account_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Account not found"
         )
 
-    if account.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this account"
-        )
-
-    return True
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not authorized to access this account"
+    )
 
 
 def owns_account(func):
@@ -127,31 +169,44 @@ def owns_account(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
         # 获取当前用户和数据库会话
-        db = kwargs.get("db") or next(get_db())
-        user = kwargs.get("current_user")
-        if not user:
-            authorization = kwargs.get("authorization")
-            user = get_current_user(db, authorization)
-
-        # 获取账户ID
-        account_id = kwargs.get("account_id")
-        if not account_id:
-            # 尝试从请求体中获取
-            request = kwargs.get("request")
-            if request and hasattr(request, "from_account_id"):
-                account_id = request.from_account_id
-
-        # 如果是管理员或银行员工，直接放行
-        role_repository = RoleRepository(db)
-        user_roles = role_repository.get_user_roles(user.user_id)
-        user_role_names = [role.role_name for role in user_roles]
-
-        if "system_admin" in user_role_names or "bank_staff" in user_role_names:
-            return await func(*args, **kwargs)
+        with request_session(kwargs) as db:
+            user = kwargs.get("current_user")
+            if not user:
+                authorization = kwargs.get("authorization")
+                user = get_current_user(db, authorization)
 
-        # 检查普通用户是否是账户所有者
-        is_account_owner(account_id, user.user_id, db)
+            # 获取账户ID
+            account_id = kwargs.get("account_id")
+            if not account_id:
+                # 尝试从请求体中获取
+                request = kwargs.get("request")
+                if request and hasattr(request, "from_account_id"):
+                    account_id = request.from_account_id
+
+            # 角色未缓存时，一次查询同时取得角色与账户所有者
+            owner = {}
+
+            def load_roles():
+                result = RoleRepository(db).get_role_names_and_account_owner(user.user_id, account_id)
+                if result is None:
+                    return frozenset(RoleRepository(db).get_user_role_names(user.user_id))
+                role_names, owner["user_id"] = result
+                return frozenset(role_names)
+
+            user_role_names = role_cache.get_or_load(user.user_id, load_roles)
+
+            # 如果是管理员或银行员工，直接放行
+            if "system_admin" not in user_role_names and "bank_staff" not in user_role_names:
+                # 检查普通用户是否是账户所有者
+                if "user_id" in owner:
+                    if owner["user_id"] != user.user_id:
+                        raise HTTPException(
+                            status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to access this account"
+                        )
+                else:
+                    is_account_owner(account_id, user.user_id, db)
 
         return await func(*args, **kwargs)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
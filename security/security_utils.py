@@ -1,7 +1,8 @@
-import bcrypt
+import hashlib
 import secrets
 from datetime import datetime, timedelta
 import jwt
+from security.password_hasher import password_hasher
 from utils.logger import bank_logger
 from utils.exceptions import SecurityError
 
@@ -13,8 +14,7 @@ class SecurityUtils:
     def hash_password(password: str) -> str:
         """对密码进行哈希"""
         try:
-            salt = bcrypt.gensalt()
-            return bcrypt.hashpw(password.encode(), salt).decode()
+            return password_hasher.hash_password(password)
         except Exception as e:
             bank_logger.error(f"Password hashing failed: {str(e)}")
             raise SecurityError("Failed to hash password")
@@ -23,7 +23,30 @@ class SecurityUtils:
     def verify_password(password: str, hashed: str) -> bool:
         """验证密码"""
         try:
-            return bcrypt.checkpw(password.encode(), hashed.encode())
+            return password_hasher.verify_password(password, hashed)
+        except Exception as e:
+            bank_logger.error(f"Password verification failed: {str(e)}")
+            return False
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """在bcrypt线程池中哈希密码，不阻塞事件循环"""
+        try:
+            return await password_hasher.hash_password_async(password)
+        except SecurityError:
+            raise
+        except Exception as e:
+            bank_logger.error(f"Password hashing failed: {str(e)}")
+            raise SecurityError("Failed to hash password")
+
+    @staticmethod
+    async def verify_password_async(password: str, hashed: str) -> bool:
+        """在bcrypt线程池中验证密码，不阻塞事件循环"""
+        try:
+            return await password_hasher.verify_password_async(password, hashed)
+        except SecurityError:
+            # 线程池繁忙，交由调用方返回错误而不是当作密码错误
+            raise
         except Exception as e:
             bank_logger.error(f"Password verification failed: {str(e)}")
             return False
@@ -101,6 +124,11 @@ class SecurityUtils:
     #     except jwt.InvalidTokenError:
     #         raise SecurityError("Invalid temporary token")
 
+    @staticmethod
+    def token_digest(token: str) -> str:
+        """令牌摘要，用作缓存键与失效事件，避免在内存索引和进程间消息中保存令牌原文"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
     # 为了保持向后兼容，保留这些方法但使用统一的实现
     def generate_temp_token(self, user_id: int) -> str:
         """生成临时令牌（用于MFA验证）"""
@@ -0,0 +1,298 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from config.setting import SESSION_STORE
+from dal.repositories.session_repository import SessionRepository
+from security.security_utils import SecurityUtils
+from utils.cache_bus import invalidation_bus
+from utils.logger import bank_logger
+
+
+class SessionEntry(NamedTuple):
+    user_id: int
+    expires_at: float
+
+
+class SessionStore:
+    """
+    会话存储
+    - 内存中按令牌摘要索引有效会话，作为主要查询路径；未命中时回退查询数据库并补入索引
+    - 新会话先写入内存，由后台线程批量写回数据库（write-behind）
+    - 会话失效（登出、注销全部会话）同步写入数据库，保证撤销在进程重启后仍然有效
+    - 过期时间轮：按过期时间分槽，每个周期只处理到期的槽，不扫描整个索引或数据表
+    新会话与失效事件通过缓存失效总线同步到同一主机上的其他工作进程
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], flush_interval: float = 0.2,
+                 batch_size: int = 500, wheel_slot_seconds: int = 60):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.wheel_slot_seconds = wheel_slot_seconds
+        self._index: Dict[str, SessionEntry] = {}
+        self._user_index: Dict[int, Set[str]] = defaultdict(set)
+        self._wheel: Dict[int, Set[str]] = defaultdict(set)
+        self._wheel_cursor = self._slot(time.time())
+        # 等待写回数据库的新会话：令牌摘要 -> 会话行
+        self._pending: Dict[str, dict] = {}
+        # 正在写回的一批会话，以及写回期间被其他进程撤销、需要在写回后补做失效的令牌
+        self._in_flight: Dict[str, dict] = {}
+        self._revoked_in_flight: Set[str] = set()
+        self._lock = threading.Lock()
+        # 写回与失效互斥，避免失效的 UPDATE 早于新会话的 INSERT 提交
+        self._flush_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """停止后台线程，并写回剩余的新会话"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._flush_all()
+
+    def create(self, user_id: int, token: str, expires_at: datetime,
+               ip_address: str = None, user_agent: str = None) -> None:
+        """创建会话，立即可用，稍后批量写入数据库"""
+        digest = SecurityUtils.token_digest(token)
+        expires_ts = self._timestamp(expires_at)
+        now = datetime.utcnow()
+        with self._lock:
+            self._add(digest, SessionEntry(user_id, expires_ts))
+            self._pending[digest] = {
+                "user_id": user_id,
+                "token": token,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "is_active": True,
+                "created_at": now,
+                "last_activity": now,
+                "expires_at": expires_at
+            }
+            pending = len(self._pending)
+
+        # 其他工作进程在数据库写回之前也能识别该会话
+        invalidation_bus.publish("sessions_created", [[digest, user_id, expires_ts]])
+        if pending >= self.batch_size:
+            self._wake_event.set()
+
+    def get_active(self, token: str) -> Optional[SessionEntry]:
+        """按令牌获取有效会话"""
+        digest = SecurityUtils.token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(digest)
+            if entry is not None:
+                if entry.expires_at > now:
+                    return entry
+                self._remove(digest)
+                return None
+
+        # 本进程启动前创建的会话：回退查询数据库
+        db = self.session_factory()
+        try:
+            session = SessionRepository(db).get_active_session(token)
+        finally:
+            db.close()
+        if session is None:
+            return None
+
+        entry = SessionEntry(session.user_id, self._timestamp(session.expires_at))
+        with self._lock:
+            self._add(digest, entry)
+        return entry
+
+    def invalidate_token(self, token: str) -> bool:
+        """使单个会话失效（登出）"""
+        digest = SecurityUtils.token_digest(token)
+        with self._flush_lock:
+            with self._lock:
+                found = self._remove(digest)
+                self._revoke_unwritten(digest)
+
+            db = self.session_factory()
+            try:
+                updated = SessionRepository(db).invalidate_session_by_token(token)
+            finally:
+                db.close()
+        return found or updated
+
+    def invalidate_user(self, user_id: int) -> int:
+        """使用户的全部会话失效"""
+        with self._flush_lock:
+            with self._lock:
+                digests = list(self._user_index.get(user_id, ()))
+                for digest in digests:
+                    self._remove(digest)
+                for digest, row in self._pending.items():
+                    if row["user_id"] == user_id:
+                        self._revoke_unwritten(digest)
+
+            db = self.session_factory()
+            try:
+                updated = SessionRepository(db).invalidate_all_user_sessions(user_id)
+            finally:
+                db.close()
+        return max(len(digests), updated)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._index),
+                "users": len(self._user_index),
+                "pending_writes": len(self._pending),
+                "wheel_slots": len(self._wheel)
+            }
+
+    def _add(self, digest: str, entry: SessionEntry) -> None:
+        self._remove(digest)
+        self._index[digest] = entry
+        self._user_index[entry.user_id].add(digest)
+        self._wheel[self._slot(entry.expires_at)].add(digest)
+
+    def _remove(self, digest: str) -> bool:
+        entry = self._index.pop(digest, None)
+        if entry is None:
+            return False
+        digests = self._user_index.get(entry.user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._user_index[entry.user_id]
+        slot = self._wheel.get(self._slot(entry.expires_at))
+        if slot is not None:
+            slot.discard(digest)
+        return True
+
+    def _evict_expired(self) -> int:
+        """淘汰已完全过期的时间槽中的会话"""
+        current = self._slot(time.time())
+        evicted = 0
+        with self._lock:
+            for slot in range(self._wheel_cursor, current):
+                for digest in self._wheel.pop(slot, ()):
+                    entry = self._index.pop(digest, None)
+                    if entry is not None:
+                        self._user_index[entry.user_id].discard(digest)
+                        if not self._user_index[entry.user_id]:
+                            del self._user_index[entry.user_id]
+                        evicted += 1
+            self._wheel_cursor = max(self._wheel_cursor, current)
+        return evicted
+
+    def _flush(self) -> int:
+        """写回一批新会话，返回写回条数"""
+        with self._flush_lock:
+            with self._lock:
+                for digest in list(self._pending)[:self.batch_size]:
+                    self._in_flight[digest] = self._pending.pop(digest)
+                batch = self._in_flight
+            if not batch:
+                return 0
+
+            db = self.session_factory()
+            try:
+                repository = SessionRepository(db)
+                repository.bulk_insert(list(batch.values()))
+                db.commit()
+                with self._lock:
+                    revoked = [batch[digest]["token"] for digest in self._revoked_in_flight]
+                    self._revoked_in_flight.clear()
+                if revoked:
+                    repository.deactivate_tokens(revoked)
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                bank_logger.error(f"Session write-behind failed, will retry: {str(e)}")
+                with self._lock:
+                    for digest, row in batch.items():
+                        if digest in self._revoked_in_flight:
+                            row["is_active"] = False
+                        self._pending.setdefault(digest, row)
+                    self._revoked_in_flight.clear()
+                return 0
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+                db.close()
+        return len(batch)
+
+    def _flush_all(self) -> None:
+        while self._pending:
+            if not self._flush():
+                break
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval)
+            self._wake_event.clear()
+            try:
+                self._flush_all()
+                self._evict_expired()
+            except Exception as e:
+                bank_logger.error(f"Session store maintenance failed: {str(e)}")
+
+    def _slot(self, timestamp: float) -> int:
+        return int(timestamp // self.wheel_slot_seconds)
+
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        """数据库中的时间为UTC naive datetime"""
+        return (value - datetime(1970, 1, 1)).total_seconds()
+
+    # 会话失效事件（本进程与其他工作进程）
+    def on_sessions_created(self, items: List) -> None:
+        with self._lock:
+            for digest, user_id, expires_ts in items:
+                self._add(digest, SessionEntry(user_id, expires_ts))
+
+    def on_tokens_invalidated(self, digests: Iterable[str]) -> None:
+        with self._lock:
+            for digest in digests:
+                self._remove(digest)
+                self._revoke_unwritten(digest)
+
+    def on_users_invalidated(self, user_ids: Iterable[int]) -> None:
+        user_ids = set(user_ids)
+        with self._lock:
+            for user_id in user_ids:
+                for digest in list(self._user_index.get(user_id, ())):
+                    self._remove(digest)
+            for rows in (self._pending, self._in_flight):
+                for digest, row in rows.items():
+                    if row["user_id"] in user_ids:
+                        self._revoke_unwritten(digest)
+
+    def _revoke_unwritten(self, digest: str) -> None:
+        """尚未写回数据库的会话被撤销：待写回的直接标记失效，写回中的在写回后补做失效"""
+        row = self._pending.get(digest)
+        if row is not None:
+            row["is_active"] = False
+        elif digest in self._in_flight:
+            self._revoked_in_flight.add(digest)
+
+
+# 全局会话存储
+session_store = SessionStore(
+    SessionLocal,
+    flush_interval=SESSION_STORE["flush_interval_ms"] / 1000,
+    batch_size=SESSION_STORE["batch_size"],
+    wheel_slot_seconds=SESSION_STORE["wheel_slot_seconds"]
+)
+invalidation_bus.subscribe("sessions_created", session_store.on_sessions_created)
+invalidation_bus.subscribe("session_tokens", session_store.on_tokens_invalidated)
+invalidation_bus.subscribe("user_sessions", session_store.on_users_invalidated)
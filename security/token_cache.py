@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from config.setting import CACHE
+from security.security_utils import SecurityUtils
+from utils.cache import TTLCache
+from utils.cache_bus import invalidation_bus
+
+
+class RolePrincipal(NamedTuple):
+    role_name: str
+
+
+class UserPrincipal(NamedTuple):
+    """认证后的用户身份（缓存用的轻量对象，提供 user_id / roles 等常用属性）"""
+    user_id: int
+    username: str
+    status: str
+    roles: Tuple[RolePrincipal, ...]
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            status=user.status,
+            roles=tuple(RolePrincipal(role.role_name) for role in user.roles)
+        )
+
+
+class TokenCache:
+    """
+    已验证JWT的缓存，按令牌摘要保存解码后的声明与用户身份，最长保留到令牌的 exp
+    - 登出时按令牌摘要失效
+    - 用户状态/角色变更或注销全部会话时提升该用户的代号，之前缓存的条目全部作废
+    """
+
+    def __init__(self, max_entries: int, max_ttl: float):
+        self.max_ttl = max_ttl
+        self._cache = TTLCache("tokens", ttl=max_ttl, max_entries=max_entries)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, user_id: int) -> int:
+        """加载用户前获取代号，加载期间发生失效时写入的条目将被忽略"""
+        return self._generations.get(user_id, 0)
+
+    def get(self, token: str) -> Optional[Tuple[dict, UserPrincipal]]:
+        entry = self._cache.get(SecurityUtils.token_digest(token))
+        if entry is None:
+            return None
+        claims, principal, generation = entry
+        if generation != self.generation(principal.user_id) or claims.get("exp", 0) <= time.time():
+            return None
+        return claims, principal
+
+    def put(self, token: str, claims: dict, principal: UserPrincipal, generation: int) -> None:
+        ttl = min(claims.get("exp", 0) - time.time(), self.max_ttl)
+        if ttl > 0:
+            self._cache.put(SecurityUtils.token_digest(token), (claims, principal, generation), ttl)
+
+    def invalidate_digests(self, digests: Iterable[str]) -> None:
+        self._cache.invalidate_many(digests)
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
+
+
+# 全局令牌缓存
+token_cache = TokenCache(max_entries=CACHE["token_max_entries"], max_ttl=CACHE["token_max_ttl_seconds"])
+# 用户状态、角色变更
+invalidation_bus.subscribe("users", token_cache.invalidate_users)
+# 注销用户的全部会话
+invalidation_bus.subscribe("user_sessions", token_cache.invalidate_users)
+# 单个会话登出（事件ID为令牌摘要）
+invalidation_bus.subscribe("session_tokens", token_cache.invalidate_digests)
@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, List
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from config.setting import ACCOUNT_NUMBER
+from dal.repositories.number_sequence_repository import NumberSequenceRepository
+from utils.exceptions import BankException
+from utils.logger import bank_logger
+from utils.validators import account_number_check_digit
+
+SEQUENCE_NAME = "account_number"
+
+
+class AccountNumberAllocator:
+    """
+    账户号码分配器
+    每个工作进程从数据库序列表按块租用号段，在内存中逐个发放，号段用完再租下一段，
+    号码由 前缀 + 定长序号 + Luhn校验位 组成，不同进程的号段互不重叠，无需插入前查重或冲突重试
+    进程退出时未用完的号段直接丢弃（号码不要求连续）
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], block_size: int = 100,
+                 prefix: str = "ACC", digits: int = 10):
+        self.session_factory = session_factory
+        self.block_size = block_size
+        self.prefix = prefix
+        self.digits = digits
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_number(self) -> str:
+        return self.next_numbers(1)[0]
+
+    def next_numbers(self, count: int) -> List[str]:
+        """分配 count 个账户号码"""
+        values = []
+        with self._lock:
+            while len(values) < count:
+                if self._next >= self._end:
+                    # 批量开户时一次租足剩余数量
+                    self._lease(max(self.block_size, count - len(values)))
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+        return [self._format(value) for value in values]
+
+    def _lease(self, size: int) -> None:
+        db = self.session_factory()
+        try:
+            start, end = NumberSequenceRepository(db).allocate_block(SEQUENCE_NAME, size)
+        finally:
+            db.close()
+        if end - 1 >= 10 ** self.digits:
+            bank_logger.error("Account number sequence exhausted")
+            raise BankException("Account number sequence exhausted")
+        self._next, self._end = start, end
+
+    def _format(self, value: int) -> str:
+        body = str(value).zfill(self.digits)
+        return f"{self.prefix}{body}{account_number_check_digit(body)}"
+
+
+# 全局账户号码分配器
+account_number_allocator = AccountNumberAllocator(
+    SessionLocal,
+    block_size=ACCOUNT_NUMBER["block_size"],
+    prefix=ACCOUNT_NUMBER["prefix"],
+    digits=ACCOUNT_NUMBER["digits"]
+)
@@ -1,18 +1,31 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+from datetime import datetime, time
 from dal.repositories.account_repository import AccountRepository
+from dal.repositories.balance_snapshot_repository import BalanceSnapshotRepository
+from dal.repositories.transaction_repository import TransactionRepository
 from security.encryption import EncryptionService
+from services.account_number_service import account_number_allocator
+from utils.cache import account_cache
 from utils.exceptions import ValidationError
 from utils.logger import bank_logger
 from decimal import Decimal
 
+# 单次批量开户的最大数量
+MAX_BULK_ACCOUNTS = 1000
+
+ACCOUNT_TYPES = ('savings', 'checking', 'investment', 'loan')
 
 
 class AccountService:
     def __init__(self,
                  account_repository: AccountRepository,
-                 encryption_service: EncryptionService):
+                 encryption_service: EncryptionService,
+                 transaction_repository: Optional[TransactionRepository] = None,
+                 balance_snapshot_repository: Optional[BalanceSnapshotRepository] = None):
         self.account_repository = account_repository
         self.encryption_service = encryption_service
+        self.transaction_repository = transaction_repository
+        self.balance_snapshot_repository = balance_snapshot_repository
 
     async def create_account(self, user_id: int, account_type: str) -> dict:
         """创建新账户"""
@@ -41,53 +54,123 @@ class AccountService:
             bank_logger.error(f"Failed to create account: {str(e)}")
             raise
 
+    async def create_accounts_bulk(self, user_id: int, account_types: List[str]) -> List[Dict]:
+        """
+        批量开户：一次分配全部账户号码，一条批量INSERT写入并只提交一次
+        :param account_types: 每个新账户的类型
+        :return: 新账户列表（与 account_types 顺序一致）
+        """
+        try:
+            if not account_types:
+                raise ValidationError("No accounts to create")
+            if len(account_types) > MAX_BULK_ACCOUNTS:
+                raise ValidationError(f"At most {MAX_BULK_ACCOUNTS} accounts per batch")
+            if any(account_type not in ACCOUNT_TYPES for account_type in account_types):
+                raise ValidationError("Invalid account type")
+
+            account_numbers = account_number_allocator.next_numbers(len(account_types))
+            rows = [
+                {
+                    "user_id": user_id,
+                    "account_type": account_type,
+                    "account_number": account_number,
+                    "balance": Decimal("0.00"),
+                    "status": "active"
+                }
+                for account_type, account_number in zip(account_types, account_numbers)
+            ]
+
+            db = self.account_repository.db
+            try:
+                accounts = self.account_repository.bulk_insert(rows)
+                self.account_repository.publish_after_commit([account.account_id for account in accounts])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            by_number = {account.account_number: account for account in accounts}
+            bank_logger.info(f"Created {len(accounts)} accounts for user {user_id}")
+            return [
+                {
+                    "account_id": account.account_id,
+                    "account_number": account.account_number,
+                    "account_type": account.account_type,
+                    "balance": float(account.balance),
+                    "status": account.status
+                }
+                for account in (by_number[account_number] for account_number in account_numbers)
+            ]
+        except Exception as e:
+            bank_logger.error(f"Failed to create accounts in bulk: {str(e)}")
+            raise
+
     async def get_account_balance(self, account_id: int) -> float:
         """获取账户余额"""
         try:
-            account = self.account_repository.get_by_id(account_id)
+            account = await self.get_account_by_id(account_id)
             if not account:
                 raise ValidationError("Account not found")
 
-            return account.balance
+            return account["balance"]
 
         except Exception as e:
             bank_logger.error(f"Failed to get balance: {str(e)}")
             raise
 
     async def get_account_by_id(self, account_id: int) -> Optional[dict]:
-        """获取账户详情"""
+        """获取账户详情（经过账户缓存，余额变动时缓存失效）"""
         try:
-            account = self.account_repository.get_by_id(account_id)
-            if not account:
-                return None
-
-            return {
-                "account_id": account.account_id,
-                "account_number": account.account_number,
-                "account_type": account.account_type,
-                "balance": float(account.balance),
-                "status": account.status
-            }
+            return account_cache.get_or_load(account_id, lambda: self._load_account(account_id))
         except Exception as e:
             bank_logger.error(f"Failed to get account: {str(e)}")
             raise
 
+    def _load_account(self, account_id: int) -> Optional[dict]:
+        account = self.account_repository.get_by_id(account_id)
+        if not account:
+            return None
+
+        return {
+            "account_id": account.account_id,
+            "account_number": account.account_number,
+            "account_type": account.account_type,
+            "balance": float(account.balance),
+            "status": account.status
+        }
+
     async def deposit(self, account_id: int, amount: Decimal) -> Dict:
         """向账户存款"""
         try:
             if amount <= 0:
                 raise ValidationError("Deposit amount must be positive")
 
-            # 获取账户
-            account = self.account_repository.get_by_id(account_id)
-            if not account:
-                raise ValidationError("Account not found")
-
-            if account.status != 'active':
-                raise ValidationError("Account is not active")
-
-            # 更新余额
-            updated_account = self.account_repository.update_balance(account_id, amount)
+            # 单一数据库事务：加锁、增加余额并记录存款交易，使余额变动都能从交易表重放
+            db = self.account_repository.db
+            try:
+                account = self.account_repository.lock_accounts([account_id]).get(account_id)
+                if not account:
+                    raise ValidationError("Account not found")
+
+                if account.status != 'active':
+                    raise ValidationError("Account is not active")
+
+                self.account_repository.apply_balance_deltas({account_id: amount})
+                if self.transaction_repository is not None:
+                    self.transaction_repository.add({
+                        "from_account_id": None,
+                        "to_account_id": account_id,
+                        "amount": amount,
+                        "transaction_type": "deposit",
+                        "status": "completed"
+                    })
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            db.refresh(account)
+            updated_account = account
 
             return {
                 "account_id": updated_account.account_id,
@@ -100,8 +183,34 @@ class AccountService:
             bank_logger.error(f"Deposit failed: {str(e)}")
             raise
 
+    async def get_balance_at(self, account_id: int, ts: datetime) -> Decimal:
+        """
+        获取账户在某一时刻的余额
+        以 ts 当日之前最近的日终快照为基础，只重放 ts 当日的交易以及快照任务尚未处理的交易
+        """
+        try:
+            if self.transaction_repository is None or self.balance_snapshot_repository is None:
+                raise ValidationError("Balance history is not available")
+
+            if not self.account_repository.get_by_id(account_id):
+                raise ValidationError("Account not found")
+
+            day_start = datetime.combine(ts.date(), time.min)
+            checkpoint = self.balance_snapshot_repository.get_checkpoint()
+            snapshot = self.balance_snapshot_repository.get_latest_before(account_id, ts.date())
+            balance = snapshot.balance if snapshot else Decimal("0")
+
+            for from_account_id, to_account_id, amount in self.transaction_repository.get_balance_replay(
+                    account_id, since=day_start, until=ts, after_id=checkpoint):
+                if from_account_id == account_id:
+                    balance -= amount
+                if to_account_id == account_id:
+                    balance += amount
+            return balance
+        except Exception as e:
+            bank_logger.error(f"Failed to get historical balance: {str(e)}")
+            raise
+
     def _generate_account_number(self) -> str:
-        """生成唯一的账户号码"""
-        # 实现账户号码生成逻辑
-        import random
-        return f"ACC{random.randint(10000, 99999)}"
\ No newline at end of file
+        """从本进程租用的号段中分配唯一的账户号码"""
+        return account_number_allocator.next_number()
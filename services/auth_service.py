@@ -3,9 +3,9 @@ import string
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from dal.repositories.user_repository import UserRepository
-from dal.repositories.session_repository import SessionRepository
 from dal.repositories.mfa_repository import MFARepository
 from security.security_utils import SecurityUtils
+from security.session_store import SessionStore
 from utils.exceptions import AuthenticationError, ValidationError
 from utils.logger import bank_logger
 
@@ -14,12 +14,12 @@ class AuthService:
     def __init__(
             self,
             user_repository: UserRepository,
-            session_repository: SessionRepository,
+            session_store: SessionStore,
             mfa_repository: MFARepository,
             security_utils: SecurityUtils
     ):
         self.user_repository = user_repository
-        self.session_repository = session_repository
+        self.session_store = session_store
         self.mfa_repository = mfa_repository
         self.security_utils = security_utils
 
@@ -41,7 +41,7 @@ class AuthService:
                 raise ValidationError("Email already exists")
 
             # 创建用户
-            password_hash = self.security_utils.hash_password(password)
+            password_hash = await self.security_utils.hash_password_async(password)
             user_data = {
                 "username": username,
                 "password_hash": password_hash,
@@ -71,7 +71,7 @@ class AuthService:
             if not user:
                 raise AuthenticationError("Invalid username or password")
 
-            if not self.security_utils.verify_password(password, user.password_hash):
+            if not await self.security_utils.verify_password_async(password, user.password_hash):
                 raise AuthenticationError("Invalid username or password")
 
             # 检查用户状态
@@ -176,7 +176,7 @@ class AuthService:
         """
         try:
             # 使会话失效
-            return self.session_repository.invalidate_session_by_token(token)
+            return self.session_store.invalidate_token(token)
         except Exception as e:
             bank_logger.error(f"Logout failed: {str(e)}")
             raise
@@ -199,7 +199,7 @@ class AuthService:
             )
 
             # 创建会话记录
-            self.session_repository.create_session(
+            self.session_store.create(
                 user_id=user_id,
                 token=token,
                 expires_at=expires_at,
@@ -238,7 +238,7 @@ class AuthService:
                 return None
 
             # 检查会话是否有效
-            session = self.session_repository.get_active_session(token)
+            session = self.session_store.get_active(token)
             if not session:
                 return None
 
@@ -262,11 +262,11 @@ class AuthService:
                 raise ValidationError("User not found")
 
             # 验证旧密码
-            if not self.security_utils.verify_password(old_password, user.password_hash):
+            if not await self.security_utils.verify_password_async(old_password, user.password_hash):
                 raise AuthenticationError("Invalid old password")
 
             # 更新密码
-            new_password_hash = self.security_utils.hash_password(new_password)
+            new_password_hash = await self.security_utils.hash_password_async(new_password)
             success = self.user_repository.update(user_id, {
                 "password_hash": new_password_hash,
                 "updated_at": datetime.utcnow()
@@ -274,7 +274,7 @@ class AuthService:
 
             if success:
                 # 使所有现有会话失效
-                self.session_repository.invalidate_all_user_sessions(user_id)
+                self.session_store.invalidate_user(user_id)
 
             return bool(success)
 
@@ -0,0 +1,109 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from config.setting import BALANCE_SNAPSHOT
+from dal.repositories.balance_snapshot_repository import BalanceSnapshotRepository
+from dal.repositories.transaction_repository import TransactionRepository
+from utils.logger import bank_logger
+
+
+class BalanceSnapshotJob:
+    """
+    日终余额快照的增量维护任务
+    后台线程按交易ID顺序读取检查点之后的新交易，把已完成交易的余额变动累加到
+    (账户, 日期) 快照上，并在同一数据库事务中推进检查点
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 interval_seconds: float = 60, batch_size: int = 1000, settle_seconds: int = 30):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="balance-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> int:
+        """
+        处理检查点之后所有已稳定的交易
+        :return: 本次处理的交易数
+        """
+        processed = 0
+        while not self._stop_event.is_set():
+            count, has_more = self._process_batch()
+            processed += count
+            if not has_more:
+                break
+        return processed
+
+    def _process_batch(self):
+        """处理一批交易，返回 (处理条数, 是否可能还有更多)"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        db = self.session_factory()
+        try:
+            snapshot_repository = BalanceSnapshotRepository(db)
+            checkpoint = snapshot_repository.lock_checkpoint()
+            transactions = TransactionRepository(db).get_after_id(checkpoint.last_transaction_id, self.batch_size)
+
+            deltas = defaultdict(Decimal)
+            last_id = checkpoint.last_transaction_id
+            count = 0
+            for tx in transactions:
+                # 按ID顺序推进，遇到尚未稳定的交易即停止，保证检查点之前没有遗漏
+                if tx.created_at > cutoff:
+                    break
+                if tx.status == 'completed':
+                    snapshot_date = tx.created_at.date()
+                    if tx.from_account_id:
+                        deltas[(tx.from_account_id, snapshot_date)] -= tx.amount
+                    if tx.to_account_id:
+                        deltas[(tx.to_account_id, snapshot_date)] += tx.amount
+                last_id = tx.transaction_id
+                count += 1
+
+            if count:
+                snapshot_repository.apply_daily_deltas(dict(deltas))
+                checkpoint.last_transaction_id = last_id
+            db.commit()
+            return count, count == self.batch_size
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                processed = self.run_once()
+                if processed:
+                    bank_logger.info(f"Balance snapshots updated with {processed} transactions")
+            except Exception as e:
+                bank_logger.error(f"Balance snapshot job failed: {str(e)}")
+            self._stop_event.wait(self.interval_seconds)
+
+
+# 全局快照任务
+balance_snapshot_job = BalanceSnapshotJob(
+    SessionLocal,
+    interval_seconds=BALANCE_SNAPSHOT["interval_seconds"],
+    batch_size=BALANCE_SNAPSHOT["batch_size"],
+    settle_seconds=BALANCE_SNAPSHOT["settle_seconds"]
+)
@@ -0,0 +1,136 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from config.setting import BLOCKCHAIN
+from dal.repositories.ledger_outbox_repository import LedgerOutboxRepository
+from security.blockchain import Block, BlockSealer, get_block_sealer
+from utils.exceptions import TransactionError
+from utils.logger import bank_logger
+
+
+def to_ledger_entry(transaction) -> Dict:
+    """简化交易数据，仅包含上链所需的关键信息"""
+    return {
+        "transaction_id": transaction.transaction_id,
+        "from_account_id": transaction.from_account_id,
+        "to_account_id": transaction.to_account_id,
+        "amount": float(transaction.amount),
+        "type": transaction.transaction_type,
+        "signature": transaction.signature
+    }
+
+
+class LedgerReconciler:
+    """
+    账本对账任务
+    转账与 ledger_outbox 记录在同一数据库事务中提交，区块封装后删除对应记录。
+    封装队列只在内存中，进程崩溃会丢失尚未封装的交易：本任务在启动时及之后定期扫描
+    超过 grace_seconds 仍未删除的记录，已在链上的直接删除，否则重新提交封装
+    （封装器会跳过链上已有的交易，重复提交不会重复上链）
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 sealer_factory: Callable[[], BlockSealer] = get_block_sealer,
+                 interval_seconds: float = 60, grace_seconds: int = 60, batch_size: int = 500):
+        self.session_factory = session_factory
+        self.sealer_factory = sealer_factory
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self.sealer_factory().on_sealed = self.mark_sealed
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ledger-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def mark_sealed(self, block: Block) -> None:
+        """区块封装后删除其中交易的对账记录（删除失败时由下次对账补删）"""
+        transaction_ids = [tx["transaction_id"] for tx in block.transactions
+                           if isinstance(tx, dict) and tx.get("transaction_id") is not None]
+        if not transaction_ids:
+            return
+        db = self.session_factory()
+        try:
+            LedgerOutboxRepository(db).remove(transaction_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def run_once(self) -> int:
+        """
+        处理一轮对账
+        :return: 重新提交封装的交易数
+        """
+        sealer = self.sealer_factory()
+        created_before = datetime.utcnow() - timedelta(seconds=self.grace_seconds)
+        after_id = 0
+        requeued = 0
+        while not self._stop_event.is_set():
+            db = self.session_factory()
+            try:
+                repository = LedgerOutboxRepository(db)
+                transactions = repository.get_pending(created_before, after_id, self.batch_size)
+                if not transactions:
+                    break
+                after_id = transactions[-1].transaction_id
+
+                sealed = {tx.transaction_id for tx in transactions
+                          if sealer.blockchain.index.find_transaction(tx.transaction_id)}
+                if sealed:
+                    repository.remove(sealed)
+                    db.commit()
+
+                missing = [to_ledger_entry(tx) for tx in transactions if tx.transaction_id not in sealed]
+                if missing:
+                    try:
+                        sealer.reserve(len(missing))
+                    except TransactionError:
+                        bank_logger.warning("Ledger queue is full, reconciliation deferred")
+                        break
+                    for entry in missing:
+                        sealer.submit(entry)
+                    requeued += len(missing)
+
+                if len(transactions) < self.batch_size:
+                    break
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        return requeued
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                requeued = self.run_once()
+                if requeued:
+                    bank_logger.warning(f"Re-queued {requeued} committed transactions missing from the ledger")
+            except Exception as e:
+                bank_logger.error(f"Ledger reconciliation failed: {str(e)}")
+            self._stop_event.wait(self.interval_seconds)
+
+
+# 全局对账任务（与封装器在同一进程运行）
+ledger_reconciler = LedgerReconciler(
+    SessionLocal,
+    interval_seconds=BLOCKCHAIN["reconcile_interval_seconds"],
+    grace_seconds=BLOCKCHAIN["reconcile_grace_seconds"],
+    batch_size=BLOCKCHAIN["reconcile_batch_size"]
+)
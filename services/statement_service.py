@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, List
+from sqlalchemy.orm import Session
+from dal.repositories.account_repository import AccountRepository
+from dal.repositories.transaction_repository import TransactionRepository
+from security.encryption import EncryptionService
+from utils.exceptions import AccountNotFoundError, ValidationError
+from utils.logger import bank_logger
+
+# 每批从数据库读取并解密的交易条数
+STATEMENT_BATCH_SIZE = 1000
+
+STATEMENT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+STATEMENT_COLUMNS = [
+    "transaction_id", "created_at", "type", "direction", "counterparty_account_id",
+    "amount", "status", "description"
+]
+
+
+class StatementService:
+    """
+    账户对账单导出
+    交易通过服务端游标分批读取，每批解密描述后立即编码为 CSV / NDJSON 输出，
+    内存占用只与批大小有关，与账户交易总数无关
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], encryption_service: EncryptionService):
+        self.session_factory = session_factory
+        self.encryption_service = encryption_service
+
+    def validate_request(self, account_id: int, statement_format: str,
+                         start_date: datetime = None, end_date: datetime = None) -> None:
+        """在开始流式输出前校验参数，使错误能以正常的HTTP错误返回"""
+        if statement_format not in STATEMENT_FORMATS:
+            raise ValidationError(f"Unsupported statement format: {statement_format}")
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError("start_date must not be later than end_date")
+
+        db = self.session_factory()
+        try:
+            if not AccountRepository(db).get_by_id(account_id):
+                raise AccountNotFoundError("Account not found")
+        finally:
+            db.close()
+
+    def stream_statement(self, account_id: int, statement_format: str,
+                         start_date: datetime = None, end_date: datetime = None) -> Iterator[str]:
+        """
+        生成对账单内容
+        该生成器持有独立的数据库会话直到输出结束，不依赖请求作用域的会话
+        """
+        db = self.session_factory()
+        try:
+            rows = TransactionRepository(db).stream_account_transactions(
+                account_id, start_date, end_date, batch_size=STATEMENT_BATCH_SIZE)
+
+            if statement_format == "csv":
+                yield self._encode_csv([STATEMENT_COLUMNS])
+
+            count = 0
+            rows = iter(rows)
+            while True:
+                batch = list(islice(rows, STATEMENT_BATCH_SIZE))
+                if not batch:
+                    break
+                records = self._to_records(account_id, batch)
+                count += len(records)
+                if statement_format == "csv":
+                    yield self._encode_csv([[record[column] for column in STATEMENT_COLUMNS] for record in records])
+                else:
+                    yield "".join(json.dumps(record) + "\n" for record in records)
+
+            bank_logger.info(f"Statement exported for account {account_id}: {count} transactions")
+        except Exception as e:
+            bank_logger.error(f"Statement export failed for account {account_id}: {str(e)}")
+            raise
+        finally:
+            db.close()
+
+    def _to_records(self, account_id: int, batch: List) -> List[Dict]:
+        """解密一批交易的描述并转换为对账单记录"""
+        encrypted = [row.description for row in batch if row.description]
+        decrypted = iter(self.encryption_service.decrypt_many(encrypted) if encrypted else [])
+
+        records = []
+        for row in batch:
+            description = None
+            if row.description:
+                description = next(decrypted)
+                if description is None:
+                    description = "[Encrypted]"
+
+            outgoing = row.from_account_id == account_id
+            records.append({
+                "transaction_id": row.transaction_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "type": row.transaction_type,
+                "direction": "debit" if outgoing else "credit",
+                "counterparty_account_id": row.to_account_id if outgoing else row.from_account_id,
+                "amount": str(row.amount),
+                "status": row.status,
+                "description": description
+            })
+        return records
+
+    @staticmethod
+    def _encode_csv(rows: List[List]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
@@ -1,13 +1,31 @@
+import base64
 from decimal import Decimal
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dal.repositories.transaction_repository import TransactionRepository
 from dal.repositories.account_repository import AccountRepository
+from dal.repositories.ledger_outbox_repository import LedgerOutboxRepository
 from security.encryption import EncryptionService
 from security.signature import SignatureService
-from utils.exceptions import ValidationError, InsufficientFundsError
+from utils.exceptions import ValidationError, InsufficientFundsError, TransactionError
 from utils.logger import bank_logger
 from datetime import datetime
-from security.blockchain import blockchain_instance
+from starlette.concurrency import run_in_threadpool
+from security.blockchain import BlockSealer, get_ledger_writer
+from services.ledger_outbox_service import to_ledger_entry
+
+# 单次批量转账的最大笔数
+MAX_BULK_TRANSFERS = 10000
+
+# 交易历史分页大小上限
+MAX_HISTORY_PAGE_SIZE = 500
+
+# 单次请求最多解密的描述条数
+MAX_DECRYPT_BATCH = 500
+
+TRANSACTION_TYPES = ('deposit', 'withdrawal', 'transfer', 'payment')
+
+# 交易历史中描述字段的返回方式：解密 / 保持密文 / 不返回
+DESCRIPTION_MODES = ('decrypted', 'encrypted', 'omitted')
 
 
 class TransactionService:
@@ -15,11 +33,23 @@ class TransactionService:
                  transaction_repository: TransactionRepository,
                  account_repository: AccountRepository,
                  encryption_service: EncryptionService,
-                 signature_service: Optional[SignatureService] = None):
+                 signature_service: Optional[SignatureService] = None,
+                 ledger_outbox_repository: Optional[LedgerOutboxRepository] = None,
+                 block_sealer: Optional[BlockSealer] = None):
         self.transaction_repository = transaction_repository
         self.account_repository = account_repository
         self.encryption_service = encryption_service
         self.signature_service = signature_service
+        self.ledger_outbox_repository = ledger_outbox_repository or LedgerOutboxRepository(transaction_repository.db)
+        self._block_sealer = block_sealer
+
+    @property
+    def block_sealer(self) -> Optional[BlockSealer]:
+        """
+        区块封装器，默认使用全局实例（首次使用时打开账本）
+        本进程不是账本写入进程时为 None：交易只写入 ledger_outbox，由写入进程的对账任务封装上链
+        """
+        return self._block_sealer or get_ledger_writer()
 
     def sign_transaction(self, transaction_data: dict) -> str:
         """
@@ -55,16 +85,11 @@ class TransactionService:
                                  description: str = None) -> Dict:
         """创建新交易"""
         try:
-            # 验证账户
-            from_account = self.account_repository.get_by_id(from_account_id)
-            to_account = self.account_repository.get_by_id(to_account_id)
+            if amount <= 0:
+                raise ValidationError("Transfer amount must be positive")
 
-            if not from_account or not to_account:
-                raise ValidationError("Account not found")
-
-            # 检查余额
-            if from_account.balance < amount:
-                raise InsufficientFundsError("Insufficient funds")
+            if from_account_id == to_account_id:
+                raise ValidationError("Cannot transfer to the same account")
 
             # 加密交易描述（如果有）
             encrypted_description = None
@@ -77,7 +102,7 @@ class TransactionService:
                 "to_account_id": to_account_id,
                 "amount": amount,
                 "transaction_type": "transfer",
-                "status": "pending",
+                "status": "completed",
                 "description": encrypted_description
             }
 
@@ -85,32 +110,46 @@ class TransactionService:
             signature = self.sign_transaction(transaction_data)
             transaction_data["signature"] = signature
 
-            # 保存交易
-            transaction = self.transaction_repository.create(transaction_data)
+            # 打开数据库事务之前预留上链队列容量：账本繁忙时在扣款之前拒绝，客户端可安全重试
+            block_sealer = self.block_sealer
+            if block_sealer is not None:
+                await run_in_threadpool(block_sealer.reserve, 1)
 
-            # 更新账户余额
-            self.account_repository.update_balance(from_account_id, -amount)
-            self.account_repository.update_balance(to_account_id, amount)
+            # 单一数据库事务：按账户ID顺序加锁、校验余额、原子更新余额并写入交易，只提交一次
+            db = self.transaction_repository.db
+            try:
+                accounts = self.account_repository.lock_accounts([from_account_id, to_account_id])
+                from_account = accounts.get(from_account_id)
+                to_account = accounts.get(to_account_id)
 
-            # 更新交易状态
-            self.transaction_repository.update(
-                transaction.transaction_id,
-                {"status": "completed"}
-            )
+                if not from_account or not to_account:
+                    raise ValidationError("Account not found")
 
-            # 简化交易数据，仅包含关键信息
-            blockchain_transaction = {
-                "transaction_id": transaction.transaction_id,
-                "from_account_id": transaction.from_account_id,
-                "to_account_id": transaction.to_account_id,
-                "amount": float(transaction.amount),
-                "type": transaction.transaction_type,
-                "signature": signature
-            }
+                # 检查余额
+                if from_account.balance < amount:
+                    raise InsufficientFundsError("Insufficient funds")
+
+                self.account_repository.apply_balance_deltas({
+                    from_account_id: -amount,
+                    to_account_id: amount
+                })
+                transaction = self.transaction_repository.add(transaction_data)
+                # 与交易同一事务记录待上链，崩溃丢失的封装队列由对账任务补回
+                self.ledger_outbox_repository.add_many([transaction.transaction_id])
+                db.commit()
+            except Exception:
+                db.rollback()
+                if block_sealer is not None:
+                    block_sealer.release(1)
+                raise
 
-            # 添加到区块链并挖掘
-            blockchain_instance.add_transaction(blockchain_transaction)
-            blockchain_instance.mine_pending_transactions()
+            # 提交到后台封装器，按批次打包上链；转账已提交，此后的失败只记录日志（由对账任务补回），不再返回错误
+            if block_sealer is not None:
+                try:
+                    block_sealer.submit(to_ledger_entry(transaction))
+                except Exception as e:
+                    block_sealer.release(1)
+                    bank_logger.error(f"Failed to queue transaction {transaction.transaction_id} for the ledger: {str(e)}")
 
             return {
                 "transaction_id": transaction.transaction_id,
@@ -127,21 +166,173 @@ class TransactionService:
             bank_logger.error(f"Transaction failed: {str(e)}")
             raise
 
-    async def get_transaction_history(self, account_id: int) -> List[Dict]:
-        """获取交易历史"""
+    async def create_transactions_bulk(self, from_account_id: int, transfers: List[Dict]) -> Dict:
+        """
+        批量转账（如代发工资）：同一转出账户向多个账户转账
+        一次 IN 查询加锁校验全部账户，只校验一次总扣款，批量插入交易，
+        按账户净额更新余额，提交后整批交给封装器封装为一个区块
+        :param transfers: [{"to_account_id", "amount", "description"}]
+        """
         try:
-            transactions = self.transaction_repository.get_account_transactions(account_id)
+            if not transfers:
+                raise ValidationError("No transfers provided")
+            if len(transfers) > MAX_BULK_TRANSFERS:
+                raise ValidationError(f"At most {MAX_BULK_TRANSFERS} transfers per batch")
 
-            result = []
-            for tx in transactions:
-                # 解密交易描述（如果有）
-                description = None
-                if tx.description:
-                    try:
-                        description = self.encryption_service.decrypt_data(tx.description)
-                    except:
-                        description = "[Encrypted]"
+            # 计算每个账户的净额
+            deltas: Dict[int, Decimal] = {}
+            total_amount = Decimal("0")
+            for transfer in transfers:
+                amount = Decimal(str(transfer["amount"]))
+                if amount <= 0:
+                    raise ValidationError("Transfer amount must be positive")
+                if transfer["to_account_id"] == from_account_id:
+                    raise ValidationError("Cannot transfer to the same account")
+                total_amount += amount
+                deltas[transfer["to_account_id"]] = deltas.get(transfer["to_account_id"], Decimal("0")) + amount
+            deltas[from_account_id] = -total_amount
+
+            # 加密描述并签名（在加锁之前完成，缩短持锁时间）
+            rows = []
+            for transfer in transfers:
+                description = transfer.get("description")
+                row = {
+                    "from_account_id": from_account_id,
+                    "to_account_id": transfer["to_account_id"],
+                    "amount": Decimal(str(transfer["amount"])),
+                    "transaction_type": "transfer",
+                    "status": "completed",
+                    "description": self.encryption_service.encrypt_data(description) if description else None
+                }
+                row["signature"] = self.sign_transaction(row)
+                rows.append(row)
+
+            # 打开数据库事务之前为整批交易预留上链队列容量
+            block_sealer = self.block_sealer
+            if block_sealer is not None:
+                await run_in_threadpool(block_sealer.reserve, len(rows))
+
+            db = self.transaction_repository.db
+            try:
+                accounts = self.account_repository.lock_accounts(deltas.keys())
+                missing = set(deltas) - set(accounts)
+                if missing:
+                    raise ValidationError(f"Account not found: {', '.join(str(i) for i in sorted(missing))}")
+
+                if accounts[from_account_id].balance < total_amount:
+                    raise InsufficientFundsError("Insufficient funds")
+
+                # 转出账户已加锁，期间不会有其他转出交易写入，可据此取回新插入行的ID
+                last_id = self.transaction_repository.get_last_outgoing_id(from_account_id)
+                self.transaction_repository.bulk_insert(rows)
+                self.account_repository.apply_balance_deltas(deltas)
+                transactions = self.transaction_repository.get_outgoing_after(from_account_id, last_id)
+
+                if len(transactions) != len(rows) or any(
+                        tx.to_account_id != row["to_account_id"] or tx.signature != row["signature"]
+                        for tx, row in zip(transactions, rows)):
+                    raise TransactionError("Bulk insert returned unexpected rows")
 
+                self.ledger_outbox_repository.add_many(tx.transaction_id for tx in transactions)
+                db.commit()
+            except Exception:
+                db.rollback()
+                if block_sealer is not None:
+                    block_sealer.release(len(rows))
+                raise
+
+            # 整批交易交给后台封装器单独封装为一个区块；转账已提交，此后的失败只记录日志（由对账任务补回）
+            if block_sealer is not None:
+                try:
+                    block_sealer.submit_batch([to_ledger_entry(tx) for tx in transactions])
+                except Exception as e:
+                    block_sealer.release(len(rows))
+                    bank_logger.error(f"Failed to queue bulk transfer from account {from_account_id} for the ledger: {str(e)}")
+
+            return {
+                "from_account_id": from_account_id,
+                "count": len(transactions),
+                "total_amount": float(total_amount),
+                "transactions": [{
+                    "transaction_id": tx.transaction_id,
+                    "from_account_id": tx.from_account_id,
+                    "to_account_id": tx.to_account_id,
+                    "amount": float(tx.amount),
+                    "type": tx.transaction_type,
+                    "status": tx.status,
+                    "created_at": tx.created_at,
+                    "description": transfer.get("description")
+                } for tx, transfer in zip(transactions, transfers)]
+            }
+
+        except Exception as e:
+            bank_logger.error(f"Bulk transaction failed: {str(e)}")
+            raise
+
+    async def get_transaction(self, transaction_id: int) -> Optional[Dict]:
+        """获取交易详情"""
+        try:
+            tx = self.transaction_repository.get_by_id(transaction_id)
+            if not tx:
+                return None
+
+            description = (await self._decrypt_descriptions([tx.description]))[0]
+            return {
+                "transaction_id": tx.transaction_id,
+                "from_account_id": tx.from_account_id,
+                "to_account_id": tx.to_account_id,
+                "amount": float(tx.amount),
+                "type": tx.transaction_type,
+                "status": tx.status,
+                "created_at": tx.created_at,
+                "description": description
+            }
+        except Exception as e:
+            bank_logger.error(f"Failed to get transaction: {str(e)}")
+            raise
+
+    async def get_transaction_history(self, account_id: int, limit: int = 50, cursor: str = None,
+                                      start_date: datetime = None, end_date: datetime = None,
+                                      transaction_type: str = None,
+                                      description_mode: str = 'decrypted') -> Dict:
+        """
+        获取交易历史（按时间倒序键集分页）
+        :param cursor: 上一页返回的 next_cursor
+        :param description_mode: decrypted / encrypted / omitted，列表页不展示描述时
+                                 使用后两者可跳过解密，再通过 decrypt_descriptions 按需解密
+        :return: {"transactions": [...], "next_cursor": 下一页游标，没有更多时为None}
+        """
+        try:
+            if limit <= 0 or limit > MAX_HISTORY_PAGE_SIZE:
+                raise ValidationError(f"Limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}")
+            if transaction_type and transaction_type not in TRANSACTION_TYPES:
+                raise ValidationError("Invalid transaction type")
+            if description_mode not in DESCRIPTION_MODES:
+                raise ValidationError("Invalid description mode")
+
+            transactions = self.transaction_repository.get_account_transactions_page(
+                account_id,
+                limit=limit + 1,
+                cursor=self._decode_cursor(cursor) if cursor else None,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=transaction_type
+            )
+
+            # 多取一条用于判断是否还有下一页
+            next_cursor = None
+            if len(transactions) > limit:
+                transactions = transactions[:limit]
+                next_cursor = self._encode_cursor(transactions[-1])
+
+            descriptions = [tx.description for tx in transactions]
+            if description_mode == 'omitted':
+                descriptions = [None] * len(transactions)
+            elif description_mode == 'decrypted':
+                descriptions = await self._decrypt_descriptions(descriptions)
+
+            result = []
+            for tx, description in zip(transactions, descriptions):
                 result.append({
                     "transaction_id": tx.transaction_id,
                     "from_account_id": tx.from_account_id,
@@ -153,7 +344,59 @@ class TransactionService:
                     "description": description
                 })
 
-            return result
+            return {"transactions": result, "next_cursor": next_cursor}
         except Exception as e:
             bank_logger.error(f"Failed to get transaction history: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def decrypt_descriptions(self, account_id: int, transaction_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        按需解密交易描述
+        :param account_id: 账户ID，只解密与该账户相关的交易
+        :param transaction_ids: 需要解密描述的交易ID
+        :return: {交易ID: 描述明文}，不属于该账户或没有描述的交易不返回
+        """
+        try:
+            transaction_ids = list(dict.fromkeys(transaction_ids))
+            if len(transaction_ids) > MAX_DECRYPT_BATCH:
+                raise ValidationError(f"At most {MAX_DECRYPT_BATCH} descriptions per request")
+            if not transaction_ids:
+                return {}
+
+            rows = [row for row in self.transaction_repository.get_account_descriptions(account_id, transaction_ids)
+                    if row.description]
+            descriptions = await self._decrypt_descriptions([row.description for row in rows])
+            return {row.transaction_id: description for row, description in zip(rows, descriptions)}
+        except Exception as e:
+            bank_logger.error(f"Failed to decrypt transaction descriptions: {str(e)}")
+            raise
+
+    async def _decrypt_descriptions(self, encrypted: List[Optional[str]]) -> List[Optional[str]]:
+        """在线程池中批量解密，无法解密的描述返回 "[Encrypted]"，空描述保持None"""
+        values = [value for value in encrypted if value]
+        if not values:
+            return list(encrypted)
+
+        decrypted = iter(await run_in_threadpool(self.encryption_service.decrypt_many, values))
+        result = []
+        for value in encrypted:
+            if not value:
+                result.append(None)
+                continue
+            plain = next(decrypted)
+            result.append(plain if plain is not None else "[Encrypted]")
+        return result
+
+    @staticmethod
+    def _encode_cursor(transaction) -> str:
+        """将 (created_at, transaction_id) 编码为不透明游标"""
+        raw = f"{transaction.created_at.isoformat()}|{transaction.transaction_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            created_at, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(transaction_id)
+        except Exception:
+            raise ValidationError("Invalid cursor")
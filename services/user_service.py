@@ -39,7 +39,7 @@ class UserService:
                 raise ValidationError("Email already exists")
 
             # 密码哈希
-            password_hash = self.security_utils.hash_password(password)
+            password_hash = await self.security_utils.hash_password_async(password)
             # 加密邮箱
             encrypted_email = self.encryption_service.encrypt_data(email)
 
@@ -129,7 +129,7 @@ class UserService:
 
             # 如果更新密码，需要哈希
             if 'password' in update_data:
-                update_data['password_hash'] = self.security_utils.hash_password(update_data.pop('password'))
+                update_data['password_hash'] = await self.security_utils.hash_password_async(update_data.pop('password'))
 
             # 更新时间戳
             update_data['updated_at'] = datetime.utcnow()
@@ -167,11 +167,11 @@ class UserService:
                 raise ValidationError("User not found")
 
             # 验证旧密码
-            if not self.security_utils.verify_password(old_password, user.password_hash):
+            if not await self.security_utils.verify_password_async(old_password, user.password_hash):
                 raise AuthenticationError("Invalid old password")
 
             # 生成新密码哈希
-            new_password_hash = self.security_utils.hash_password(new_password)
+            new_password_hash = await self.security_utils.hash_password_async(new_password)
 
             # 更新密码
             success = self.user_repository.update(user_id, {
@@ -0,0 +1,27 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import init_db  # 注册全部模型
+from config.database import Base
+
+
+class SQLiteTestCase(unittest.TestCase):
+    """
+    使用临时 SQLite 数据库的测试基类
+    每个测试在临时目录中建库建表，提供 engine、session_factory 与一个会话 db，结束后删除
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.directory, 'bank.db')}")
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.db = self.session_factory()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,81 @@
+import unittest
+from dal.models.number_sequence import NumberSequence
+from services.account_number_service import SEQUENCE_NAME, AccountNumberAllocator
+from utils.exceptions import BankException, ValidationError
+from utils.validators import DataValidator, account_number_check_digit
+from sqlite_testcase import SQLiteTestCase
+
+
+class TestCheckDigit(unittest.TestCase):
+    def test_luhn_check_digit(self):
+        """测试Luhn校验位计算"""
+        self.assertEqual(account_number_check_digit("7992739871"), "3")
+        self.assertEqual(account_number_check_digit("0000000000"), "0")
+        self.assertEqual(account_number_check_digit("0000000001"), "8")
+
+    def test_validate_account_number(self):
+        self.assertTrue(DataValidator.validate_account_number("ACC79927398713"))
+        self.assertTrue(DataValidator.validate_account_number("NB79927398713", prefix="NB"))
+        for account_number in ("ACC79927398710", "ACC79927398731"):
+            with self.assertRaisesRegex(ValidationError, "check digit"):
+                DataValidator.validate_account_number(account_number)
+        for account_number in (None, "", "ACC", "ACC1", "XYZ79927398713", "ACC7992739871X"):
+            with self.assertRaisesRegex(ValidationError, "format"):
+                DataValidator.validate_account_number(account_number)
+
+
+class TestAccountNumberAllocator(SQLiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.leases = 0
+
+    def _allocator(self, block_size: int = 3, digits: int = 10) -> AccountNumberAllocator:
+        def session_factory():
+            self.leases += 1
+            return self.session_factory()
+        return AccountNumberAllocator(session_factory, block_size=block_size, digits=digits)
+
+    def _next_value(self) -> int:
+        db = self.session_factory()
+        try:
+            return db.query(NumberSequence).filter(NumberSequence.name == SEQUENCE_NAME).one().next_value
+        finally:
+            db.close()
+
+    def test_numbers_issued_from_leased_blocks(self):
+        """测试号码在租用的号段内逐个发放，号段用完才再次租用"""
+        allocator = self._allocator(block_size=3)
+        numbers = [allocator.next_number() for _ in range(4)]
+        self.assertEqual([number[3:-1] for number in numbers],
+                         ["0000000001", "0000000002", "0000000003", "0000000004"])
+        self.assertTrue(all(DataValidator.validate_account_number(number) for number in numbers))
+        self.assertEqual(self.leases, 2)
+        self.assertEqual(self._next_value(), 7)
+
+    def test_allocators_get_disjoint_blocks(self):
+        """测试两个分配器（模拟两个工作进程）的号段互不重叠"""
+        first, second = self._allocator(block_size=2), self._allocator(block_size=2)
+        numbers = [first.next_number(), second.next_number(), first.next_number(),
+                   second.next_number(), first.next_number()]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual([number[3:-1] for number in numbers],
+                         ["0000000001", "0000000003", "0000000002", "0000000004", "0000000005"])
+
+    def test_bulk_allocation_leases_remaining_count(self):
+        """测试批量分配先用完当前号段，再一次租足剩余数量"""
+        allocator = self._allocator(block_size=3)
+        allocator.next_number()
+        numbers = allocator.next_numbers(10)
+        self.assertEqual([int(number[3:-1]) for number in numbers], list(range(2, 12)))
+        self.assertEqual(self.leases, 2)
+        self.assertEqual(self._next_value(), 12)
+
+    def test_sequence_exhausted(self):
+        allocator = self._allocator(block_size=5, digits=1)
+        allocator.next_numbers(5)
+        with self.assertRaises(BankException):
+            allocator.next_numbers(5)
+
+
+if __name__ == '__main__':
+    unittest.main()
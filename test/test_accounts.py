@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+from decimal import Decimal
+from unittest import mock
+from fastapi import HTTPException
+from dal.models.account import Account
+from dal.models.role import Role
+from dal.models.user import User
+from dal.models.user_role import UserRole
+from dal.repositories.account_repository import AccountRepository
+from api.v1.accounts import (AccountCreate, BulkAccountCreate, DepositRequest, create_account,
+                             create_accounts_bulk, deposit)
+from security.token_cache import RolePrincipal, UserPrincipal
+from services.account_number_service import AccountNumberAllocator
+from services.account_service import AccountService
+from utils.cache import role_cache, user_accounts_cache
+from utils.validators import DataValidator
+from sqlite_testcase import SQLiteTestCase
+
+
+class AccountTestCase(SQLiteTestCase):
+    """
+    开户测试基类：用户 1、2 为普通客户，用户 3 为银行员工
+    账户号码从临时数据库的序列表分配，角色与账户集合缓存在每个测试前后清空
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.db.add_all([Role(role_id=1, role_name="customer"), Role(role_id=2, role_name="bank_staff")])
+        self.db.add_all([
+            User(user_id=i, username=f"user{i}", password_hash="x", email=f"user{i}@example.com")
+            for i in (1, 2, 3)
+        ])
+        self.db.add_all([UserRole(user_id=1, role_id=1), UserRole(user_id=2, role_id=1),
+                         UserRole(user_id=3, role_id=2)])
+        self.db.commit()
+
+        self.allocator = AccountNumberAllocator(self.session_factory, block_size=2)
+        patcher = mock.patch("services.account_service.account_number_allocator", self.allocator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for cache in (role_cache, user_accounts_cache):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+    def _service(self) -> AccountService:
+        return AccountService(account_repository=AccountRepository(self.db), encryption_service=None)
+
+    @staticmethod
+    def _principal(user_id: int, role_name: str = "customer") -> UserPrincipal:
+        return UserPrincipal(user_id=user_id, username=f"user{user_id}", status="active",
+                             roles=(RolePrincipal(role_name),))
+
+    def _create_bulk(self, current_user: UserPrincipal, user_id: int, account_types: list) -> list:
+        return asyncio.run(create_accounts_bulk(
+            request=BulkAccountCreate(user_id=user_id, account_types=account_types),
+            account_service=self._service(), db=self.db, current_user=current_user))
+
+    def _create(self, current_user: UserPrincipal, user_id: int, account_type: str) -> dict:
+        return asyncio.run(create_account(
+            request=AccountCreate(user_id=user_id, account_type=account_type),
+            account_service=self._service(), db=self.db, current_user=current_user))
+
+    def _deposit(self, current_user: UserPrincipal, account_id: int) -> dict:
+        return asyncio.run(deposit(
+            account_id=account_id, request=DepositRequest(amount=Decimal("10.00")),
+            account_service=self._service(), db=self.db, current_user=current_user))
+
+    def _account_numbers(self) -> dict:
+        self.db.expire_all()
+        return {account.account_number: account.user_id for account in self.db.query(Account).all()}
+
+
+class TestBulkAccountCreate(AccountTestCase):
+    def test_create_accounts_in_one_batch(self):
+        """测试批量开户按请求顺序返回新账户，号码有效且互不重复"""
+        account_types = ["checking", "savings", "investment", "checking", "loan"]
+        accounts = self._create_bulk(self._principal(1), 1, account_types)
+
+        self.assertEqual([account["account_type"] for account in accounts], account_types)
+        self.assertTrue(all(account["status"] == "active" and account["balance"] == 0 for account in accounts))
+        numbers = [account["account_number"] for account in accounts]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertTrue(all(DataValidator.validate_account_number(number) for number in numbers))
+        self.assertEqual(self._account_numbers(), dict.fromkeys(numbers, 1))
+        self.assertEqual(AccountRepository(self.db).get_user_account_ids(1),
+                         [account["account_id"] for account in accounts])
+
+    def test_staff_can_create_for_other_user(self):
+        accounts = self._create_bulk(self._principal(3, "bank_staff"), 2, ["savings", "savings"])
+        self.assertEqual(set(self._account_numbers().values()), {2})
+        self.assertEqual(len(accounts), 2)
+
+    def test_customer_cannot_create_for_other_user(self):
+        """测试普通客户为其他用户批量开户返回 403，且不分配号码、不写入账户"""
+        with self.assertRaises(HTTPException) as context:
+            self._create_bulk(self._principal(1), 2, ["checking", "savings"])
+        self.assertEqual(context.exception.status_code, 403)
+        self.assertEqual(self._account_numbers(), {})
+        self.assertEqual(self.allocator._end, 0)
+
+    def test_invalid_batch_rejected(self):
+        for account_types in ([], ["checking", "current"]):
+            with self.assertRaises(HTTPException) as context:
+                self._create_bulk(self._principal(1), 1, account_types)
+            self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(self._account_numbers(), {})
+
+    def test_duplicate_account_number_rolls_back_batch(self):
+        """测试批量中出现重复的账户号码时整批回滚，不留下部分账户"""
+        existing = self._create_bulk(self._principal(1), 1, ["checking"])[0]["account_number"]
+        for numbers in (["ACC00000000990", "ACC00000000990"], ["ACC00000000990", existing]):
+            with mock.patch.object(self.allocator, "next_numbers", return_value=numbers):
+                with self.assertRaises(HTTPException) as context:
+                    self._create_bulk(self._principal(1), 1, ["savings", "savings"])
+            self.assertEqual(context.exception.status_code, 400)
+            self.assertEqual(self._account_numbers(), {existing: 1})
+
+        # 回滚后会话仍可继续开户
+        self.assertEqual(len(self._create_bulk(self._principal(1), 1, ["savings", "loan"])), 2)
+        self.assertEqual(len(self._account_numbers()), 3)
+
+
+class TestOwnershipAfterCreate(AccountTestCase):
+    def test_new_accounts_accessible_immediately(self):
+        """测试用户的账户集合已缓存时，单个开户与批量开户的新账户都能立即通过所有权检查"""
+        user = self._principal(1)
+        first = self._create_bulk(user, 1, ["checking"])[0]["account_id"]
+        self._deposit(user, first)
+        self.assertEqual(user_accounts_cache.get(1), frozenset({first}))
+
+        single = self._create(user, 1, "savings")["account_id"]
+        self.assertEqual(self._deposit(user, single)["balance"], 10.0)
+
+        batch = [account["account_id"] for account in self._create_bulk(user, 1, ["savings", "loan"])]
+        for account_id in batch:
+            self.assertEqual(self._deposit(user, account_id)["balance"], 10.0)
+        self.assertEqual(user_accounts_cache.get(1), frozenset([first, single, *batch]))
+
+    def test_other_users_new_account_still_forbidden(self):
+        self._deposit(self._principal(1), self._create(self._principal(1), 1, "checking")["account_id"])
+        other = self._create_bulk(self._principal(3, "bank_staff"), 2, ["checking"])[0]["account_id"]
+        with self.assertRaises(HTTPException) as context:
+            self._deposit(self._principal(1), other)
+        self.assertEqual(context.exception.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
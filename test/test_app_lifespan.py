@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from unittest import mock
+import api.main
+
+
+class TestLifespan(unittest.TestCase):
+    def _run(self, ledger_writer: bool) -> list:
+        components = mock.Mock()
+        sealer = components.sealer
+        patches = mock.patch.multiple(
+            "api.main",
+            key_container=components.key_container,
+            invalidation_bus=components.invalidation_bus,
+            session_store=components.session_store,
+            ledger_reconciler=components.ledger_reconciler,
+            balance_snapshot_job=components.balance_snapshot_job,
+            password_hasher=components.password_hasher,
+            get_ledger_writer=mock.Mock(return_value=sealer if ledger_writer else None),
+            close_blockchain=components.close_blockchain,
+            dispose_engines=components.dispose_engines,
+            CACHE={"bus_enabled": True},
+            BALANCE_SNAPSHOT={"enabled": True},
+        )
+
+        async def run():
+            async with api.main.lifespan(api.main.app):
+                components.serving()
+
+        with patches:
+            asyncio.run(run())
+        return [call[0] for call in components.method_calls]
+
+    def test_start_and_stop_order(self):
+        """测试后台组件按依赖顺序启动，按相反顺序停止，最后释放连接池"""
+        self.assertEqual(self._run(ledger_writer=True), [
+            "key_container.load",
+            "invalidation_bus.start",
+            "session_store.start",
+            "sealer.start",
+            "ledger_reconciler.start",
+            "balance_snapshot_job.start",
+            "serving",
+            "balance_snapshot_job.stop",
+            "ledger_reconciler.stop",
+            "close_blockchain",
+            "session_store.stop",
+            "invalidation_bus.stop",
+            "password_hasher.shutdown",
+            "dispose_engines",
+        ])
+
+    def test_worker_without_ledger_skips_sealer(self):
+        calls = self._run(ledger_writer=False)
+        self.assertNotIn("sealer.start", calls)
+        self.assertNotIn("ledger_reconciler.start", calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from dal.models.account import Account
+from dal.models.balance_snapshot import BalanceSnapshot
+from dal.models.transaction import Transaction
+from dal.repositories.account_repository import AccountRepository
+from dal.repositories.balance_snapshot_repository import BalanceSnapshotRepository
+from dal.repositories.transaction_repository import TransactionRepository
+from services.account_service import AccountService
+from services.balance_snapshot_service import BalanceSnapshotJob
+from sqlite_testcase import SQLiteTestCase
+
+DAY1, DAY2, DAY3 = datetime(2025, 3, 1), datetime(2025, 3, 2), datetime(2025, 3, 3)
+
+
+class BalanceSnapshotTestCase(SQLiteTestCase):
+    """余额快照测试基类：两个账户，交易由测试按需写入"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.add_all([
+            Account(account_id=i, user_id=1, account_type="checking",
+                    account_number=f"ACC{i:011d}", balance=Decimal("0.00"))
+            for i in (1, 2)
+        ])
+        self.db.commit()
+        self.job = BalanceSnapshotJob(self.session_factory, settle_seconds=0)
+
+    def _add(self, transaction_id: int, created_at: datetime, from_account_id, to_account_id,
+             amount: str, status: str = "completed") -> None:
+        self.db.add(Transaction(transaction_id=transaction_id, from_account_id=from_account_id,
+                                to_account_id=to_account_id, amount=Decimal(amount),
+                                transaction_type="transfer" if from_account_id else "deposit",
+                                status=status, created_at=created_at))
+        self.db.commit()
+
+    def _balance_at(self, account_id: int, ts: datetime) -> Decimal:
+        self.db.expire_all()
+        service = AccountService(AccountRepository(self.db), None, TransactionRepository(self.db),
+                                 BalanceSnapshotRepository(self.db))
+        return asyncio.run(service.get_balance_at(account_id, ts))
+
+    def _snapshots(self) -> dict:
+        self.db.expire_all()
+        return {(snapshot.account_id, snapshot.snapshot_date): snapshot.balance
+                for snapshot in self.db.query(BalanceSnapshot).all()}
+
+
+class TestBalanceSnapshotJob(BalanceSnapshotTestCase):
+    def test_daily_snapshots_and_checkpoint(self):
+        """测试按 (账户, 日期) 累加日终余额并推进检查点，未完成的交易不计入余额"""
+        self._add(1, DAY1 + timedelta(hours=10), None, 1, "100")
+        self._add(2, DAY2 + timedelta(hours=9), 1, 2, "30")
+        self._add(3, DAY2 + timedelta(hours=11), 1, 2, "500", status="failed")
+
+        self.assertEqual(self.job.run_once(), 3)
+        self.assertEqual(self._snapshots(), {
+            (1, DAY1.date()): Decimal("100.00"),
+            (1, DAY2.date()): Decimal("70.00"),
+            (2, DAY2.date()): Decimal("30.00"),
+        })
+        self.assertEqual(BalanceSnapshotRepository(self.db).get_checkpoint(), 3)
+        self.assertEqual(self.job.run_once(), 0)
+
+    def test_unsettled_transactions_wait(self):
+        """测试创建时间在稳定期内的交易及其后的交易留待下次处理"""
+        self._add(1, DAY1, None, 1, "100")
+        self._add(2, datetime.utcnow(), None, 1, "50")
+        self._add(3, DAY2, None, 1, "10")
+
+        job = BalanceSnapshotJob(self.session_factory, settle_seconds=3600)
+        self.assertEqual(job.run_once(), 1)
+        self.assertEqual(BalanceSnapshotRepository(self.db).get_checkpoint(), 1)
+
+    def test_late_transaction_behind_checkpoint(self):
+        """测试检查点之后处理的交易时间早于已有快照时，补建当日快照并累加到之后的快照"""
+        self._add(1, DAY1 + timedelta(hours=10), None, 1, "100")
+        self._add(2, DAY3 + timedelta(hours=10), 1, 2, "40")
+        self.job.run_once()
+
+        # 提交较晚、创建时间落在已生成快照之前的交易
+        self._add(3, DAY2 + timedelta(hours=10), 1, 2, "10")
+        self.assertEqual(self._balance_at(1, DAY2 + timedelta(hours=12)), Decimal("90.00"))
+        self.assertEqual(self._balance_at(1, DAY3 + timedelta(hours=12)), Decimal("50.00"))
+
+        self.assertEqual(self.job.run_once(), 1)
+        self.assertEqual(self._snapshots(), {
+            (1, DAY1.date()): Decimal("100.00"),
+            (1, DAY2.date()): Decimal("90.00"),
+            (1, DAY3.date()): Decimal("50.00"),
+            (2, DAY2.date()): Decimal("10.00"),
+            (2, DAY3.date()): Decimal("50.00"),
+        })
+        self.assertEqual(self._balance_at(1, DAY2 + timedelta(hours=12)), Decimal("90.00"))
+        self.assertEqual(self._balance_at(1, DAY3 + timedelta(hours=12)), Decimal("50.00"))
+        self.assertEqual(self._balance_at(2, DAY3 + timedelta(hours=12)), Decimal("50.00"))
+
+
+class TestBalanceAt(BalanceSnapshotTestCase):
+    def test_replay_after_last_snapshot(self):
+        """测试以之前最近的快照为基础，重放当日及检查点之后尚未计入快照的交易"""
+        self._add(1, DAY1 + timedelta(hours=10), None, 1, "100")
+        self._add(2, DAY2 + timedelta(hours=9), 1, 2, "30")
+        self.job.run_once()
+        self._add(3, DAY2 + timedelta(hours=15), 2, 1, "5")
+        self._add(4, DAY3 + timedelta(hours=8), 1, 2, "20")
+
+        expected = {
+            DAY2 + timedelta(hours=12): Decimal("70.00"),
+            DAY2 + timedelta(hours=16): Decimal("75.00"),
+            DAY3 + timedelta(hours=7): Decimal("75.00"),
+            DAY3 + timedelta(hours=9): Decimal("55.00"),
+        }
+        for ts, balance in expected.items():
+            self.assertEqual(self._balance_at(1, ts), balance)
+
+        # 快照任务追上后结果不变
+        self.job.run_once()
+        for ts, balance in expected.items():
+            self.assertEqual(self._balance_at(1, ts), balance)
+
+    def test_before_first_snapshot(self):
+        """测试查询时刻早于第一条快照时，从零开始只重放当日交易"""
+        self._add(1, DAY2 + timedelta(hours=10), None, 1, "100")
+        self._add(2, DAY2 + timedelta(hours=14), 1, 2, "30")
+        self._add(3, DAY3 + timedelta(hours=10), 1, 2, "20")
+        self.job.run_once()
+
+        self.assertEqual(self._balance_at(1, DAY1 + timedelta(hours=12)), Decimal("0"))
+        self.assertEqual(self._balance_at(1, DAY2 + timedelta(hours=10)), Decimal("100.00"))
+        self.assertEqual(self._balance_at(1, DAY2 + timedelta(hours=12)), Decimal("100.00"))
+        self.assertEqual(self._balance_at(1, DAY2 + timedelta(hours=15)), Decimal("70.00"))
+        self.assertEqual(self._snapshots()[(1, date(2025, 3, 2))], Decimal("70.00"))
+
+
+if __name__ == '__main__':
+    unittest.main()
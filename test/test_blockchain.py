@@ -0,0 +1,395 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from security.block_store import BlockStore
+from security.blockchain import Block, Blockchain, BlockSealer, MerkleTree, MiningEngine
+from security.ledger_index import LedgerIndex
+from utils.exceptions import LedgerLockedError, TransactionError
+
+
+class TestBlockSealer(unittest.TestCase):
+    def setUp(self):
+        """测试开始前创建独立的区块链实例"""
+        self.blockchain = Blockchain(difficulty=1)
+
+    def _tx(self, transaction_id: int) -> dict:
+        return {
+            "transaction_id": transaction_id,
+            "from_account_id": 1,
+            "to_account_id": 2,
+            "amount": 10.0,
+            "type": "transfer",
+            "signature": "sig"
+        }
+
+    def test_batch_sealed_into_single_block(self):
+        """测试达到数量阈值时多笔交易封装为一个区块"""
+        sealer = BlockSealer(self.blockchain, batch_size=5, batch_interval_ms=1000)
+        for i in range(5):
+            sealer.reserve()
+            sealer.submit(self._tx(i))
+
+        deadline = time.time() + 5
+        while len(self.blockchain.chain) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        sealer.stop(timeout=2)
+
+        self.assertEqual(len(self.blockchain.chain), 2)
+        self.assertEqual(len(self.blockchain.chain[1].transactions), 5)
+        self.assertTrue(self.blockchain.is_chain_valid())
+
+    def test_stop_flushes_pending(self):
+        """测试停止封装器时剩余交易会被封装"""
+        sealer = BlockSealer(self.blockchain, batch_size=100, batch_interval_ms=60000)
+        sealer.reserve(2)
+        sealer.submit(self._tx(1))
+        sealer.submit(self._tx(2))
+        sealer.stop(timeout=2)
+
+        sealed = [tx["transaction_id"] for block in self.blockchain.chain[1:] for tx in block.transactions]
+        self.assertEqual(sorted(sealed), [1, 2])
+        self.assertEqual(sealer.pending_count(), 0)
+
+    def test_submitted_batch_sealed_as_own_block(self):
+        """测试整批提交的交易单独成块，之前排队的交易先封装"""
+        sealer = BlockSealer(self.blockchain, batch_size=100, batch_interval_ms=60000)
+        sealer.reserve(4)
+        sealer.submit(self._tx(1))
+        sealer.submit_batch([self._tx(2), self._tx(3)])
+        sealer.submit(self._tx(4))
+        sealer.stop(timeout=2)
+
+        blocks = [[tx["transaction_id"] for tx in block.transactions] for block in self.blockchain.chain[1:]]
+        self.assertEqual(blocks, [[1], [2, 3], [4]])
+        self.assertEqual(sealer.pending_count(), 0)
+
+    def test_failed_seal_logged_and_retried(self):
+        """测试封装失败时记录错误并在退避后重试，交易不丢失"""
+        sealer = BlockSealer(self.blockchain, batch_size=1, batch_interval_ms=10)
+        sealer._RETRY_BACKOFF = 0.05
+        seal_block = self.blockchain.seal_block
+        failures = [OSError("disk full")]
+
+        def flaky_seal(batch):
+            if failures:
+                raise failures.pop()
+            return seal_block(batch)
+
+        with mock.patch.object(self.blockchain, "seal_block", side_effect=flaky_seal), \
+                self.assertLogs("bank", level="ERROR") as logs:
+            sealer.reserve()
+            sealer.submit(self._tx(1))
+            deadline = time.time() + 5
+            while len(self.blockchain.chain) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            sealer.stop(timeout=2)
+
+        self.assertIn("disk full", logs.output[0])
+        self.assertEqual([tx["transaction_id"] for tx in self.blockchain.chain[1].transactions], [1])
+        self.assertEqual(self.blockchain.pending_transactions, [])
+
+    def test_back_pressure_when_queue_full(self):
+        """测试队列已满时预留容量被拒绝，取出交易后容量归还"""
+        sealer = BlockSealer(self.blockchain, batch_size=1, batch_interval_ms=10,
+                             max_pending=1, submit_timeout=0.05)
+        with self.blockchain._seal_lock:
+            sealer.reserve()
+            sealer.submit(self._tx(1))
+            time.sleep(0.2)
+            sealer.reserve()
+            sealer.submit(self._tx(2))
+            with self.assertRaises(TransactionError):
+                sealer.reserve()
+        sealer.stop(timeout=2)
+        sealer.reserve()
+        sealer.release()
+
+    def test_released_reservation_frees_capacity(self):
+        """测试事务回滚后归还的容量可以再次预留"""
+        sealer = BlockSealer(self.blockchain, max_pending=2, submit_timeout=0.05)
+        sealer.reserve(2)
+        with self.assertRaises(TransactionError):
+            sealer.reserve()
+        sealer.release(2)
+        sealer.reserve(2)
+        with self.assertRaises(TransactionError):
+            sealer.reserve(3)
+        sealer.stop(timeout=2)
+
+
+class TestMiningEngine(unittest.TestCase):
+    def _block(self) -> Block:
+        transactions = [
+            {"transaction_id": i, "from_account_id": 1, "to_account_id": 2,
+             "amount": 10.5, "type": "transfer", "signature": "签名"}
+            for i in range(20)
+        ]
+        return Block(3, 1700000000.123456, transactions, "ab" * 32)
+
+    def test_hash_matches_calculate_hash(self):
+        """测试增量哈希与完整序列化哈希一致"""
+        block = self._block()
+        engine = MiningEngine(block)
+        for nonce in (0, 1, 42, 123456):
+            block.nonce = nonce
+            self.assertEqual(engine.hash_with_nonce(nonce), block.calculate_hash())
+
+    def test_mined_block_verifies(self):
+        """测试挖出的区块可通过 calculate_hash 验证"""
+        block = self._block()
+        block.mine_block(2)
+        self.assertTrue(block.hash.startswith("00"))
+        self.assertEqual(block.hash, block.calculate_hash())
+
+
+class TestMerkleProof(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain(difficulty=1)
+        self.transactions = [
+            {"transaction_id": i, "from_account_id": 1, "to_account_id": 2, "amount": float(i)}
+            for i in range(1, 8)
+        ]
+        self.blockchain.seal_block(self.transactions)
+
+    def test_proof_verifies_for_every_transaction(self):
+        """测试每笔交易的包含证明都能通过验证"""
+        for tx in self.transactions:
+            result = self.blockchain.get_transaction_proof(tx["transaction_id"])
+            self.assertTrue(result["transaction_found"])
+            self.assertTrue(MerkleTree.verify_proof(
+                result["transaction"], result["proof"], result["block_header"]["merkle_root"]))
+            self.assertTrue(self.blockchain.verify_transaction(tx["transaction_id"])["is_valid"])
+
+    def test_tampered_transaction_detected(self):
+        """测试篡改交易后验证失败"""
+        self.blockchain.chain[1].transactions[3]["amount"] = 9999.0
+        self.assertFalse(self.blockchain.verify_transaction(4)["is_valid"])
+        self.assertTrue(self.blockchain.verify_transaction(5)["is_valid"])
+        self.assertFalse(self.blockchain.is_chain_valid())
+
+    def test_missing_transaction(self):
+        self.assertFalse(self.blockchain.get_transaction_proof(404)["transaction_found"])
+
+
+class TestBlockchainIndexes(unittest.TestCase):
+    def test_history_and_lookup_use_indexes(self):
+        """测试按账户查询历史与按交易ID定位"""
+        blockchain = Blockchain(difficulty=1)
+        blockchain.seal_block([
+            {"transaction_id": 1, "from_account_id": 10, "to_account_id": 20, "amount": 1.0},
+            {"transaction_id": 2, "from_account_id": 20, "to_account_id": 30, "amount": 2.0},
+        ])
+        blockchain.seal_block([
+            {"transaction_id": 3, "from_account_id": 30, "to_account_id": 10, "amount": 3.0},
+        ])
+
+        history = blockchain.get_transaction_history(10)
+        self.assertEqual([tx["transaction_id"] for tx in history], [1, 3])
+        self.assertEqual(history[1]["block_index"], 2)
+        self.assertEqual(blockchain.get_transaction_history(99), [])
+        self.assertEqual(len(blockchain.get_transaction_history()), 4)
+
+        result = blockchain.verify_transaction(2)
+        self.assertTrue(result["transaction_found"])
+        self.assertEqual(result["block_index"], 1)
+
+    def test_block_pagination(self):
+        """测试按区块索引分页与逐块生成"""
+        blockchain = Blockchain(difficulty=1)
+        for i in range(1, 5):
+            blockchain.seal_block([{"transaction_id": i}])
+
+        page = blockchain.get_blocks(1, 2)
+        self.assertEqual([block["index"] for block in page], [1, 2])
+        self.assertIn("time", page[0])
+        self.assertEqual([block["index"] for block in blockchain.iter_blocks(3)], [3, 4])
+        self.assertEqual(blockchain.get_blocks(10, 2), [])
+
+
+class TestBlockStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _open(self) -> Blockchain:
+        return Blockchain(difficulty=1, store=BlockStore(self.directory, segment_size=512, fsync=False))
+
+    def test_reopen_restores_chain(self):
+        """测试重新打开后区块链与索引完整恢复"""
+        blockchain = self._open()
+        for i in range(1, 6):
+            blockchain.seal_block([{"transaction_id": i, "from_account_id": 1, "to_account_id": 2}])
+        hashes = [block.hash for block in blockchain.chain]
+        blockchain.close()
+
+        reopened = self._open()
+        self.assertEqual([block.hash for block in reopened.chain], hashes)
+        self.assertTrue(reopened.is_chain_valid())
+        self.assertEqual(reopened.verify_transaction(3)["block_index"], 3)
+        self.assertEqual(len(reopened.get_transaction_history(1)), 5)
+
+        reopened.seal_block([{"transaction_id": 6, "from_account_id": 1, "to_account_id": 2}])
+        self.assertEqual(reopened.get_latest_block().previous_hash, hashes[-1])
+        self.assertTrue(reopened.verify_transaction(6)["is_valid"])
+        self.assertGreater(len([f for f in os.listdir(self.directory) if f.startswith("segment_")]), 1)
+        reopened.close()
+
+    def test_recovers_from_torn_write(self):
+        """测试崩溃遗留的不完整写入在打开时被丢弃"""
+        blockchain = self._open()
+        blockchain.seal_block([{"transaction_id": 1}])
+        blockchain.close()
+
+        store = BlockStore(self.directory, fsync=False)
+        segment = os.path.join(self.directory, BlockStore.SEGMENT_FILE.format(store._active_segment))
+        store.close()
+        with open(segment, "ab") as f:
+            f.write(b"\x00\x00\x01\x00partial")
+        with open(os.path.join(self.directory, BlockStore.INDEX_FILE), "ab") as f:
+            f.write(b"\x00\x00")
+
+        reopened = self._open()
+        self.assertEqual(len(reopened.chain), 2)
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.seal_block([{"transaction_id": 2}])
+        reopened.close()
+
+        final = self._open()
+        self.assertTrue(final.verify_transaction(2)["is_valid"])
+        final.close()
+
+    def test_directory_locked_while_open(self):
+        """测试存储目录已被打开时再次打开立即失败，关闭后可重新打开"""
+        store = BlockStore(self.directory, fsync=False)
+        with self.assertRaises(TransactionError):
+            BlockStore(self.directory, fsync=False)
+        store.close()
+        BlockStore(self.directory, fsync=False).close()
+
+    def test_other_workers_run_without_sealer(self):
+        """测试存储已被写入进程持有时，本进程不封装区块而不是启动失败"""
+        import security.blockchain as ledger
+        with mock.patch.dict(ledger.BLOCKCHAIN, {"persistent": True, "storage_dir": self.directory, "fsync": False}):
+            writer = BlockStore(self.directory, fsync=False)
+            try:
+                self.assertIsNone(ledger.get_ledger_writer())
+                with self.assertRaises(LedgerLockedError):
+                    ledger.get_blockchain()
+            finally:
+                writer.close()
+                ledger.close_blockchain()
+
+            # 写入进程退出后重新打开即成为写入进程
+            try:
+                self.assertIsNotNone(ledger.get_ledger_writer())
+            finally:
+                ledger.close_blockchain()
+
+    def test_import_does_not_open_ledger(self):
+        """测试导入模块不会打开全局账本"""
+        import security.blockchain
+        self.assertIsNone(security.blockchain._blockchain)
+
+    def test_reopen_loads_persisted_index(self):
+        """测试重新打开时从索引文件加载交易索引，不解码已索引的区块"""
+        blockchain = self._open()
+        for i in range(1, 4):
+            blockchain.seal_block([{"transaction_id": i, "from_account_id": 1, "to_account_id": 2}])
+        blockchain.close()
+
+        # 模拟最后一个区块的索引条目只写了一半
+        index_path = os.path.join(self.directory, LedgerIndex.INDEX_FILE)
+        with open(index_path, "r+b") as f:
+            f.truncate(os.path.getsize(index_path) - LedgerIndex.ENTRY.size - 3)
+
+        decoded = []
+        read = BlockStore.read
+        BlockStore.read = lambda store, index: decoded.append(index) or read(store, index)
+        try:
+            reopened = self._open()
+        finally:
+            BlockStore.read = read
+        self.assertEqual(decoded, [3])
+        self.assertEqual(reopened.index.find_transaction(2), (2, 0))
+        self.assertEqual(reopened.index.find_transaction(3), (3, 0))
+        self.assertEqual(len(reopened.index.account_locations(1)), 3)
+        reopened.close()
+
+        final = self._open()
+        self.assertEqual(len(final.get_transaction_history(2)), 3)
+        final.close()
+
+
+class TestChainValidator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.blockchain = Blockchain(difficulty=1, store=BlockStore(self.directory, fsync=False),
+                                     validation_workers=2, validation_chunk_size=2)
+        for i in range(1, 8):
+            self.blockchain.seal_block([{"transaction_id": i, "from_account_id": 1, "to_account_id": 2}])
+
+    def tearDown(self):
+        self.blockchain.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_parallel_and_incremental_validation(self):
+        """测试并行校验与基于检查点的增量校验"""
+        result = self.blockchain.validate_chain()
+        self.assertTrue(result["is_valid"])
+        self.assertEqual(result["checked_blocks"], 7)
+
+        self.blockchain.seal_block([{"transaction_id": 8}])
+        result = self.blockchain.validate_chain()
+        self.assertTrue(result["is_valid"])
+        self.assertEqual(result["checked_blocks"], 1)
+        self.assertEqual(self.blockchain.validator.checkpoint["height"], 8)
+
+        self.assertEqual(self.blockchain.validate_chain()["checked_blocks"], 0)
+        self.assertEqual(self.blockchain.validate_chain(full=True)["checked_blocks"], 8)
+
+    def test_full_validation_detects_tampering(self):
+        """测试完整校验发现检查点之前的篡改（工作进程直接读取被篡改的分段文件）"""
+        self.blockchain.validate_chain()
+        store = self.blockchain.chain.store
+        segment, start, end = store.locate(3)
+        with open(store.segment_path(segment), "r+b") as f:
+            f.seek(start)
+            data = f.read(end - start)
+            f.seek(start)
+            f.write(data.replace(b'"to_account_id":2', b'"to_account_id":7'))
+
+        self.assertTrue(self.blockchain.validate_chain()["is_valid"])
+        result = self.blockchain.validate_chain(full=True)
+        self.assertFalse(result["is_valid"])
+        self.assertEqual(result["invalid_block"], 3)
+
+    def test_segment_ranges_follow_chunks_and_segments(self):
+        """测试校验任务按 chunk_size 切分且不跨分段文件"""
+        store = self.blockchain.chain.store
+        ranges = self.blockchain.validator._segment_ranges(store, 1, 7)
+        self.assertEqual(len(ranges), 4)
+        records = [record for task in ranges for record in BlockStore.read_range(*task)]
+        self.assertEqual([record["index"] for record in records], list(range(1, 8)))
+
+    def test_worker_module_has_no_side_effect_imports(self):
+        """测试校验工作进程导入的模块不会加载日志、配置等有副作用的模块"""
+        code = ("import sys, security.chain_check; "
+                "print(' '.join(m for m in sys.modules if m.split('.')[0] in ('utils', 'config', 'dal')))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.stdout.strip(), "")
+
+    def test_workers_not_forked(self):
+        executor = self.blockchain.validator._get_executor()
+        self.assertEqual(executor._mp_context.get_start_method(), "spawn")
+
+
+if __name__ == '__main__':
+    unittest.main()
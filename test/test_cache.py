@@ -0,0 +1,179 @@
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from security.security_utils import SecurityUtils
+from security.token_cache import RolePrincipal, TokenCache, UserPrincipal
+from utils.cache import TTLCache
+from utils.cache_bus import InvalidationBus
+from utils.exceptions import SecurityError
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction_and_hit_rate(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = TTLCache("test", ttl=60, max_entries=2)
+        cache.put(1, "a")
+        cache.put(2, "b")
+        self.assertEqual(cache.get(1), "a")
+        cache.put(3, "c")
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), "a")
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["hit_rate"], round(2 / 3, 4))
+
+    def test_expiry(self):
+        cache = TTLCache("test", ttl=0.05, max_entries=10)
+        cache.put(1, "a")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_invalidation_during_load_skips_store(self):
+        """测试加载期间发生失效时不缓存旧值"""
+        cache = TTLCache("test", ttl=60, max_entries=10)
+
+        def loader():
+            cache.invalidate(1)
+            return "stale"
+
+        self.assertEqual(cache.get_or_load(1, loader), "stale")
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get_or_load(1, lambda: "fresh"), "fresh")
+        self.assertEqual(cache.get(1), "fresh")
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TokenCache(max_entries=10, max_ttl=60)
+        self.principal = UserPrincipal(user_id=1, username="alice", status="active",
+                                       roles=(RolePrincipal("customer"),))
+
+    def _put(self, token: str, exp_in: float, user_id: int = 1, generation: int = None) -> dict:
+        claims = {"sub": str(user_id), "exp": time.time() + exp_in}
+        principal = self.principal._replace(user_id=user_id)
+        self.cache.put(token, claims, principal,
+                       self.cache.generation(user_id) if generation is None else generation)
+        return claims
+
+    def test_generation_bump_invalidates_user_entries(self):
+        """测试提升用户代号后该用户之前缓存的令牌全部作废，其他用户不受影响"""
+        claims = self._put("token-a", 30)
+        self._put("token-b", 30)
+        self._put("token-c", 30, user_id=2)
+        self.assertEqual(self.cache.get("token-a"), (claims, self.principal))
+
+        self.cache.invalidate_users([1])
+        self.assertIsNone(self.cache.get("token-a"))
+        self.assertIsNone(self.cache.get("token-b"))
+        self.assertIsNotNone(self.cache.get("token-c"))
+
+        self._put("token-a", 30)
+        self.assertIsNotNone(self.cache.get("token-a"))
+
+    def test_entry_loaded_before_invalidation_ignored(self):
+        """测试加载用户期间发生失效时，按旧代号写入的条目不会被返回"""
+        generation = self.cache.generation(1)
+        self.cache.invalidate_users([1])
+        self._put("token-a", 30, generation=generation)
+        self.assertIsNone(self.cache.get("token-a"))
+
+    def test_entries_not_served_past_exp(self):
+        """测试条目不会在令牌 exp 之后返回，已过期的令牌不缓存"""
+        self._put("token-a", 0.05)
+        self.assertIsNotNone(self.cache.get("token-a"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("token-a"))
+
+        self._put("token-b", -1)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_invalidate_digest(self):
+        self._put("token-a", 30)
+        self._put("token-b", 30)
+        self.cache.invalidate_digests([SecurityUtils.token_digest("token-a")])
+        self.assertIsNone(self.cache.get("token-a"))
+        self.assertIsNotNone(self.cache.get("token-b"))
+
+
+class TestInvalidationBus(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.buses = [InvalidationBus(self.directory, name=f"worker{i}") for i in range(2)]
+        self.caches = [TTLCache("test", ttl=60, max_entries=10) for _ in self.buses]
+        for bus, cache in zip(self.buses, self.caches):
+            bus.subscribe("accounts", cache.invalidate_many)
+            bus.start()
+
+    def tearDown(self):
+        for bus in self.buses:
+            bus.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_publish_reaches_other_workers(self):
+        """测试一个工作进程发布的失效事件到达其他工作进程的缓存"""
+        for cache in self.caches:
+            cache.put(1, "a")
+            cache.put(2, "b")
+
+        self.buses[0].publish("accounts", [1])
+        self.buses[0].publish("users", [2])
+
+        deadline = time.time() + 2
+        while self.caches[1].get(1) is not None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(self.caches[0].get(1))
+        self.assertIsNone(self.caches[1].get(1))
+        self.assertEqual(self.caches[1].get(2), "b")
+
+    def test_stale_socket_removed(self):
+        """测试已退出进程遗留的套接字文件在广播时被清理"""
+        self.buses[1].stop()
+        open(self.buses[1]._socket_path, "w").close()
+        self.buses[0].publish("accounts", [1])
+        self.assertEqual(sorted(os.listdir(self.directory)), ["worker0.sock"])
+
+
+class TestInvalidationBusSocketDir(unittest.TestCase):
+    def setUp(self):
+        self.parent = tempfile.mkdtemp()
+        self.directory = os.path.join(self.parent, "bus")
+
+    def tearDown(self):
+        shutil.rmtree(self.parent, ignore_errors=True)
+
+    def _start(self) -> InvalidationBus:
+        bus = InvalidationBus(self.directory, name="worker")
+        bus.start()
+        bus.stop()
+        return bus
+
+    def test_directory_created_private(self):
+        """测试套接字目录创建为仅当前用户可访问"""
+        self._start()
+        self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+    def test_open_directory_permissions_tightened(self):
+        os.mkdir(self.directory)
+        os.chmod(self.directory, 0o777)
+        self._start()
+        self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+    def test_directory_owned_by_other_user_rejected(self):
+        """测试目录属于其他用户时拒绝启动"""
+        os.mkdir(self.directory)
+        try:
+            os.chown(self.directory, os.getuid() + 1, -1)
+        except PermissionError:
+            self.skipTest("changing directory owner requires root")
+        with self.assertRaises(SecurityError):
+            self._start()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import unittest
+from security.password_hasher import PasswordHasher
+from utils.exceptions import SecurityError
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(max_workers=1, rounds=4, max_pending=3)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.hasher.shutdown()
+
+    def _block(self) -> str:
+        self.release.wait(5)
+        return "done"
+
+    def test_hash_and_verify(self):
+        async def run():
+            hashed = await self.hasher.hash_password_async("secret")
+            return (await self.hasher.verify_password_async("secret", hashed),
+                    await self.hasher.verify_password_async("wrong", hashed))
+
+        self.assertEqual(asyncio.run(run()), (True, False))
+        stats = self.hasher.stats()
+        self.assertEqual((stats["queue_depth"], stats["running"], stats["completed"]), (0, 0, 3))
+
+    def test_cancelled_requests_leave_queue(self):
+        """测试排队中的请求被取消后归还排队计数，不会逐渐占满 max_pending"""
+        async def run():
+            blocking = asyncio.ensure_future(self.hasher._submit(self._block))
+            queued = [asyncio.ensure_future(self.hasher._submit(self._block)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.hasher.stats()["queue_depth"], 2)
+
+            for task in queued:
+                task.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            self.assertEqual(self.hasher.stats()["queue_depth"], 0)
+
+            self.release.set()
+            return await blocking
+
+        self.assertEqual(asyncio.run(run()), "done")
+        stats = self.hasher.stats()
+        self.assertEqual((stats["queue_depth"], stats["completed"]), (0, 1))
+
+    def test_rejects_when_queue_full(self):
+        async def run():
+            tasks = [asyncio.ensure_future(self.hasher._submit(self._block)) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            with self.assertRaises(SecurityError):
+                await self.hasher._submit(self._block)
+            self.release.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(asyncio.run(run()), ["done"] * 4)
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+    def test_submit_after_shutdown_releases_slot(self):
+        self.hasher.shutdown()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.hasher.hash_password_async("secret"))
+        self.assertEqual(self.hasher.stats()["queue_depth"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from fastapi import HTTPException
+from dal.models.account import Account
+from dal.models.role import Role
+from dal.models.user import User
+from dal.models.user_role import UserRole
+from dal.repositories.user_role_repository import UserRoleRepository
+from security.permission import has_role, owns_account
+from security.token_cache import RolePrincipal, UserPrincipal
+from utils.cache import role_cache, user_accounts_cache
+from sqlite_testcase import SQLiteTestCase
+
+
+@has_role(["bank_staff", "system_admin"])
+async def staff_endpoint(db=None, current_user=None):
+    return "ok"
+
+
+@owns_account
+async def account_endpoint(account_id: int, db=None, current_user=None):
+    return account_id
+
+
+class TestRoleCache(SQLiteTestCase):
+    """用户 1 为普通客户并拥有账户 1，用户 2 拥有账户 2"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.add_all([Role(role_id=1, role_name="customer"), Role(role_id=2, role_name="bank_staff")])
+        self.db.add_all([
+            User(user_id=i, username=f"user{i}", password_hash="x", email=f"user{i}@example.com")
+            for i in (1, 2)
+        ])
+        self.db.add_all([
+            Account(account_id=i, user_id=i, account_type="checking", account_number=f"ACC{i:011d}")
+            for i in (1, 2)
+        ])
+        self.db.add(UserRole(user_id=1, role_id=1))
+        self.db.commit()
+        for cache in (role_cache, user_accounts_cache):
+            cache.clear()
+            self.addCleanup(cache.clear)
+        self.user = UserPrincipal(user_id=1, username="user1", status="active",
+                                  roles=(RolePrincipal("customer"),))
+
+    def _call(self, endpoint, **kwargs):
+        try:
+            return asyncio.run(endpoint(db=self.db, current_user=self.user, **kwargs))
+        except HTTPException as e:
+            return e.status_code
+
+    def test_has_role_sees_granted_and_revoked_roles(self):
+        """测试角色缓存命中期间分配或移除角色后，下一次权限检查立即使用新角色"""
+        self.assertEqual(self._call(staff_endpoint), 403)
+        self.assertEqual(role_cache.get(1), frozenset({"customer"}))
+
+        UserRoleRepository(self.db).assign_role(1, 2)
+        self.assertEqual(self._call(staff_endpoint), "ok")
+        self.assertEqual(role_cache.get(1), frozenset({"customer", "bank_staff"}))
+
+        self.assertTrue(UserRoleRepository(self.db).remove_role(1, 2))
+        self.assertEqual(self._call(staff_endpoint), 403)
+
+    def test_owns_account_sees_granted_and_revoked_roles(self):
+        """测试账户所有权检查中的员工放行随角色变更立即生效"""
+        self.assertEqual(self._call(account_endpoint, account_id=1), 1)
+        self.assertEqual(self._call(account_endpoint, account_id=2), 403)
+
+        UserRoleRepository(self.db).assign_role(1, 2)
+        self.assertEqual(self._call(account_endpoint, account_id=2), 2)
+
+        UserRoleRepository(self.db).remove_role(1, 2)
+        self.assertEqual(self._call(account_endpoint, account_id=2), 403)
+
+    def test_role_change_of_other_user_keeps_cache(self):
+        self._call(staff_endpoint)
+        UserRoleRepository(self.db).assign_role(2, 2)
+        self.assertEqual(role_cache.get(1), frozenset({"customer"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
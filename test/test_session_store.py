@@ -0,0 +1,198 @@
+import os
+import time
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta
+from unittest import mock
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from dal.models.session import Session as UserSession
+from dal.repositories.base_repository import _apply_pending_invalidations, _discard_pending_invalidations
+from dal.repositories.session_repository import SessionRepository
+from security.session_store import SessionStore
+from utils.cache_bus import InvalidationBus, invalidation_bus
+from sqlite_testcase import SQLiteTestCase
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def wait_until(predicate, timeout: float = 2) -> bool:
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class SessionStoreTestCase(SQLiteTestCase):
+    """
+    会话存储测试基类
+    本进程使用全局失效总线（临时目录），另一个总线与会话存储模拟同一主机上的其他工作进程
+    """
+
+    def setUp(self):
+        super().setUp()
+        # 与 SessionLocal 相同：事务提交后广播失效事件
+        event.listen(self.session_factory, "after_commit", _apply_pending_invalidations)
+        event.listen(self.session_factory, "after_rollback", _discard_pending_invalidations)
+
+        bus_dir = os.path.join(self.directory, "bus")
+        for name, value in (("socket_dir", bus_dir), ("name", "worker0"), ("_handlers", defaultdict(list))):
+            patcher = mock.patch.object(invalidation_bus, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.peer_bus = InvalidationBus(bus_dir, name="worker1")
+
+        self.store = self._store(invalidation_bus)
+        self.peer = self._store(self.peer_bus)
+        invalidation_bus.start()
+        self.peer_bus.start()
+
+    def tearDown(self):
+        invalidation_bus.stop()
+        self.peer_bus.stop()
+        super().tearDown()
+
+    def _store(self, bus: InvalidationBus) -> SessionStore:
+        store = SessionStore(self.session_factory, batch_size=2)
+        bus.subscribe("sessions_created", store.on_sessions_created)
+        bus.subscribe("session_tokens", store.on_tokens_invalidated)
+        bus.subscribe("user_sessions", store.on_users_invalidated)
+        return store
+
+    def _create(self, token: str, user_id: int = 1, expires_in: float = 3600) -> None:
+        self.store.create(user_id, token, datetime.utcnow() + timedelta(seconds=expires_in))
+
+    def _rows(self) -> dict:
+        db = self.session_factory()
+        try:
+            return {row.token: row.is_active for row in db.query(UserSession).all()}
+        finally:
+            db.close()
+
+
+class TestWriteBehind(SessionStoreTestCase):
+    def test_flush_in_batches(self):
+        """测试新会话立即可用，之后按 batch_size 分批写回数据库"""
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        for i in range(5):
+            self._create(f"token-{i}")
+
+        self.assertEqual(self.store.stats()["pending_writes"], 5)
+        self.assertEqual(self._rows(), {})
+        self.assertEqual(self.store.get_active("token-4").user_id, 1)
+
+        self.assertEqual(self.store._flush(), 2)
+        self.assertEqual(len(self._rows()), 2)
+        self.store._flush_all()
+        self.assertEqual(self.store.stats()["pending_writes"], 0)
+        self.assertEqual(self._rows(), {f"token-{i}": True for i in range(5)})
+        self.assertEqual(sum(statement.startswith("INSERT") for statement in statements), 3)
+
+    def test_failed_flush_retried(self):
+        """测试写回失败时会话留在待写队列中重试，期间的登出在写回时生效"""
+        self._create("token-a")
+        self._create("token-b")
+        with mock.patch.object(SessionRepository, "bulk_insert",
+                               side_effect=OperationalError("INSERT", {}, Exception("database is locked"))):
+            self.assertEqual(self.store._flush(), 0)
+        self.assertEqual(self.store.stats()["pending_writes"], 2)
+        self.assertEqual(self._rows(), {})
+
+        self.assertTrue(self.store.invalidate_token("token-a"))
+        self.assertEqual(self.store._flush(), 2)
+        self.assertEqual(self._rows(), {"token-a": False, "token-b": True})
+
+
+class TestExpiry(SessionStoreTestCase):
+    def test_time_wheel_evicts_expired_slots(self):
+        """测试时间轮只淘汰已完全过期的槽，未到期的会话保留"""
+        now = 60 * 1000
+        with mock.patch("security.session_store.time") as fake_time:
+            fake_time.time.return_value = now
+            store = SessionStore(self.session_factory, wheel_slot_seconds=60)
+            for token, offset in (("token-a", 30), ("token-b", 90), ("token-c", 200)):
+                store.create(1, token, EPOCH + timedelta(seconds=now + offset))
+            self.assertEqual(store.stats()["wheel_slots"], 3)
+
+            fake_time.time.return_value = now + 125
+            self.assertEqual(store._evict_expired(), 2)
+            self.assertEqual(store.stats()["sessions"], 1)
+            self.assertEqual(store.stats()["wheel_slots"], 1)
+            # 已处理的槽不再重复扫描
+            self.assertEqual(store._evict_expired(), 0)
+
+            self.assertIsNone(store.get_active("token-b"))
+            self.assertIsNotNone(store.get_active("token-c"))
+
+    def test_lookup_after_expiry(self):
+        """测试会话过期后内存与数据库回退查询都不再返回"""
+        self._create("token-a", expires_in=0.2)
+        self.store._flush_all()
+        self.assertIsNotNone(self.store.get_active("token-a"))
+
+        time.sleep(0.3)
+        self.assertIsNone(self.store.get_active("token-a"))
+        self.assertEqual(self.store.stats()["sessions"], 0)
+        self.assertIsNone(self.store.get_active("token-a"))
+
+    def test_lookup_falls_back_to_database(self):
+        """测试本进程启动前写入数据库的会话通过回退查询加入索引"""
+        self._create("token-a")
+        self.store._flush_all()
+        store = SessionStore(self.session_factory)
+        self.assertEqual(store.get_active("token-a").user_id, 1)
+        self.assertEqual(store.stats()["sessions"], 1)
+
+
+class TestInvalidation(SessionStoreTestCase):
+    def test_new_session_reaches_other_workers(self):
+        """测试新会话在写回数据库之前即可被其他工作进程识别"""
+        self._create("token-a")
+        self.assertTrue(wait_until(lambda: self.peer.stats()["sessions"] == 1))
+        self.assertEqual(self.peer.get_active("token-a").user_id, 1)
+        self.assertEqual(self._rows(), {})
+
+    def test_invalidate_token_propagates(self):
+        """测试登出写入数据库，并使其他工作进程索引中的会话失效"""
+        self._create("token-a")
+        self._create("token-b")
+        self.store._flush_all()
+        self._create("token-c")
+        self.assertTrue(wait_until(lambda: self.peer.stats()["sessions"] == 3))
+
+        self.assertTrue(self.store.invalidate_token("token-a"))
+        # 尚未写回的会话：写回时直接写入失效状态
+        self.assertTrue(self.store.invalidate_token("token-c"))
+        self.assertFalse(self.store.invalidate_token("token-unknown"))
+        self.assertTrue(wait_until(lambda: self.peer.stats()["sessions"] == 1))
+
+        self.store._flush_all()
+        self.assertEqual(self._rows(), {"token-a": False, "token-b": True, "token-c": False})
+        for store in (self.store, self.peer):
+            self.assertIsNone(store.get_active("token-a"))
+            self.assertIsNone(store.get_active("token-c"))
+            self.assertIsNotNone(store.get_active("token-b"))
+
+    def test_invalidate_user_propagates(self):
+        """测试注销用户全部会话后，所有工作进程中该用户的会话都失效，其他用户不受影响"""
+        self._create("token-a", user_id=1)
+        self._create("token-b", user_id=2)
+        self.store._flush_all()
+        self._create("token-c", user_id=1)
+        self.assertTrue(wait_until(lambda: self.peer.stats()["users"] == 2))
+
+        self.assertEqual(self.store.invalidate_user(1), 2)
+        self.assertTrue(wait_until(lambda: self.peer.stats()["users"] == 1))
+
+        self.store._flush_all()
+        self.assertEqual(self._rows(), {"token-a": False, "token-b": True, "token-c": False})
+        for store in (self.store, self.peer):
+            self.assertIsNone(store.get_active("token-a"))
+            self.assertIsNone(store.get_active("token-c"))
+            self.assertEqual(store.get_active("token-b").user_id, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
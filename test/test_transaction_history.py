@@ -0,0 +1,147 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from cryptography.fernet import Fernet
+from api.v1.transactions import TransactionHistoryResponse
+from dal.models.transaction import Transaction
+from dal.repositories.account_repository import AccountRepository
+from dal.repositories.transaction_repository import TransactionRepository
+from security.encryption import EncryptionService
+from services.transaction_service import MAX_DECRYPT_BATCH, TransactionService
+from utils.exceptions import ValidationError
+from sqlite_testcase import SQLiteTestCase
+
+
+class TestHistoryCursor(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        """测试游标编码后可还原 (created_at, transaction_id)"""
+        created_at = datetime(2025, 3, 1, 12, 30, 45, 123456)
+        cursor = TransactionService._encode_cursor(SimpleNamespace(created_at=created_at, transaction_id=42))
+        self.assertEqual(TransactionService._decode_cursor(cursor), (created_at, 42))
+
+    def test_invalid_cursor_rejected(self):
+        for cursor in ("not-a-cursor", "", TransactionService._encode_cursor(
+                SimpleNamespace(created_at=datetime(2025, 1, 1), transaction_id="x"))):
+            with self.assertRaises(ValidationError):
+                TransactionService._decode_cursor(cursor)
+
+
+class HistoryTestCase(SQLiteTestCase):
+    """交易历史测试基类"""
+
+    def _add(self, transaction_id: int, created_at: datetime, from_account_id=1, to_account_id=2,
+             transaction_type="transfer", description=None) -> None:
+        self.db.add(Transaction(transaction_id=transaction_id, from_account_id=from_account_id,
+                                to_account_id=to_account_id, amount=Decimal("1.00"),
+                                transaction_type=transaction_type, status="completed",
+                                description=description, created_at=created_at))
+        self.db.commit()
+
+    def _service(self, encryption_service=None) -> TransactionService:
+        return TransactionService(
+            transaction_repository=TransactionRepository(self.db),
+            account_repository=AccountRepository(self.db),
+            encryption_service=encryption_service
+        )
+
+    def _history(self, account_id: int, **kwargs) -> dict:
+        return asyncio.run(self._service(kwargs.pop("encryption_service", None))
+                           .get_transaction_history(account_id, **kwargs))
+
+
+class TestHistoryPagination(HistoryTestCase):
+    def test_pages_cover_history_in_order(self):
+        """测试键集分页按时间倒序不重不漏，同一时刻的交易按ID排序"""
+        base = datetime(2025, 3, 1)
+        # 转出与转入交错，且 3、4 创建时间相同
+        for i, minute in zip(range(1, 8), (1, 2, 3, 3, 5, 6, 7)):
+            incoming = i % 2 == 0
+            self._add(i, base + timedelta(minutes=minute),
+                      from_account_id=2 if incoming else 1, to_account_id=1 if incoming else 2)
+
+        seen = []
+        cursor = None
+        while True:
+            page = self._history(1, limit=3, cursor=cursor)
+            seen.extend(tx["transaction_id"] for tx in page["transactions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, [7, 6, 5, 4, 3, 2, 1])
+
+    def test_filters(self):
+        """测试日期范围与交易类型过滤"""
+        base = datetime(2025, 3, 1)
+        self._add(1, base, transaction_type="transfer")
+        self._add(2, base + timedelta(days=1), transaction_type="payment")
+        self._add(3, base + timedelta(days=2), transaction_type="transfer")
+
+        page = self._history(1, start_date=base + timedelta(hours=1))
+        self.assertEqual([tx["transaction_id"] for tx in page["transactions"]], [3, 2])
+        page = self._history(1, transaction_type="transfer", end_date=base + timedelta(days=1))
+        self.assertEqual([tx["transaction_id"] for tx in page["transactions"]], [1])
+
+    def test_deposit_serialized_in_history(self):
+        """测试没有转出账户的存款记录可以通过历史响应模型序列化"""
+        self._add(1, datetime(2025, 3, 1), from_account_id=None, to_account_id=1, transaction_type="deposit")
+        self._add(2, datetime(2025, 3, 2))
+
+        response = TransactionHistoryResponse(**self._history(1))
+        self.assertEqual([(tx.transaction_id, tx.from_account_id) for tx in response.transactions],
+                         [(2, 1), (1, None)])
+        self.assertEqual(response.transactions[1].type, "deposit")
+
+    def test_invalid_arguments(self):
+        for kwargs in ({"limit": 0}, {"limit": 501}, {"transaction_type": "refund"}):
+            with self.assertRaises(ValidationError):
+                self._history(1, **kwargs)
+
+
+class StaticKeyManager:
+    """测试用密钥管理器：固定使用一个随机生成的密钥"""
+
+    def __init__(self):
+        self.key = Fernet.generate_key()
+
+    def get_current_key(self) -> bytes:
+        return self.key
+
+
+class TestDescriptionModes(HistoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.encryption_service = EncryptionService(StaticKeyManager())
+        base = datetime(2025, 3, 1)
+        self.ciphertext = self.encryption_service.encrypt_data("salary")
+        self._add(1, base, description=self.ciphertext)
+        self._add(2, base + timedelta(minutes=1), description="corrupted")
+        self._add(3, base + timedelta(minutes=2), from_account_id=3, to_account_id=4,
+                  description=self.encryption_service.encrypt_data("other account"))
+        self._add(4, base + timedelta(minutes=3))
+
+    def _descriptions(self, mode: str) -> dict:
+        page = self._history(1, description_mode=mode, encryption_service=self.encryption_service)
+        return {tx["transaction_id"]: tx["description"] for tx in page["transactions"]}
+
+    def test_history_description_modes(self):
+        """测试解密、保持密文与不返回三种描述模式"""
+        self.assertEqual(self._descriptions("decrypted"), {4: None, 2: "[Encrypted]", 1: "salary"})
+        self.assertEqual(self._descriptions("encrypted"), {4: None, 2: "corrupted", 1: self.ciphertext})
+        self.assertEqual(self._descriptions("omitted"), {4: None, 2: None, 1: None})
+        with self.assertRaises(ValidationError):
+            self._descriptions("plain")
+
+    def test_decrypt_on_demand_limited_to_account(self):
+        """测试按需解密只返回属于该账户且有描述的交易"""
+        service = self._service(self.encryption_service)
+        result = asyncio.run(service.decrypt_descriptions(1, [1, 1, 2, 3, 4, 404]))
+        self.assertEqual(result, {1: "salary", 2: "[Encrypted]"})
+        self.assertEqual(asyncio.run(service.decrypt_descriptions(1, [])), {})
+        with self.assertRaises(ValidationError):
+            asyncio.run(service.decrypt_descriptions(1, list(range(MAX_DECRYPT_BATCH + 1))))
+
+
+if __name__ == '__main__':
+    unittest.main()
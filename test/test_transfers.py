@@ -0,0 +1,205 @@
+import asyncio
+import unittest
+from decimal import Decimal
+from unittest import mock
+from sqlalchemy import event
+from dal.models.account import Account
+from dal.models.ledger_outbox import LedgerOutbox
+from dal.repositories.account_repository import AccountRepository
+from dal.repositories.transaction_repository import TransactionRepository
+from security.blockchain import Blockchain, BlockSealer
+from services.ledger_outbox_service import LedgerReconciler
+from services.transaction_service import MAX_BULK_TRANSFERS, TransactionService
+from utils.exceptions import InsufficientFundsError, ValidationError
+from sqlite_testcase import SQLiteTestCase
+
+
+class LosingSealer(BlockSealer):
+    """模拟进程在交易封装前崩溃：提交的交易直接丢失"""
+
+    def submit(self, transaction: dict) -> None:
+        self.release(1)
+
+
+class TransferTestCase(SQLiteTestCase):
+    """转账测试基类：三个余额为 100.00 的账户"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.add_all([
+            Account(account_id=i, user_id=1, account_type="checking",
+                    account_number=f"ACC{i:011d}", balance=Decimal("100.00"))
+            for i in (1, 2, 3)
+        ])
+        self.db.commit()
+
+    def _service(self, sealer: BlockSealer) -> TransactionService:
+        return TransactionService(
+            transaction_repository=TransactionRepository(self.db),
+            account_repository=AccountRepository(self.db),
+            encryption_service=None,
+            block_sealer=sealer
+        )
+
+    def _balances(self):
+        self.db.expire_all()
+        return {account.account_id: account.balance for account in self.db.query(Account).all()}
+
+
+class TestTransferTransaction(TransferTestCase):
+    def test_accounts_locked_in_id_order(self):
+        """测试按账户ID升序加锁，固定加锁顺序"""
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        accounts = AccountRepository(self.db).lock_accounts([3, 1, 2, 3])
+        self.assertEqual(list(accounts), [1, 2, 3])
+        self.assertIn("ORDER BY accounts.account_id", statements[-1])
+
+    def test_balance_deltas_applied_in_one_update(self):
+        """测试一条 CASE 更新增减多个账户余额，并刷新会话中已加载的余额"""
+        repository = AccountRepository(self.db)
+        accounts = repository.lock_accounts([1, 2])
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        repository.apply_balance_deltas({1: Decimal("-30.00"), 2: Decimal("30.00")})
+        self.assertEqual(len(statements), 1)
+        self.assertIn("CASE", statements[0])
+        self.assertEqual(accounts[1].balance, Decimal("70.00"))
+        self.db.commit()
+        self.assertEqual(self._balances(), {1: Decimal("70.00"), 2: Decimal("130.00"), 3: Decimal("100.00")})
+
+    def test_lock_reads_current_balance_of_loaded_account(self):
+        """测试转账前已加载到会话中的账户，加锁时读取数据库中的最新余额而不是会话中的旧值"""
+        # 会话只弱引用已加载的对象，保留引用使其留在会话中
+        account = self.db.get(Account, 1)
+        self.assertEqual(account.balance, Decimal("100.00"))
+        other = self.session_factory()
+        other.get(Account, 1).balance = Decimal("5.00")
+        other.commit()
+        other.close()
+
+        sealer = BlockSealer(Blockchain(difficulty=1))
+        with self.assertRaises(InsufficientFundsError):
+            asyncio.run(self._service(sealer).create_transaction(1, 2, Decimal("10.00")))
+        sealer.stop(timeout=2)
+        self.assertEqual(self._balances(), {1: Decimal("5.00"), 2: Decimal("100.00"), 3: Decimal("100.00")})
+
+    def test_failed_transfer_rolls_back_and_releases_capacity(self):
+        """测试余额不足时整个事务回滚，并归还预留的上链队列容量"""
+        sealer = BlockSealer(Blockchain(difficulty=1), max_pending=1, submit_timeout=0.05)
+        with self.assertRaises(InsufficientFundsError):
+            asyncio.run(self._service(sealer).create_transaction(1, 2, Decimal("500.00")))
+
+        self.assertEqual(self._balances()[1], Decimal("100.00"))
+        sealer.reserve()
+        sealer.release()
+        sealer.stop(timeout=2)
+
+
+class TestLedgerReconciliation(TransferTestCase):
+    def test_committed_transfer_recovered_after_lost_queue(self):
+        """测试封装前丢失的已提交交易由对账任务补回，且只上链一次"""
+        blockchain = Blockchain(difficulty=1)
+        result = asyncio.run(self._service(LosingSealer(blockchain)).create_transaction(1, 2, Decimal("10.00")))
+        transaction_id = result["transaction_id"]
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 1)
+        self.assertIsNone(blockchain.index.find_transaction(transaction_id))
+
+        sealer = BlockSealer(blockchain)
+        reconciler = LedgerReconciler(self.session_factory, lambda: sealer, grace_seconds=0)
+        sealer.on_sealed = reconciler.mark_sealed
+        with blockchain._seal_lock:
+            self.assertEqual(reconciler.run_once(), 1)
+            # 封装完成前再次对账会重复提交同一交易，封装器只上链一次
+            self.assertEqual(reconciler.run_once(), 1)
+        sealer.stop(timeout=2)
+
+        sealed = [tx["transaction_id"] for block in blockchain.chain[1:] for tx in block.transactions]
+        self.assertEqual(sealed, [transaction_id])
+        self.db.expire_all()
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 0)
+        self.assertEqual(reconciler.run_once(), 0)
+
+    def test_transfer_on_worker_without_sealer(self):
+        """测试非账本写入进程的转账正常提交，由写入进程的对账任务上链"""
+        with mock.patch("services.transaction_service.get_ledger_writer", return_value=None):
+            result = asyncio.run(self._service(None).create_transaction(1, 2, Decimal("10.00")))
+        self.assertEqual(self._balances()[2], Decimal("110.00"))
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 1)
+
+        blockchain = Blockchain(difficulty=1)
+        sealer = BlockSealer(blockchain)
+        reconciler = LedgerReconciler(self.session_factory, lambda: sealer, grace_seconds=0)
+        sealer.on_sealed = reconciler.mark_sealed
+        self.assertEqual(reconciler.run_once(), 1)
+        sealer.stop(timeout=2)
+        self.assertIsNotNone(blockchain.index.find_transaction(result["transaction_id"]))
+        self.db.expire_all()
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 0)
+
+    def test_sealed_entries_only_cleared(self):
+        """测试已在链上但对账记录未删除的交易直接清除，不再重新封装"""
+        blockchain = Blockchain(difficulty=1)
+        sealer = BlockSealer(blockchain)
+        result = asyncio.run(self._service(sealer).create_transaction(1, 2, Decimal("10.00")))
+        sealer.stop(timeout=2)
+        self.assertIsNotNone(blockchain.index.find_transaction(result["transaction_id"]))
+
+        reconciler = LedgerReconciler(self.session_factory, lambda: sealer, grace_seconds=0)
+        self.assertEqual(reconciler.run_once(), 0)
+        self.db.expire_all()
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 0)
+        self.assertEqual(len(blockchain.chain), 2)
+
+
+class TestBulkTransfers(TransferTestCase):
+    def _bulk(self, transfers, sealer: BlockSealer = None):
+        service = self._service(sealer or BlockSealer(Blockchain(difficulty=1)))
+        return asyncio.run(service.create_transactions_bulk(1, transfers))
+
+    def test_invalid_batches_rejected(self):
+        """测试空批次、超出上限、非正金额和转给自己的批次在加锁前被拒绝"""
+        invalid = [
+            [],
+            [{"to_account_id": 2, "amount": "1"}] * (MAX_BULK_TRANSFERS + 1),
+            [{"to_account_id": 2, "amount": "1"}, {"to_account_id": 3, "amount": "0"}],
+            [{"to_account_id": 1, "amount": "1"}],
+        ]
+        for transfers in invalid:
+            with self.assertRaises(ValidationError):
+                self._bulk(transfers)
+        self.assertEqual(set(self._balances().values()), {Decimal("100.00")})
+
+    def test_missing_account_and_insufficient_funds(self):
+        """测试收款账户不存在或总额超过余额时整批回滚"""
+        with self.assertRaises(ValidationError):
+            self._bulk([{"to_account_id": 2, "amount": "1"}, {"to_account_id": 9, "amount": "1"}])
+        with self.assertRaises(InsufficientFundsError):
+            self._bulk([{"to_account_id": 2, "amount": "60"}, {"to_account_id": 3, "amount": "60"}])
+        self.assertEqual(set(self._balances().values()), {Decimal("100.00")})
+
+    def test_batch_applies_net_deltas_and_seals_one_block(self):
+        """测试按净额更新余额，整批交易封装为一个区块"""
+        blockchain = Blockchain(difficulty=1)
+        sealer = BlockSealer(blockchain, batch_size=2)
+        result = self._bulk([
+            {"to_account_id": 2, "amount": "10", "description": None},
+            {"to_account_id": 3, "amount": "20", "description": None},
+            {"to_account_id": 2, "amount": "5", "description": None},
+        ], sealer)
+        sealer.stop(timeout=2)
+
+        self.assertEqual(result["count"], 3)
+        self.assertEqual(self._balances(), {1: Decimal("65.00"), 2: Decimal("115.00"), 3: Decimal("120.00")})
+        self.assertEqual(len(blockchain.chain), 2)
+        self.assertEqual([tx["transaction_id"] for tx in blockchain.chain[1].transactions],
+                         [tx["transaction_id"] for tx in result["transactions"]])
+        self.assertEqual(self.db.query(LedgerOutbox).count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+from config.setting import CACHE
+from utils.cache_bus import invalidation_bus
+
+
+class TTLCache:
+    """
+    线程安全的进程内 TTL + LRU 缓存
+    - 条目超过 ttl 秒后失效，超过 max_entries 时淘汰最久未使用的条目
+    - get_or_load 在加载期间若同一分段发生失效则不写入缓存，避免并发写入后缓存旧值
+    """
+
+    GENERATION_STRIPES = 64
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations = [0] * self.GENERATION_STRIPES
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def _stripe(self, key: Hashable) -> int:
+        return hash(key) % self.GENERATION_STRIPES
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """写入缓存，ttl 为该条目的有效期（默认使用缓存的 ttl）"""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        读取缓存，未命中时调用 loader 加载并写入（loader 返回None时不缓存）
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        stripe = self._stripe(key)
+        generation = self._generations[stripe]
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if self._generations[stripe] == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self.invalidate_many((key,))
+
+    def invalidate_many(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._generations[self._stripe(key)] += 1
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = [generation + 1 for generation in self._generations]
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations
+            }
+
+    def _store(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+# 账户快照缓存（余额轮询等热点读取）
+account_cache = TTLCache("accounts", ttl=CACHE["account_ttl_seconds"], max_entries=CACHE["account_max_entries"])
+invalidation_bus.subscribe("accounts", account_cache.invalidate_many)
+
+# 用户角色缓存（user_id -> 角色名称集合），角色分配/移除时失效
+role_cache = TTLCache("roles", ttl=CACHE["role_ttl_seconds"], max_entries=CACHE["role_max_entries"])
+invalidation_bus.subscribe("users", role_cache.invalidate_many)
+
+# 用户账户ID集合缓存（user_id -> 账户ID集合），开户、销户时失效
+user_accounts_cache = TTLCache("user_accounts", ttl=CACHE["user_accounts_ttl_seconds"],
+                               max_entries=CACHE["user_accounts_max_entries"])
+invalidation_bus.subscribe("user_accounts", user_accounts_cache.invalidate_many)
@@ -0,0 +1,148 @@
+import json
+import os
+import socket
+import stat
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from config.setting import CACHE
+from utils.exceptions import SecurityError
+from utils.logger import bank_logger
+
+# 单个数据报最多携带的实体ID数，避免超出Unix数据报大小限制
+MAX_IDS_PER_MESSAGE = 500
+
+
+class InvalidationBus:
+    """
+    同一主机上多个工作进程之间的缓存失效总线
+    每个进程在 socket_dir 下绑定一个 Unix 数据报套接字（<pid>.sock），
+    发布时向目录中其他进程的套接字逐个发送 {"entity", "ids"}，
+    后台线程接收其他进程的事件并分发给本进程订阅的缓存
+    未启动时 publish 只在本进程内分发
+    能向目录中的套接字发送数据报即可伪造失效与会话事件，因此目录必须属于当前用户且权限为 0700
+    """
+
+    def __init__(self, socket_dir: str, name: str = None):
+        self.socket_dir = socket_dir
+        # 套接字文件名，默认使用进程号
+        self.name = name
+        self._handlers: Dict[str, List[Callable[[List], None]]] = defaultdict(list)
+        self._socket: Optional[socket.socket] = None
+        self._socket_path: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._send_lock = threading.Lock()
+
+    def subscribe(self, entity: str, handler: Callable[[List], None]) -> None:
+        """订阅实体的失效事件，handler 接收失效的实体ID列表"""
+        self._handlers[entity].append(handler)
+
+    def publish(self, entity: str, ids: List) -> None:
+        """在本进程分发失效事件，并广播给同一主机上的其他工作进程"""
+        ids = list(ids)
+        if not ids:
+            return
+        self.publish_local(entity, ids)
+        if self._socket is not None:
+            for start in range(0, len(ids), MAX_IDS_PER_MESSAGE):
+                self._broadcast({"entity": entity, "ids": ids[start:start + MAX_IDS_PER_MESSAGE]})
+
+    def publish_local(self, entity: str, ids: List) -> None:
+        for handler in self._handlers.get(entity, ()):
+            try:
+                handler(ids)
+            except Exception as e:
+                bank_logger.error(f"Invalidation handler for {entity} failed: {str(e)}")
+
+    def start(self) -> None:
+        if self._socket is not None:
+            return
+        if not hasattr(socket, "AF_UNIX"):
+            bank_logger.warning("Unix sockets are not available, cache invalidation bus disabled")
+            return
+
+        self._prepare_socket_dir()
+        self._socket_path = os.path.join(self.socket_dir, f"{self.name or os.getpid()}.sock")
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self._socket_path)
+        self._socket = sock
+        self._thread = threading.Thread(target=self._listen, name="cache-invalidation-bus", daemon=True)
+        self._thread.start()
+        bank_logger.info(f"Cache invalidation bus listening on {self._socket_path}")
+
+    def _prepare_socket_dir(self) -> None:
+        """创建套接字目录（0700），已存在时校验所有者并收紧权限"""
+        os.makedirs(self.socket_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(self.socket_dir)
+        if not stat.S_ISDIR(info.st_mode):
+            raise SecurityError(f"Cache bus socket path {self.socket_dir} is not a directory")
+        if info.st_uid != os.getuid():
+            raise SecurityError(f"Cache bus socket directory {self.socket_dir} is owned by another user")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            bank_logger.warning(f"Restricting permissions of {self.socket_dir} to 0700")
+            os.chmod(self.socket_dir, 0o700)
+
+    def stop(self) -> None:
+        sock, self._socket = self._socket, None
+        if sock is None:
+            return
+        try:
+            # 唤醒接收线程
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+    def _broadcast(self, message: Dict) -> None:
+        data = json.dumps(message).encode()
+        try:
+            peers = [name for name in os.listdir(self.socket_dir) if name.endswith(".sock")]
+        except FileNotFoundError:
+            return
+
+        with self._send_lock:
+            for name in peers:
+                path = os.path.join(self.socket_dir, name)
+                if path == self._socket_path:
+                    continue
+                try:
+                    self._socket.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # 进程已退出但套接字文件仍在，清理掉
+                    self._remove_stale(path)
+                except OSError as e:
+                    bank_logger.warning(f"Failed to send invalidation to {path}: {str(e)}")
+
+    @staticmethod
+    def _remove_stale(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _listen(self) -> None:
+        sock = self._socket
+        while self._socket is not None:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                break
+            if not data:
+                continue
+            try:
+                message = json.loads(data)
+                self.publish_local(message["entity"], message["ids"])
+            except Exception as e:
+                bank_logger.warning(f"Ignoring malformed invalidation message: {str(e)}")
+
+
+# 全局失效总线，各进程内缓存在此订阅
+invalidation_bus = InvalidationBus(CACHE["bus_socket_dir"])
@@ -18,6 +18,10 @@ class TransactionError(BankException):
     """Raised when transaction processing fails"""
     pass
 
+class LedgerLockedError(TransactionError):
+    """Raised when the ledger storage is held by another process"""
+    pass
+
 class SecurityError(BankException):
     """Raised when security related operations fail"""
     pass
@@ -3,6 +3,20 @@ from typing import Any, Dict
 from utils.exceptions import ValidationError
 
 
+def account_number_check_digit(digits: str) -> str:
+    """计算数字串的Luhn校验位"""
+    total = 0
+    # 从右往左，校验位将追加在最右侧，因此最右一位需要加倍
+    for i, char in enumerate(reversed(digits)):
+        value = int(char)
+        if i % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
 class DataValidator:
     @staticmethod
     def validate_user_data(data: Dict[str, Any]) -> bool:
@@ -28,6 +42,17 @@ class DataValidator:
 
         return True
 
+    @staticmethod
+    def validate_account_number(account_number: str, prefix: str = "ACC") -> bool:
+        body = account_number[len(prefix):] if account_number and account_number.startswith(prefix) else ""
+        if len(body) < 2 or not body.isdigit():
+            raise ValidationError("Invalid account number format")
+
+        if account_number_check_digit(body[:-1]) != body[-1]:
+            raise ValidationError("Invalid account number check digit")
+
+        return True
+
     @staticmethod
     def validate_transaction_data(data: Dict[str, Any]) -> bool:
         if not data.get('amount') or Decimal(str(data['amount'])) <= 0: